@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+
+# Incremental project deploy helpers
+# Author: KOP3MA
+#
+# A manifest (.deploy-manifest.json) in the target directory remembers the
+# CRC32, size and mtime of every file the last deploy wrote. A new archive is
+# compared member by member against it and only added or modified files are
+# written; files are re-hashed only when their size or mtime changed since.
+
+import os
+import sys
+import json
+import time
+import zlib
+import shutil
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+# =======================
+# 🟢 Configuration
+# =======================
+MANIFEST_NAME = ".deploy-manifest.json"
+CHUNK_SIZE = 64 * 1024
+HASH_WORKERS = 4
+PARALLEL_THRESHOLD = 64
+
+# =======================
+# 🟢 Manifest
+# =======================
+def load_manifest(root):
+    try:
+        with open(os.path.join(root, MANIFEST_NAME)) as f:
+            return json.load(f).get("files", {})
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(root, files):
+    path = os.path.join(root, MANIFEST_NAME)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"updated": int(time.time()), "files": files}, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+def file_crc32(path):
+    crc = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            crc = zlib.crc32(chunk, crc)
+    return crc
+
+def member_path(root, name):
+    parts = [p for p in name.replace("\\", "/").split("/") if p not in ("", ".", "..")]
+    return os.path.join(root, *parts) if parts else None
+
+def file_entry(path, crc):
+    st = os.stat(path)
+    return {"crc": crc, "size": st.st_size, "mtime": st.st_mtime_ns}
+
+# =======================
+# 🟢 Existing tree state
+# =======================
+def current_state(root, names, manifest, workers=HASH_WORKERS):
+    # Returns {name: (crc, size)} for files that exist under root
+    state = {}
+    to_hash = []
+    for name in names:
+        path = member_path(root, name)
+        if not path or not os.path.isfile(path):
+            continue
+        st = os.stat(path)
+        known = manifest.get(name)
+        if known and known["size"] == st.st_size and known["mtime"] == st.st_mtime_ns:
+            state[name] = (known["crc"], st.st_size)
+        else:
+            to_hash.append((name, path, st.st_size))
+
+    def hash_one(item):
+        name, path, size = item
+        return name, (file_crc32(path), size)
+
+    if len(to_hash) >= PARALLEL_THRESHOLD and workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            state.update(pool.map(hash_one, to_hash))
+    else:
+        state.update(map(hash_one, to_hash))
+    return state
+
+# =======================
+# 🟢 Delta extraction from a zip on disk
+# =======================
+def new_stats():
+    return {"written": 0, "skipped": 0, "deleted": 0, "bytes_written": 0, "bytes_skipped": 0}
+
+def remove_stale(root, manifest, keep, stats):
+    for name in manifest:
+        if name in keep:
+            continue
+        path = member_path(root, name)
+        if path and os.path.isfile(path):
+            os.remove(path)
+            stats["deleted"] += 1
+
+def delta_extract(zip_path, dest, delete_stale=False, workers=HASH_WORKERS):
+    start = time.monotonic()
+    os.makedirs(dest, exist_ok=True)
+    manifest = load_manifest(dest)
+    stats = new_stats()
+    files = {}
+
+    with zipfile.ZipFile(zip_path) as archive:
+        members = [m for m in archive.infolist() if not m.is_dir() and member_path(dest, m.filename)]
+        state = current_state(dest, [m.filename for m in members], manifest, workers)
+        for m in members:
+            path = member_path(dest, m.filename)
+            if state.get(m.filename) == (m.CRC, m.file_size):
+                stats["skipped"] += 1
+                stats["bytes_skipped"] += m.file_size
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                part = path + ".part"
+                with archive.open(m) as src, open(part, "wb") as out:
+                    shutil.copyfileobj(src, out, CHUNK_SIZE)
+                os.replace(part, path)
+                stats["written"] += 1
+                stats["bytes_written"] += m.file_size
+            files[m.filename] = file_entry(path, m.CRC)
+
+    if delete_stale:
+        remove_stale(dest, manifest, files, stats)
+    save_manifest(dest, files)
+    stats["seconds"] = time.monotonic() - start
+    return stats
+
+# =======================
+# 🟢 Delta support for streamzip.extract_stream
+# =======================
+class StreamDelta:
+    def __init__(self, dest, delete_stale=False):
+        self.dest = dest
+        self.delete_stale = delete_stale
+        self.manifest = load_manifest(dest)
+        self.files = {}
+        self.stats = new_stats()
+        self.start = time.monotonic()
+
+    def should_write(self, name, crc, size):
+        path = member_path(self.dest, name)
+        if crc is None or not path or not os.path.isfile(path):
+            return True
+        state = current_state(self.dest, [name], self.manifest, workers=1)
+        if state.get(name) == (crc, size):
+            self.stats["skipped"] += 1
+            self.stats["bytes_skipped"] += size
+            self.files[name] = file_entry(path, crc)
+            return False
+        return True
+
+    def written(self, name, crc, size):
+        self.stats["written"] += 1
+        self.stats["bytes_written"] += size
+        self.files[name] = file_entry(member_path(self.dest, name), crc)
+
+    def finish(self):
+        if self.delete_stale:
+            remove_stale(self.dest, self.manifest, self.files, self.stats)
+        save_manifest(self.dest, self.files)
+        self.stats["seconds"] = time.monotonic() - self.start
+        return self.stats
+
+# =======================
+# 🟢 Release directories
+# =======================
+#   <root>/releases/<id>/      one full tree per deploy, unchanged files hardlinked
+#   <root>/releases/<id>.tmp/  release being built, renamed to <id> by publish()
+#   <root>/current             symlink to the live release, swapped with rename()
+class ReleaseStore:
+    def __init__(self, root):
+        self.root = root
+        self.releases_dir = os.path.join(root, "releases")
+        self.current_link = os.path.join(root, "current")
+
+    def list_releases(self):
+        if not os.path.isdir(self.releases_dir):
+            return []
+        return sorted(d for d in os.listdir(self.releases_dir)
+                      if os.path.isdir(os.path.join(self.releases_dir, d)) and not d.endswith(".tmp"))
+
+    def release_path(self, release_id):
+        return os.path.join(self.releases_dir, release_id)
+
+    def pending_path(self, release_id):
+        return self.release_path(release_id) + ".tmp"
+
+    def _pending(self):
+        if not os.path.isdir(self.releases_dir):
+            return []
+        return [d[:-len(".tmp")] for d in os.listdir(self.releases_dir) if d.endswith(".tmp")]
+
+    def current(self):
+        if not os.path.islink(self.current_link):
+            return None
+        return os.path.basename(os.readlink(self.current_link))
+
+    def _new_id(self):
+        release_id = time.strftime("%Y%m%d-%H%M%S")
+        n = 1
+        while os.path.exists(self.release_path(release_id)) or os.path.exists(self.pending_path(release_id)):
+            n += 1
+            release_id = time.strftime("%Y%m%d-%H%M%S") + f"-{n:02d}"
+        return release_id
+
+    def _link_tree(self, src, dst):
+        # Hardlink every file of src into dst; copy when src is on another filesystem
+        linked = copied = 0
+        for dirpath, dirnames, filenames in os.walk(src):
+            rel = os.path.relpath(dirpath, src)
+            target_dir = os.path.normpath(os.path.join(dst, rel))
+            os.makedirs(target_dir, exist_ok=True)
+            # os.walk lists symlinks to directories under dirnames and does not descend into them
+            for name in dirnames:
+                s = os.path.join(dirpath, name)
+                if os.path.islink(s):
+                    os.symlink(os.readlink(s), os.path.join(target_dir, name))
+            for name in filenames:
+                s, d = os.path.join(dirpath, name), os.path.join(target_dir, name)
+                if os.path.islink(s):
+                    os.symlink(os.readlink(s), d)
+                    continue
+                try:
+                    os.link(s, d)
+                    linked += 1
+                except OSError:
+                    shutil.copy2(s, d)
+                    copied += 1
+        return linked, copied
+
+    def prepare(self, seed_dir=None):
+        # New <id>.tmp dir pre-filled from the live release (or a legacy tree);
+        # it is not a release until publish() renames it
+        os.makedirs(self.releases_dir, exist_ok=True)
+        release_id = self._new_id()
+        path = self.pending_path(release_id)
+        base = self.current()
+        source = self.release_path(base) if base else seed_dir
+        os.makedirs(path)
+        linked = copied = 0
+        if source and os.path.isdir(source):
+            linked, copied = self._link_tree(source, path)
+        return release_id, path, {"base": base or source, "linked": linked, "copied": copied}
+
+    def publish(self, release_id):
+        # Call once the extract into the prepared dir succeeded
+        if release_id not in self._pending():
+            raise ValueError(f"no release being built: {release_id}")
+        os.rename(self.pending_path(release_id), self.release_path(release_id))
+
+    def activate(self, release_id):
+        # Only names list_releases() returns, so "../.." or a half-built release never go live
+        if release_id not in self.list_releases():
+            raise ValueError(f"unknown release: {release_id}")
+        start = time.perf_counter()
+        tmp = self.current_link + ".tmp"
+        if os.path.lexists(tmp):
+            os.remove(tmp)
+        os.symlink(os.path.join("releases", release_id), tmp)
+        os.replace(tmp, self.current_link)
+        return time.perf_counter() - start
+
+    def rollback(self):
+        releases = self.list_releases()
+        current = self.current()
+        if current not in releases or releases.index(current) == 0:
+            raise ValueError("no previous release to roll back to")
+        target = releases[releases.index(current) - 1]
+        return target, self.activate(target)
+
+    def discard(self, release_id):
+        if release_id in self._pending():
+            shutil.rmtree(self.pending_path(release_id))
+            return
+        if release_id not in self.list_releases():
+            raise ValueError(f"unknown release: {release_id}")
+        if release_id == self.current():
+            raise ValueError("cannot remove the live release")
+        shutil.rmtree(self.release_path(release_id))
+
+    def prune(self, keep=5):
+        releases = self.list_releases()
+        current = self.current()
+        removed = []
+        for release_id in releases[:-keep] if keep else releases:
+            if release_id != current:
+                shutil.rmtree(self.release_path(release_id))
+                removed.append(release_id)
+        return removed
+
+def format_stats(stats):
+    return (f"{stats['written']} written ({stats['bytes_written'] / 1024:.0f} KB), "
+            f"{stats['skipped']} unchanged ({stats['bytes_skipped'] / 1024:.0f} KB skipped), "
+            f"{stats['deleted']} stale removed")
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: deploy.py ZIP DEST [--delete-stale]")
+        sys.exit(2)
+    result = delta_extract(sys.argv[1], sys.argv[2], delete_stale="--delete-stale" in sys.argv[3:])
+    print(f"✅ {format_stats(result)} in {result['seconds']:.2f}s")
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+
+# Domain-suffix trie compiler for dnsmasq `nftset=` rules
+# Author: KOP3MA
+#
+# dnsmasq matches a domain and every name below it, so `a.example.ir` adds
+# nothing once `example.ir` is listed. Domains are inserted into a trie keyed
+# by reversed labels (ir -> example -> a); a terminal node drops its subtree
+# and anything below a terminal is never inserted. The survivors are packed
+# many per line: nftset=/d1/d2/.../4#inet#table#set
+#
+# The config goes to /etc/dnsmasq.d, which survives a reboot unlike
+# /tmp/dnsmasq.d; /etc/dnsmasq.conf gets a conf-dir line for it once. The
+# target sets are created through nftset.py before dnsmasq is restarted.
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+import nftset
+
+# =======================
+# 🟢 Configuration
+# =======================
+NFT_FAMILY = nftset.NFT_FAMILY
+NFT_TABLE = nftset.NFT_TABLE
+NFT_SET_V4 = nftset.DOMAIN_SET_V4
+NFT_SET_V6 = nftset.DOMAIN_SET_V6
+DNSMASQ_CONF = "/etc/dnsmasq.conf"
+CONF_DIR = "/etc/dnsmasq.d"
+RUNTIME_CONF_DIR = "/tmp/dnsmasq.d"    # read by OpenWrt's dnsmasq without a conf-dir line
+DEFAULT_OUTPUT = os.path.join(CONF_DIR, "minerpanel-nftset.conf")
+DNSMASQ_RESTART = ["/etc/init.d/dnsmasq", "restart"]
+MAX_LINE = 1000
+PREFIXES = ("domain:", "full:", "*.", ".")
+
+TERMINAL = ""
+
+# =======================
+# 🟢 Parsing
+# =======================
+def normalize_domain(text):
+    # Returns the lowercase ASCII domain or None when the entry is not a usable domain
+    text = text.split("#", 1)[0].strip().lower()
+    for prefix in PREFIXES:
+        if text.startswith(prefix):
+            text = text[len(prefix):]
+    text = text.strip(".")
+    if not text or "/" in text or " " in text:
+        return None
+    try:
+        text = text.encode("idna").decode()
+    except UnicodeError:
+        return None
+    labels = text.split(".")
+    if len(text) > 253 or any(not 0 < len(l) <= 63 for l in labels):
+        return None
+    if all(l.isdigit() for l in labels):
+        return None
+    return text
+
+# =======================
+# 🟢 Suffix trie
+# =======================
+class DomainTrie:
+    def __init__(self):
+        self.root = {}
+        self.inserted = 0
+        self.covered = 0
+
+    def add(self, domain):
+        # Returns False when an existing suffix already covers the domain
+        node = self.root
+        for label in reversed(domain.split(".")):
+            if TERMINAL in node:
+                self.covered += 1
+                return False
+            node = node.setdefault(label, {})
+        if TERMINAL in node:
+            self.covered += 1
+            return False
+        if node:
+            # Everything already below this name is now redundant
+            self.covered += self._count(node)
+            node.clear()
+        node[TERMINAL] = True
+        self.inserted += 1
+        return True
+
+    def _count(self, node):
+        count = 0
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            for label, child in current.items():
+                if label == TERMINAL:
+                    count += 1
+                else:
+                    stack.append(child)
+        return count
+
+    def domains(self):
+        # Sorted by reversed labels, so names under one suffix end up next to each other
+        result = []
+        stack = [(self.root, [])]
+        while stack:
+            node, labels = stack.pop()
+            if TERMINAL in node:
+                result.append(".".join(reversed(labels)))
+                continue
+            for label in sorted(node, reverse=True):
+                stack.append((node[label], labels + [label]))
+        return result
+
+def load_domains(paths):
+    # Returns (trie, stats) for one or more list files
+    trie = DomainTrie()
+    stats = {"lines": 0, "invalid": 0, "duplicates": 0, "chars": 0}
+    seen = set()
+    for path in paths:
+        with open(path) as f:
+            for raw in f:
+                if not raw.split("#", 1)[0].strip():
+                    continue
+                stats["lines"] += 1
+                domain = normalize_domain(raw)
+                if domain is None:
+                    stats["invalid"] += 1
+                    continue
+                stats["chars"] += len(domain)
+                if domain in seen:
+                    stats["duplicates"] += 1
+                else:
+                    seen.add(domain)
+                    trie.add(domain)
+    return trie, stats
+
+# =======================
+# 🟢 dnsmasq config
+# =======================
+def set_spec(family=NFT_FAMILY, table=NFT_TABLE, set4=NFT_SET_V4, set6=None):
+    specs = [f"4#{family}#{table}#{set4}"]
+    if set6:
+        specs.append(f"6#{family}#{table}#{set6}")
+    return ",".join(specs)
+
+def render_config(domains, spec, max_line=MAX_LINE):
+    lines = []
+    current = []
+    length = len("nftset=/") + len(spec)
+    for domain in domains:
+        extra = len(domain) + 1
+        if current and length + extra > max_line:
+            lines.append(f"nftset=/{'/'.join(current)}/{spec}")
+            current, length = [], len("nftset=/") + len(spec)
+        current.append(domain)
+        length += extra
+    if current:
+        lines.append(f"nftset=/{'/'.join(current)}/{spec}")
+    return lines
+
+def naive_size(stats, spec):
+    # What one `nftset=` line per valid input entry would have cost
+    lines = stats["lines"] - stats["invalid"]
+    return lines, lines * (len("nftset=//\n") + len(spec)) + stats["chars"]
+
+def write_config(path, lines):
+    # Returns False when the file already has this content
+    text = "# Generated by domaintrie.py, do not edit\n" + "".join(l + "\n" for l in lines)
+    try:
+        with open(path) as f:
+            if f.read() == text:
+                return False
+    except OSError:
+        pass
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        f.write(text)
+    os.replace(tmp, path)
+    return True
+
+def ensure_conf_dir(conf_dir, conf=DNSMASQ_CONF):
+    # dnsmasq on OpenWrt only reads /tmp/dnsmasq.d by itself; returns True when the line was added
+    line = f"conf-dir={conf_dir}"
+    try:
+        with open(conf) as f:
+            text = f.read()
+    except FileNotFoundError:
+        text = ""
+    if line in text.splitlines():
+        return False
+    with open(conf, "a") as f:
+        f.write(("" if not text or text.endswith("\n") else "\n") + line + "\n")
+    return True
+
+def reload_dnsmasq(command=DNSMASQ_RESTART):
+    start = time.perf_counter()
+    result = subprocess.run(command, capture_output=True, text=True)
+    return result.returncode == 0, (result.stderr or result.stdout).strip(), time.perf_counter() - start
+
+# =======================
+# 🟢 CLI
+# =======================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile domain lists into compact dnsmasq nftset= rules")
+    parser.add_argument("lists", nargs="+", help="domain list files, one domain per line")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT, help="dnsmasq config (default: %(default)s)")
+    parser.add_argument("--family", default=NFT_FAMILY)
+    parser.add_argument("--table", default=NFT_TABLE)
+    parser.add_argument("--set4", default=NFT_SET_V4)
+    parser.add_argument("--set6", help=f"also fill an IPv6 set, e.g. {NFT_SET_V6}")
+    parser.add_argument("--max-line", type=int, default=MAX_LINE, help="longest config line (default: %(default)s)")
+    parser.add_argument("--reload", action="store_true", help="restart dnsmasq when the config changed and time it")
+    parser.add_argument("--dry-run", action="store_true", help="print the config, write nothing")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        trie, stats = load_domains(args.lists)
+    except OSError as e:
+        print(f"❌ {e}")
+        return 1
+    spec = set_spec(args.family, args.table, args.set4, args.set6)
+    domains = trie.domains()
+    lines = render_config(domains, spec, args.max_line)
+    elapsed = time.perf_counter() - start
+
+    if args.dry_run:
+        sys.stdout.write("".join(l + "\n" for l in lines))
+        out = sys.stderr
+    else:
+        out = sys.stdout
+    naive_lines, naive_bytes = naive_size(stats, spec)
+    size = sum(len(l) + 1 for l in lines)
+    print(f"📄 Input entries:      {stats['lines']} ({stats['invalid']} invalid, {stats['duplicates']} duplicate)", file=out)
+    print(f"🌳 Covered by suffix:  {trie.covered}", file=out)
+    print(f"✅ Domains kept:       {len(domains)}", file=out)
+    print(f"📦 Config lines:       {len(lines)} instead of {naive_lines} "
+          f"({100 * (1 - len(lines) / naive_lines) if naive_lines else 0:.1f}% fewer), "
+          f"{size} bytes instead of {naive_bytes}", file=out)
+    print(f"⏱ Compiled in {elapsed * 1000:.1f} ms", file=out)
+    if args.dry_run:
+        return 0
+
+    try:
+        changed = write_config(args.output, lines)
+    except OSError as e:
+        print(f"❌ {e}")
+        return 1
+    print(f"💾 {args.output} {'updated' if changed else 'unchanged'}")
+    conf_dir = os.path.dirname(os.path.abspath(args.output))
+    try:
+        if conf_dir != RUNTIME_CONF_DIR and ensure_conf_dir(conf_dir, DNSMASQ_CONF):
+            changed = True
+            print(f"📝 Added conf-dir={conf_dir} to {DNSMASQ_CONF}")
+        ok, error = nftset.ensure_domain_sets(args.family, args.table, args.set4, args.set6,
+                                              nftset.NFT_INCLUDE)
+    except OSError as e:
+        ok, error = False, str(e)
+    if not ok:
+        print(f"❌ Cannot create the nft sets: {error}")
+        return 1
+    if args.reload and changed:
+        ok, error, seconds = reload_dnsmasq()
+        if not ok:
+            print(f"❌ dnsmasq restart failed: {error}")
+            return 1
+        print(f"🔄 dnsmasq restarted in {seconds * 1000:.0f} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+
+# Resumable HTTP downloader with a content-addressed cache
+# Author: KOP3MA
+#
+# Layout of the cache directory:
+#   index.json            key -> {validator, size, sha256}
+#   blobs/<sha256>        finished downloads, shared by every key with that content
+#   partial/<key>.part    interrupted download, resumed with an HTTP Range request
+#   partial/<key>.json    validator/size the partial file belongs to
+
+import os
+import sys
+import json
+import time
+import hashlib
+import urllib.error
+import urllib.request
+
+# =======================
+# 🟢 Configuration
+# =======================
+CACHE_DIR = os.environ.get("MINERPANEL_DOWNLOAD_CACHE", "/root/.cache/minerpanel/downloads")
+CHUNK_SIZE = 64 * 1024
+HTTP_TIMEOUT = 60
+RETRIES = 5
+PROGRESS_INTERVAL = 0.5
+USER_AGENT = "minerpanel/3.0"
+
+class DownloadError(Exception):
+    pass
+
+# =======================
+# 🟢 Machine-readable progress
+# =======================
+def json_progress(event, stream=sys.stdout):
+    stream.write(json.dumps(event, sort_keys=True) + "\n")
+    stream.flush()
+
+def _emit(on_progress, event, **fields):
+    if on_progress:
+        fields["event"] = event
+        on_progress(fields)
+
+# =======================
+# 🟢 HTTP helpers
+# =======================
+def _open(url, headers=None, timeout=HTTP_TIMEOUT):
+    all_headers = {"User-Agent": USER_AGENT}
+    all_headers.update(headers or {})
+    return urllib.request.urlopen(urllib.request.Request(url, headers=all_headers), timeout=timeout)
+
+def probe(url, timeout=HTTP_TIMEOUT):
+    # A one-byte range request tells us size, validator and range support in one round trip
+    with _open(url, {"Range": "bytes=0-0"}, timeout) as resp:
+        validator = resp.headers.get("ETag") or resp.headers.get("Last-Modified")
+        if resp.status == 206:
+            total = resp.headers.get("Content-Range", "").rsplit("/", 1)[-1]
+            size = int(total) if total.isdigit() else None
+            ranges = True
+        else:
+            length = resp.headers.get("Content-Length")
+            size = int(length) if length and length.isdigit() else None
+            ranges = resp.headers.get("Accept-Ranges", "").lower() == "bytes"
+        if resp.headers.get_content_type() == "text/html":
+            raise DownloadError("server returned an HTML page instead of the file")
+    return {"validator": validator, "size": size, "ranges": ranges}
+
+def resume_matches(resp, offset, size):
+    # A resumed body must be a 206 that starts at our offset and, when the size
+    # is known, belongs to a file of that size
+    if resp.status != 206:
+        return False
+    content_range = resp.headers.get("Content-Range", "")
+    if not content_range.startswith(f"bytes {offset}-"):
+        return False
+    total = content_range.rsplit("/", 1)[-1]
+    return size is None or total == str(size)
+
+# =======================
+# 🟢 Content-addressed cache
+# =======================
+class DownloadCache:
+    def __init__(self, root=CACHE_DIR):
+        self.root = root
+        self.index_file = os.path.join(root, "index.json")
+        self.blob_dir = os.path.join(root, "blobs")
+        self.partial_dir = os.path.join(root, "partial")
+        os.makedirs(self.blob_dir, exist_ok=True)
+        os.makedirs(self.partial_dir, exist_ok=True)
+
+    def _load_index(self):
+        try:
+            with open(self.index_file) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self, index):
+        tmp = self.index_file + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(index, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.index_file)
+
+    def blob_path(self, digest):
+        return os.path.join(self.blob_dir, digest)
+
+    def partial_path(self, key):
+        return os.path.join(self.partial_dir, key + ".part")
+
+    def lookup(self, key, validator, size):
+        if not validator:
+            return None
+        entry = self._load_index().get(key)
+        if not entry or entry["validator"] != validator or (size is not None and entry["size"] != size):
+            return None
+        path = self.blob_path(entry["sha256"])
+        if not os.path.exists(path) or os.path.getsize(path) != entry["size"]:
+            return None
+        return path
+
+    def store(self, key, validator, part):
+        digest = hashlib.sha256()
+        with open(part, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+        sha = digest.hexdigest()
+        path = self.blob_path(sha)
+        size = os.path.getsize(part)
+        if os.path.exists(path):
+            os.remove(part)
+        else:
+            os.replace(part, path)
+        index = self._load_index()
+        index[key] = {"validator": validator, "size": size, "sha256": sha, "stored": int(time.time())}
+        self._save_index(index)
+        return path, sha
+
+# =======================
+# 🟢 Resumable download
+# =======================
+def _read_meta(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def fetch(url, key, cache=None, on_progress=None, retries=RETRIES, timeout=HTTP_TIMEOUT):
+    cache = cache or DownloadCache()
+    start = time.monotonic()
+    info = probe(url, timeout)
+    result = {"key": key, "size": info["size"], "validator": info["validator"],
+              "cached": False, "resumed_from": 0, "downloaded": 0, "attempts": 0}
+
+    hit = cache.lookup(key, info["validator"], info["size"])
+    if hit:
+        result.update(path=hit, cached=True, sha256=os.path.basename(hit), seconds=time.monotonic() - start)
+        _emit(on_progress, "cache-hit", key=key, path=hit, size=info["size"])
+        return result
+
+    part = cache.partial_path(key)
+    meta_file = part[:-len(".part")] + ".json"
+    meta = _read_meta(meta_file)
+    if meta != {"validator": info["validator"], "size": info["size"]} or not info["validator"] or not info["ranges"]:
+        if os.path.exists(part):
+            os.remove(part)
+    with open(meta_file, "w") as f:
+        json.dump({"validator": info["validator"], "size": info["size"]}, f)
+
+    result["resumed_from"] = os.path.getsize(part) if os.path.exists(part) else 0
+    last_error = None
+    while result["attempts"] <= retries:
+        result["attempts"] += 1
+        offset = os.path.getsize(part) if os.path.exists(part) else 0
+        if info["size"] is not None and offset == info["size"]:
+            break
+        headers = {}
+        if offset and not info["ranges"]:
+            offset = 0
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+            if info["validator"]:
+                headers["If-Range"] = info["validator"]
+        try:
+            resp = _open(url, headers, timeout)
+            if offset and not resume_matches(resp, offset, info["size"]):
+                if resp.status != 200:
+                    # A 206 for another range or another file: drop it and ask for the whole file
+                    resp.close()
+                    resp = _open(url, None, timeout)
+                offset = 0
+            with resp:
+                mode = "ab" if offset else "wb"
+                _emit(on_progress, "start", key=key, offset=offset, total=info["size"], attempt=result["attempts"])
+                last_report = time.monotonic()
+                received = 0
+                with open(part, mode) as out:
+                    for chunk in iter(lambda: resp.read(CHUNK_SIZE), b""):
+                        out.write(chunk)
+                        received += len(chunk)
+                        result["downloaded"] += len(chunk)
+                        now = time.monotonic()
+                        if now - last_report >= PROGRESS_INTERVAL:
+                            last_report = now
+                            elapsed = now - start
+                            _emit(on_progress, "progress", key=key, bytes=offset + received, total=info["size"],
+                                  elapsed=round(elapsed, 3), rate_bps=int(result["downloaded"] / elapsed))
+            if info["size"] is None or os.path.getsize(part) == info["size"]:
+                break
+            last_error = "connection closed early"
+        except (urllib.error.URLError, OSError) as e:
+            last_error = str(e)
+        _emit(on_progress, "retry", key=key, attempt=result["attempts"], error=last_error)
+        time.sleep(min(2 ** result["attempts"], 30))
+    else:
+        raise DownloadError(f"download failed after {retries + 1} attempts: {last_error}")
+
+    path, sha = cache.store(key, info["validator"], part)
+    os.remove(meta_file)
+    elapsed = time.monotonic() - start
+    result.update(path=path, sha256=sha, seconds=elapsed, size=os.path.getsize(path))
+    _emit(on_progress, "done", key=key, path=path, sha256=sha, bytes=result["size"],
+          downloaded=result["downloaded"], resumed_from=result["resumed_from"],
+          elapsed=round(elapsed, 3), rate_bps=int(result["downloaded"] / elapsed) if elapsed else 0)
+    return result
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: downloader.py URL KEY")
+        sys.exit(2)
+    try:
+        fetch(sys.argv[1], sys.argv[2], on_progress=json_progress)
+    except (DownloadError, urllib.error.URLError, OSError) as e:
+        json_progress({"event": "error", "error": str(e)})
+        sys.exit(1)
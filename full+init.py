@@ -7,11 +7,24 @@
 import os
 import sys
 import shutil
+import signal
 import subprocess
-import zipfile
 import re
 from datetime import datetime
 
+from pkginstall import (batched_install, format_report, build_wheelhouse,
+                        has_wheelhouse, install_from_wheelhouse, WHEELHOUSE_DIR)
+from pkgindex import default_index
+from streamzip import stream_extract_url, drive_download_url
+from downloader import fetch as cached_fetch
+from deploy import delta_extract, StreamDelta, ReleaseStore, format_stats
+from procscan import ProcScanner, format_table, signal_processes
+from svcmonitor import live_monitor, export_samples
+from svclog import remove_logs, live_logs
+from logview import tail, follow, make_filter, LEVELS
+from svclaunch import request_restart, format_restart, load_supervisor_status, format_supervisor
+from passwall import Installer, format_summary
+
 # Colors
 RED = '\033[0;31m'
 GREEN = '\033[0;32m'
@@ -31,10 +44,17 @@ PYTHON_CMD = ""
 PYTHON_VERSION = ""
 
 # OpenWrt Configuration
-PROJECT_DIR = "/last"
+RELEASE_ROOT = "/last-releases"
+PROJECT_DIR = os.path.join(RELEASE_ROOT, "current")
+LEGACY_PROJECT_DIR = "/last"
+KEEP_RELEASES = 5
 APP_FILE = os.path.join(PROJECT_DIR, "app.py")
 INIT_FILE = "/etc/init.d/minerpanel"
 LOG_FILE = "/tmp/minerpanel.log"
+HELPER_DIR = "/usr/lib/minerpanel"  # helper modules the init script runs
+SERVICE_HELPERS = ["procscan.py", "svclaunch.py", "svclog.py"]
+WORKERS = 0  # procd instances of app.py sharing the port; 0 = one per CPU core
+DELETE_STALE_FILES = False  # remove files the previous deploy wrote but the new archive lacks
 
 PYTHON_PACKAGES = [
     "flask",
@@ -147,11 +167,13 @@ def show_openwrt_menu():
         print(f"{YELLOW}║{NC} {CYAN}[4]{NC} ⚙️ Manage Python service    {YELLOW}║{NC}")
         print(f"{YELLOW}║{NC} {RED}[5]{NC} 🔎 List/Kill processes       {YELLOW}║{NC}")
         print(f"{YELLOW}║{NC} {WHITE}[6]{NC} 🗑️ Remove service           {YELLOW}║{NC}")
+        print(f"{YELLOW}║{NC} {BLUE}[7]{NC} ⏪ Releases / rollback       {YELLOW}║{NC}")
+        print(f"{YELLOW}║{NC} {GREEN}[8]{NC} 🛡️ Install PassWall2       {YELLOW}║{NC}")
         print(f"{YELLOW}║{NC} {RED}[0]{NC} 🔙 Back to Main Menu        {YELLOW}║{NC}")
         print(f"{YELLOW}╚════════════════════════════════════╝{NC}")
         print()
         
-        choice = input(f"{GREEN}➤ Select an option [0-6]: {NC}").strip()
+        choice = input(f"{GREEN}➤ Select an option [0-8]: {NC}").strip()
         
         if choice == "1":
             install_packages()
@@ -165,6 +187,10 @@ def show_openwrt_menu():
             list_and_kill_processes()
         elif choice == "6":
             remove_service()
+        elif choice == "7":
+            manage_releases()
+        elif choice == "8":
+            install_passwall()
         elif choice == "0":
             break
         else:
@@ -179,12 +205,41 @@ def install_packages():
     print(f"{BLUE}╚════════════════════════════════════╝{NC}")
     print()
     
-    print(f"{YELLOW}🔄 Running opkg update...{NC}")
-    run_command(["opkg", "update"])
+    missing = default_index().missing_python(PYTHON_PACKAGES)
+    if not missing:
+        print(f"{GREEN}✅ All {len(PYTHON_PACKAGES)} packages already installed, nothing to do{NC}")
+        pause()
+        return
+    
+    if has_wheelhouse():
+        print(f"{CYAN}📦 Installing offline from wheelhouse: {WHEELHOUSE_DIR}{NC}")
+        report = install_from_wheelhouse()
+        for line in format_report(report):
+            print(f"  {line}")
+        if not report["ok"]:
+            print(f"{RED}❌ Offline install failed: {report['error']}{NC}")
+        else:
+            print(f"{GREEN}✅ All packages installed{NC}")
+        pause()
+        return
+    
+    print(f"{YELLOW}🔄 Running opkg update in background...{NC}")
+    print(f"{CYAN}📦 Resolving {len(missing)} missing packages in one pass: {', '.join(missing)}{NC}")
+    report = batched_install(missing)
     
-    for pkg in PYTHON_PACKAGES:
-        print(f"{CYAN}📦 Installing {pkg} ...{NC}")
-        run_command(["pip3", "install", "--no-cache-dir", "--timeout", "120", "--retries", "10", pkg])
+    for line in format_report(report):
+        print(f"  {line}")
+    if report["opkg_output"]:
+        print(report["opkg_output"])
+    if not report["opkg_ok"]:
+        print(f"{RED}⚠️ opkg update failed{NC}")
+    
+    if not report["ok"]:
+        print(f"{RED}❌ Batched install failed: {report['error']}{NC}")
+        print(f"{YELLOW}🔄 Falling back to one-by-one install...{NC}")
+        for pkg in missing:
+            print(f"{CYAN}📦 Installing {pkg} ...{NC}")
+            run_command(["pip3", "install", "--no-cache-dir", "--timeout", "120", "--retries", "10", pkg])
     
     print(f"{GREEN}✅ All packages installed{NC}")
     pause()
@@ -196,13 +251,6 @@ def download_project():
     print(f"{BLUE}╚════════════════════════════════════╝{NC}")
     print()
     
-    try:
-        import gdown
-    except ImportError:
-        print(f"{RED}❌ gdown not installed! Run Option 1 first.{NC}")
-        pause()
-        return
-    
     print(f"{YELLOW}📎 Enter Google Drive link or File ID:{NC}")
     print("Example: https://drive.google.com/file/d/ABC123/view")
     print("Or just: ABC123")
@@ -234,6 +282,109 @@ def download_project():
     print(f"{GREEN}✅ File ID: {file_id}{NC}")
     
     current_dir = os.getcwd()
+    print(f"{YELLOW}📁 Where to extract files?{NC}")
+    print("Press Enter to extract here, type 'r' to deploy as a new release")
+    extract_path = input(f"{GREEN}Extract to: {NC}").strip()
+    
+    store = None
+    if extract_path.lower() == "r":
+        store = ReleaseStore(RELEASE_ROOT)
+        release_id, extract_path, info = store.prepare(seed_dir=LEGACY_PROJECT_DIR)
+        print(f"{GREEN}📦 New release {release_id}: {info['linked']} files hardlinked, "
+              f"{info['copied']} copied from {info['base'] or 'nothing'}{NC}")
+    elif not extract_path:
+        extract_path = current_dir
+    
+    if not os.path.exists(extract_path):
+        os.makedirs(extract_path, exist_ok=True)
+        print(f"{GREEN}📁 Created folder: {extract_path}{NC}")
+    
+    print(f"{YELLOW}📦 Download mode: Enter = stream (no ZIP on disk), c = cached & resumable{NC}")
+    if input(f"{GREEN}Mode: {NC}").strip().lower() == "c":
+        ok = download_cached(file_id, extract_path)
+    else:
+        ok = download_streaming(file_id, extract_path)
+        if not ok:
+            print(f"{YELLOW}🔄 Falling back to gdown...{NC}")
+            ok = download_with_gdown(file_id, current_dir, extract_path)
+    
+    if store:
+        finish_release(store, release_id, ok)
+    pause()
+
+def download_streaming(file_id, extract_path):
+    print(f"{CYAN}🗜 Streaming and extracting to: {extract_path}{NC}")
+    print(f"{YELLOW}⏳ Please wait...{NC}")
+    
+    try:
+        delta = StreamDelta(extract_path, DELETE_STALE_FILES)
+        stats = stream_extract_url(
+            drive_download_url(file_id), extract_path, delta=delta,
+            on_bytes=lambda total: print(f"\r  {total / (1024*1024):.2f} MB received", end="", flush=True))
+        print()
+        print(f"{GREEN}✅ Extracted {stats['files']} files ({stats['downloaded'] / (1024*1024):.2f} MB downloaded"
+              f" in {stats['seconds']:.1f}s, largest file {stats['peak_member'] / 1024:.0f} KB){NC}")
+        print(f"{GREEN}✅ {format_stats(delta.finish())}{NC}")
+        return True
+    except Exception as e:
+        print()
+        print(f"{RED}❌ Streaming download failed: {e}{NC}")
+        return False
+
+def finish_release(store, release_id, ok):
+    if not ok:
+        store.discard(release_id)
+        print(f"{RED}❌ Release {release_id} discarded, live release unchanged{NC}")
+        return
+    store.publish(release_id)
+    seconds = store.activate(release_id)
+    print(f"{GREEN}✅ Release {release_id} is live ({seconds * 1000:.2f} ms switch){NC}")
+    for old in store.prune(KEEP_RELEASES):
+        print(f"{YELLOW}🗑 Pruned old release {old}{NC}")
+    if os.path.exists(INIT_FILE):
+        if input(f"{YELLOW}Restart service now? (y/n): {NC}").strip().lower() == "y":
+            run_command([INIT_FILE, "restart"])
+
+def show_download_progress(event):
+    if event["event"] == "progress":
+        total = f"/{event['total'] / (1024*1024):.2f}" if event["total"] else ""
+        print(f"\r  {event['bytes'] / (1024*1024):.2f}{total} MB  {event['rate_bps'] / 1024:.0f} KB/s",
+              end="", flush=True)
+    elif event["event"] == "start" and event["offset"]:
+        print(f"{CYAN}⏯ Resuming from {event['offset'] / (1024*1024):.2f} MB{NC}")
+    elif event["event"] == "retry":
+        print(f"\n{YELLOW}⚠️ Attempt {event['attempt']} failed: {event['error']}, retrying...{NC}")
+
+def download_cached(file_id, extract_path):
+    print(f"{YELLOW}⏳ Please wait...{NC}")
+    try:
+        result = cached_fetch(drive_download_url(file_id), file_id, on_progress=show_download_progress)
+    except Exception as e:
+        print(f"\n{RED}❌ Download failed: {e}{NC}")
+        return False
+    
+    if result["cached"]:
+        print(f"{GREEN}♻️ Build unchanged, using cached archive{NC}")
+    else:
+        rate = result["downloaded"] / result["seconds"] / 1024 if result["seconds"] else 0
+        print(f"\n{GREEN}✅ Downloaded {result['size'] / (1024*1024):.2f} MB in {result['seconds']:.1f}s ({rate:.0f} KB/s){NC}")
+    
+    print(f"{CYAN}🗜 Extracting to: {extract_path}{NC}")
+    try:
+        stats = delta_extract(result["path"], extract_path, DELETE_STALE_FILES)
+        print(f"{GREEN}✅ {format_stats(stats)}{NC}")
+        return True
+    except Exception as e:
+        print(f"{RED}❌ Extract error: {e}{NC}")
+        return False
+
+def download_with_gdown(file_id, current_dir, extract_path):
+    try:
+        import gdown
+    except ImportError:
+        print(f"{RED}❌ gdown not installed! Run Option 1 first.{NC}")
+        return False
+    
     zip_file = os.path.join(current_dir, "project.zip")
     
     print(f"{CYAN}📂 Downloading to: {current_dir}{NC}")
@@ -245,32 +396,20 @@ def download_project():
         
         if not os.path.exists(zip_file):
             print(f"{RED}❌ Download failed!{NC}")
-            pause()
-            return
+            return False
         
         file_size = os.path.getsize(zip_file) / (1024*1024)
         print(f"{GREEN}✅ Downloaded: {os.path.basename(zip_file)} ({file_size:.2f} MB){NC}")
         
-        print(f"{YELLOW}📁 Where to extract files?{NC}")
-        print("Press Enter to extract here")
-        extract_path = input(f"{GREEN}Extract to: {NC}").strip()
-        
-        if not extract_path:
-            extract_path = current_dir
-        
-        if not os.path.exists(extract_path):
-            os.makedirs(extract_path, exist_ok=True)
-            print(f"{GREEN}📁 Created folder: {extract_path}{NC}")
-        
         print(f"{CYAN}🗜 Extracting to: {extract_path}{NC}")
         
         try:
-            with zipfile.ZipFile(zip_file, 'r') as zip_ref:
-                file_count = len(zip_ref.namelist())
-                zip_ref.extractall(extract_path)
-                print(f"{GREEN}✅ Extracted {file_count} files{NC}")
+            stats = delta_extract(zip_file, extract_path, DELETE_STALE_FILES)
+            print(f"{GREEN}✅ {format_stats(stats)}{NC}")
+            ok = True
         except Exception as e:
             print(f"{RED}❌ Extract error: {e}{NC}")
+            ok = False
         
         print(f"{YELLOW}🗑 Delete the ZIP file?{NC}")
         print("Press Enter for YES, type 'n' for NO")
@@ -282,10 +421,11 @@ def download_project():
         else:
             print(f"{YELLOW}⚠️ ZIP file kept{NC}")
             
+        return ok
+        
     except Exception as e:
         print(f"{RED}❌ Error: {e}{NC}")
-    
-    pause()
+        return False
 
 def create_init_service():
     show_header()
@@ -294,6 +434,16 @@ def create_init_service():
     print(f"{BLUE}╚════════════════════════════════════╝{NC}")
     print()
     
+    store = ReleaseStore(RELEASE_ROOT)
+    if store.current() is None and os.path.isdir(LEGACY_PROJECT_DIR):
+        release_id, _, info = store.prepare(seed_dir=LEGACY_PROJECT_DIR)
+        store.publish(release_id)
+        store.activate(release_id)
+        print(f"{GREEN}📦 Imported {LEGACY_PROJECT_DIR} as release {release_id}{NC}")
+
+    install_service_helpers()
+    workers = ask_workers()
+
     init_content = f"""#!/bin/sh /etc/rc.common
 
 START=95
@@ -304,28 +454,41 @@ PROG=/usr/bin/python3
 APP={APP_FILE}
 WORKDIR={PROJECT_DIR}
 LOGFILE={LOG_FILE}
+HELPERS={HELPER_DIR}
+WORKERS={workers}
 
 start_service() {{
     echo "🌐 Starting minerpanel service..."
-    rm -f $LOGFILE
-    procd_open_instance
-    procd_set_param command $PROG $APP
-    procd_set_param cwd $WORKDIR
-    procd_set_param respawn 3600 5 5
-    procd_set_param env PYTHONUNBUFFERED=1
-    procd_close_instance
-    echo "✅ Service started, logging to $LOGFILE"
+    # One instance per worker, each respawned on its own; they share the port via SO_REUSEPORT
+    for i in $(seq 1 $WORKERS); do
+        procd_open_instance "worker$i"
+        # Output goes through a size-capped, gzip-rotated log (/tmp is RAM)
+        procd_set_param command $PROG $HELPERS/svclaunch.py run --log $LOGFILE $APP
+        procd_set_param term_timeout 15
+        procd_set_param cwd $WORKDIR
+        # respawn only covers the launcher; app.py exits get its backoff and crash-loop handling
+        procd_set_param respawn 3600 5 5
+        procd_set_param env PYTHONUNBUFFERED=1 MINERPANEL_WORKER=$i MINERPANEL_WORKERS=$WORKERS
+        procd_close_instance
+    done
+    echo "✅ Service started with $WORKERS worker(s), logging to $LOGFILE"
 }}
 
 stop_service() {{
-    pid=$(pgrep -f "$APP")
-    if [ -n "$pid" ]; then
-        kill -9 $pid
-        echo "🛑 Service stopped"
+    # procd sends TERM to each launcher after this and the launcher drains its app.py;
+    # signalling by cmdline here would also hit the launchers (their argv names $APP)
+    if $PROG $HELPERS/procscan.py --match "$APP" --pids >/dev/null; then
+        echo "🛑 Stopping service"
     else
         echo "⚠️ Service not running"
     fi
 }}
+
+reload_service() {{
+    # Workers restart one at a time: each new app.py binds next to the old one,
+    # the old one drains; prints the downtime per worker
+    $PROG $HELPERS/svclaunch.py restart --app "$APP"
+}}
 """
     with open(INIT_FILE, "w") as f:
         f.write(init_content)
@@ -336,6 +499,24 @@ stop_service() {{
     print(f"{GREEN}✅ Service created and started!{NC}")
     pause()
 
+def ask_workers():
+    default = WORKERS or os.cpu_count() or 1
+    print(f"{CYAN}Each worker is its own app.py process; all share the port via SO_REUSEPORT.{NC}")
+    print(f"{CYAN}In-memory state (caches, sessions) is per worker.{NC}")
+    answer = input(f"{YELLOW}▶ Workers [default: {default}]: {NC}").strip()
+    if answer.isdigit() and int(answer) > 0:
+        return int(answer)
+    if answer:
+        print(f"{YELLOW}⚠️ Invalid number, using {default}{NC}")
+    return default
+
+def install_service_helpers():
+    # The init script runs these, so they must not depend on where this manager lives
+    source_dir = os.path.dirname(os.path.abspath(__file__))
+    os.makedirs(HELPER_DIR, exist_ok=True)
+    for name in SERVICE_HELPERS:
+        shutil.copy2(os.path.join(source_dir, name), os.path.join(HELPER_DIR, name))
+
 def manage_service():
     while True:
         show_header()
@@ -346,6 +527,9 @@ def manage_service():
         print(f"{CYAN}║{NC} {RED}[2]{NC} ⏹️  Stop service             {CYAN}║{NC}")
         print(f"{CYAN}║{NC} {YELLOW}[3]{NC} 🔄 Restart service          {CYAN}║{NC}")
         print(f"{CYAN}║{NC} {BLUE}[4]{NC} 📊 Show status              {CYAN}║{NC}")
+        print(f"{CYAN}║{NC} {PURPLE}[5]{NC} 📈 Resource monitor         {CYAN}║{NC}")
+        print(f"{CYAN}║{NC} {BLUE}[6]{NC} 📜 Restart history          {CYAN}║{NC}")
+        print(f"{CYAN}║{NC} {GREEN}[7]{NC} 📄 View logs                {CYAN}║{NC}")
         print(f"{CYAN}║{NC} {RED}[0]{NC} 🔙 Back                    {CYAN}║{NC}")
         print(f"{CYAN}╚════════════════════════════════════╝{NC}")
         print()
@@ -357,18 +541,95 @@ def manage_service():
         elif choice == "2":
             run_command([INIT_FILE, "stop"])
         elif choice == "3":
-            run_command([INIT_FILE, "restart"])
+            print(f"{YELLOW}🔄 Graceful restart, measuring downtime...{NC}")
+            reports = request_restart(APP_FILE)
+            if reports is None:
+                print(f"{YELLOW}⚠️ Launcher not running, doing a full restart{NC}")
+                run_command([INIT_FILE, "restart"])
+            else:
+                for report in reports:
+                    print(format_restart(report))
         elif choice == "4":
-            ret = subprocess.run(["pgrep", "-af", "app.py"], capture_output=True, text=True)
-            if ret.stdout.strip():
+            processes = ProcScanner().find(re.escape(APP_FILE))
+            if processes:
                 print(f"{GREEN}⚙️ Service is running:{NC}")
-                print(ret.stdout.strip())
+                print("\n".join(format_table(processes)))
             else:
                 print(f"{RED}❌ Service is not running{NC}")
+        elif choice == "5":
+            monitor_service()
+        elif choice == "6":
+            statuses = load_supervisor_status()
+            if not statuses:
+                print(f"{YELLOW}⚠️ No supervisor state yet (service not started by svclaunch){NC}")
+            for status in statuses:
+                color = RED if status["state"] == "crash-loop" else GREEN if status["state"] == "serving" else YELLOW
+                lines = format_supervisor(status)
+                print(f"{color}{lines[0]}{NC}")
+                print("\n".join(lines[1:]))
+        elif choice == "7":
+            view_logs()
         elif choice == "0":
             break
         pause()
 
+def monitor_service():
+    sampler = live_monitor(re.escape(APP_FILE))
+    print()
+    if not len(sampler.buffer):
+        return
+    path = input(f"{GREEN}💾 Export samples to (.json/.csv, Enter to skip): {NC}").strip()
+    if path:
+        try:
+            count = export_samples(sampler.buffer, path)
+            print(f"{GREEN}✅ {count} samples written to {path}{NC}")
+        except OSError as e:
+            print(f"{RED}❌ Export failed: {e}{NC}")
+
+def view_logs():
+    logs = live_logs(LOG_FILE)
+    if not logs:
+        print(f"{YELLOW}⚠️ No log yet at {LOG_FILE}{NC}")
+        return
+    path = logs[0]
+    if len(logs) > 1:
+        for i, log in enumerate(logs, 1):
+            print(f"{GREEN}[{i}]{NC} {log}")
+        pick = input(f"{YELLOW}▶ Worker log [default: 1]: {NC}").strip()
+        if pick.isdigit() and 1 <= int(pick) <= len(logs):
+            path = logs[int(pick) - 1]
+    count = input(f"{YELLOW}▶ Lines [default: 50]: {NC}").strip()
+    count = int(count) if count.isdigit() else 50
+    level = input(f"{YELLOW}▶ Minimum level ({'/'.join(LEVELS)}, Enter = all): {NC}").strip().upper() or None
+    if level and level not in LEVELS:
+        print(f"{YELLOW}⚠️ Unknown level, showing all{NC}")
+        level = None
+    pattern = input(f"{YELLOW}▶ Regex filter (Enter = none): {NC}").strip() or None
+    try:
+        line_filter = make_filter(level, pattern)
+    except re.error as e:
+        print(f"{RED}❌ Bad regex: {e}{NC}")
+        return
+
+    print(f"{CYAN}{'─' * 60}{NC}")
+    for line in tail(path, count, line_filter):
+        print(color_log_line(line))
+    if input(f"{GREEN}Follow new lines? (y/n): {NC}").strip().lower() != "y":
+        return
+    print(f"{CYAN}Following {path} — Ctrl+C to stop{NC}")
+    try:
+        for line in follow(path, make_filter(level, pattern)):
+            print(color_log_line(line), flush=True)
+    except KeyboardInterrupt:
+        print()
+
+def color_log_line(line):
+    if "ERROR" in line or "CRITICAL" in line or "Traceback" in line:
+        return f"{RED}{line}{NC}"
+    if "WARN" in line:
+        return f"{YELLOW}{line}{NC}"
+    return line
+
 def list_and_kill_processes():
     show_header()
     print(f"{RED}╔════════════════════════════════════╗{NC}")
@@ -376,17 +637,21 @@ def list_and_kill_processes():
     print(f"{RED}╚════════════════════════════════════╝{NC}")
     print()
     
-    ret = subprocess.run(["pgrep", "-af", "python3"], capture_output=True, text=True)
-    lines = [l for l in ret.stdout.strip().split("\n") if l]
-    
-    if lines:
-        for l in lines:
+    processes = ProcScanner().find("python3")
+
+    if processes:
+        for l in format_table(processes):
             print(f"{YELLOW}{l}{NC}")
-        
+
         kill_id = input(f"{RED}Enter PID to kill (or press Enter to skip): {NC}").strip()
         if kill_id:
-            run_command(["kill", "-9", kill_id])
-            print(f"{GREEN}✅ PID {kill_id} killed{NC}")
+            targets = [p for p in processes if str(p.pid) == kill_id]
+            if not targets:
+                print(f"{RED}❌ PID {kill_id} is not in the list{NC}")
+            elif signal_processes(targets, signal.SIGKILL):
+                print(f"{GREEN}✅ PID {kill_id} killed{NC}")
+            else:
+                print(f"{YELLOW}⚠️ PID {kill_id} already exited{NC}")
     else:
         print(f"{YELLOW}❌ No Python processes found{NC}")
     
@@ -403,9 +668,8 @@ def remove_service():
         run_command([INIT_FILE, "stop"])
         run_command([INIT_FILE, "disable"])
         
-        if os.path.exists(LOG_FILE):
-            os.remove(LOG_FILE)
-            print(f"{GREEN}🗑 Log file removed{NC}")
+        if remove_logs(LOG_FILE):
+            print(f"{GREEN}🗑 Log files removed{NC}")
         
         os.remove(INIT_FILE)
         print(f"{GREEN}🗑 init.d service file removed{NC}")
@@ -413,6 +677,82 @@ def remove_service():
     print(f"{GREEN}✅ Service cleanup completed{NC}")
     pause()
 
+def install_passwall():
+    show_header()
+    print(f"{RED}╔════════════════════════════════════╗{NC}")
+    print(f"{RED}║{WHITE}     PASSWALL2 INSTALLATION      {RED}║{NC}")
+    print(f"{RED}╚════════════════════════════════════╝{NC}")
+    print()
+
+    installer = Installer()
+    names = [step.name for step in installer.steps()]
+    if installer.state["steps"]:
+        print(f"{CYAN}Last run (completed steps are skipped):{NC}")
+        print("\n".join(format_summary(installer.state, names)))
+        print()
+    print(f"{YELLOW}⚠️  WARNING: This will modify your router configuration{NC}")
+    if input(f"{YELLOW}Type 'YES' to continue: {NC}").strip() != "YES":
+        print(f"{RED}Installation cancelled.{NC}")
+        pause()
+        return
+    unattended = input(f"{GREEN}Pause after each step? (Enter=Yes, n=No): {NC}").strip().lower() == "n"
+    try:
+        ok = installer.run(interactive=not unattended)
+    except KeyboardInterrupt:
+        print(f"\n{YELLOW}⏸ Interrupted; the next run continues from the unfinished step{NC}")
+        ok = False
+    print()
+    print("\n".join(format_summary(installer.state, names)))
+    if ok:
+        print(f"{GREEN}✅ INSTALLATION COMPLETED SUCCESSFULLY!{NC}")
+        print(f"{YELLOW}Next: open LuCI → Services → PassWall2 and configure your proxy{NC}")
+    pause()
+
+def manage_releases():
+    store = ReleaseStore(RELEASE_ROOT)
+    while True:
+        show_header()
+        print(f"{BLUE}╔════════════════════════════════════╗{NC}")
+        print(f"{BLUE}║{WHITE}      RELEASES / ROLLBACK        {BLUE}║{NC}")
+        print(f"{BLUE}╚════════════════════════════════════╝{NC}")
+        print()
+        
+        current = store.current()
+        releases = store.list_releases()
+        if not releases:
+            print(f"{YELLOW}❌ No releases in {RELEASE_ROOT} yet (deploy with 'r' in option 2){NC}")
+        for release_id in releases:
+            if release_id == current:
+                print(f"  {GREEN}▶ {release_id} (live){NC}")
+            else:
+                print(f"    {release_id}")
+        print()
+        print(f"{YELLOW}Options:{NC}")
+        print(f"{GREEN}[r]{NC} Roll back to previous release")
+        print(f"{GREEN}[a ID]{NC} Activate a specific release")
+        print(f"{RED}[b]{NC} Back")
+        
+        cmd = input(f"{GREEN}➤ Enter command: {NC}").strip()
+        try:
+            if cmd == "r":
+                target, seconds = store.rollback()
+                print(f"{GREEN}✅ Rolled back to {target} ({seconds * 1000:.2f} ms switch){NC}")
+            elif cmd.startswith("a "):
+                target = cmd.split()[1]
+                seconds = store.activate(target)
+                print(f"{GREEN}✅ Activated {target} ({seconds * 1000:.2f} ms switch){NC}")
+            elif cmd == "b":
+                break
+            else:
+                continue
+        except ValueError as e:
+            print(f"{RED}❌ {e}{NC}")
+            pause()
+            continue
+        if os.path.exists(INIT_FILE):
+            run_command([INIT_FILE, "restart"])
+        pause()
+
 # Create Alias
 def create_alias():
     show_header()
@@ -544,7 +884,24 @@ def run_app():
         subprocess.call(run_cmd, shell=True)
     pause()
 
+# Build offline wheelhouse: full+init.py build-wheelhouse [DIR]
+def build_wheelhouse_command(args):
+    dest = args[0] if args else WHEELHOUSE_DIR
+    print(f"{CYAN}📦 Building wheelhouse in {dest} ...{NC}")
+    try:
+        result = build_wheelhouse(PYTHON_PACKAGES, dest)
+    except Exception as e:
+        print(f"{RED}❌ Wheelhouse build failed: {e}{NC}")
+        return 1
+    total = sum(p["bytes"] for p in result["packages"]) / (1024*1024)
+    print(f"{GREEN}✅ {len(result['packages'])} files ({total:.2f} MB) in {result['seconds']:.1f}s{NC}")
+    print(f"{GREEN}✅ Copy {dest} to each router and set MINERPANEL_WHEELHOUSE if not {WHEELHOUSE_DIR}{NC}")
+    return 0
+
 # Main
+if len(sys.argv) > 1 and sys.argv[1] == "build-wheelhouse":
+    sys.exit(build_wheelhouse_command(sys.argv[2:]))
+
 detect_system()
 detect_python()
 
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+
+# v2ray/xray geoip.dat generator for the `iran` prefix list
+# Author: KOP3MA
+#
+# geoip.dat is a serialized GeoIPList protobuf:
+#   GeoIPList { repeated GeoIP entry = 1; }
+#   GeoIP     { string country_code = 1; repeated CIDR cidr = 2; bool reverse_match = 3; }
+#   CIDR      { bytes ip = 1; uint32 prefix = 2; }
+# The messages are tiny, so they are encoded by hand here instead of pulling
+# the protobuf runtime onto the router.
+
+import os
+import sys
+import time
+import argparse
+import ipaddress
+
+from prefixlist import DualStackTable, DEFAULT_LIST, aggregate
+
+# =======================
+# 🟢 Configuration
+# =======================
+COUNTRY_CODE = "IRPANEL"
+DEFAULT_OUTPUT = "/usr/share/v2ray/geoip-panel.dat"
+
+WIRE_VARINT = 0
+WIRE_BYTES = 2
+
+class GeoIPError(Exception):
+    pass
+
+def rule_name(path, code):
+    # v2ray/xray only resolve geoip:<code> from geoip.dat; any other file needs ext:<file>:<code>
+    name = os.path.basename(path)
+    if name == "geoip.dat":
+        return f"geoip:{code.lower()}"
+    return f"ext:{name}:{code.lower()}"
+
+# =======================
+# 🟢 Protobuf wire format
+# =======================
+def encode_varint(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+def decode_varint(data, pos):
+    result = shift = 0
+    while True:
+        if pos >= len(data):
+            raise GeoIPError("truncated varint")
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+        if shift > 63:
+            raise GeoIPError("varint too long")
+
+def field_bytes(number, payload):
+    return encode_varint(number << 3 | WIRE_BYTES) + encode_varint(len(payload)) + payload
+
+def field_varint(number, value):
+    return encode_varint(number << 3 | WIRE_VARINT) + encode_varint(value)
+
+def iter_fields(data):
+    # Yields (field_number, wire_type, value); value is int or bytes
+    pos = 0
+    while pos < len(data):
+        key, pos = decode_varint(data, pos)
+        number, wire = key >> 3, key & 7
+        if wire == WIRE_VARINT:
+            value, pos = decode_varint(data, pos)
+        elif wire == WIRE_BYTES:
+            length, pos = decode_varint(data, pos)
+            if pos + length > len(data):
+                raise GeoIPError("truncated field")
+            value, pos = data[pos:pos + length], pos + length
+        else:
+            raise GeoIPError(f"unsupported wire type {wire}")
+        yield number, wire, value
+
+# =======================
+# 🟢 GeoIP messages
+# =======================
+def encode_entry(code, networks, reverse=False):
+    body = field_bytes(1, code.encode())
+    for net in networks:
+        cidr = field_bytes(1, net.network_address.packed) + field_varint(2, net.prefixlen)
+        body += field_bytes(2, cidr)
+    if reverse:
+        body += field_varint(3, 1)
+    return body
+
+def decode_entry(data):
+    entry = {"code": "", "networks": [], "reverse": False}
+    for number, _, value in iter_fields(data):
+        if number == 1:
+            entry["code"] = value.decode()
+        elif number == 2:
+            ip, prefix = b"", 0
+            for n, _, v in iter_fields(value):
+                if n == 1:
+                    ip = v
+                elif n == 2:
+                    prefix = v
+            if len(ip) not in (4, 16):
+                raise GeoIPError(f"bad CIDR address length {len(ip)} in {entry['code'] or 'entry'}")
+            entry["networks"].append(ipaddress.ip_network((ip, prefix)))
+        elif number == 3:
+            entry["reverse"] = bool(value)
+    return entry
+
+def encode_list(entries):
+    # entries: [(code, networks, raw_or_None)]; raw entries from a merged file are copied untouched
+    out = bytearray()
+    for code, networks, raw in entries:
+        out += field_bytes(1, raw if raw is not None else encode_entry(code, networks))
+    return bytes(out)
+
+def read_entries(data):
+    # Returns [(code, raw_entry_bytes)] without decoding the CIDRs
+    entries = []
+    for number, _, value in iter_fields(data):
+        if number != 1:
+            continue
+        code = ""
+        for n, _, v in iter_fields(value):
+            if n == 1:
+                code = v.decode()
+                break
+        entries.append((code, value))
+    return entries
+
+# =======================
+# 🟢 Build and verify
+# =======================
+def build(table, path, code=COUNTRY_CODE, merge=None):
+    # table is a DualStackTable; both families go into the one entry.
+    # Returns (entry_count, cidr_count, size); other codes in `merge` are kept as they are
+    code = code.upper()
+    networks = table.cidrs()
+    entries = []
+    if merge:
+        with open(merge, "rb") as f:
+            entries = [(c, None, raw) for c, raw in read_entries(f.read()) if c.upper() != code]
+    entries.append((code, networks, None))
+    data = encode_list(entries)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return len(entries), len(networks), len(data)
+
+def verify(path, table, code=COUNTRY_CODE):
+    # Decodes the file and checks the entry covers exactly the table's addresses, per family
+    with open(path, "rb") as f:
+        data = f.read()
+    code = code.upper()
+    matches = [raw for c, raw in read_entries(data) if c.upper() == code]
+    if not matches:
+        raise GeoIPError(f"no entry with country code {code}")
+    if len(matches) > 1:
+        raise GeoIPError(f"{len(matches)} entries with country code {code}")
+    entry = decode_entry(matches[0])
+    if entry["reverse"]:
+        raise GeoIPError(f"{code} has reverse_match set")
+    for family in (table.v4, table.v6):
+        nets = [n for n in entry["networks"] if n.version == family.version]
+        intervals = aggregate((int(n.network_address), int(n.broadcast_address)) for n in nets)
+        if intervals != family.intervals():
+            raise GeoIPError(f"{code} covers {len(intervals)} IPv{family.version} ranges, "
+                             f"list has {len(family)}; contents differ")
+    return len(entry["networks"])
+
+# =======================
+# 🟢 CLI
+# =======================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write the iran prefix list as a v2ray/xray geoip.dat")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("build", help="generate the geoip.dat file and verify it")
+    p.add_argument("--list", default=DEFAULT_LIST, help="prefix list (default: %(default)s)")
+    p.add_argument("-o", "--output", default=DEFAULT_OUTPUT, help="geoip file (default: %(default)s)")
+    p.add_argument("--code", default=COUNTRY_CODE, help="country code, used as ext:<file>:<code> (default: %(default)s)")
+    p.add_argument("--merge", metavar="FILE", help="copy the other entries of an existing geoip.dat")
+    p = sub.add_parser("verify", help="check a geoip.dat entry against the list")
+    p.add_argument("file", nargs="?", default=DEFAULT_OUTPUT)
+    p.add_argument("--list", default=DEFAULT_LIST, help="prefix list (default: %(default)s)")
+    p.add_argument("--code", default=COUNTRY_CODE)
+    p = sub.add_parser("list", help="show the country codes in a geoip.dat")
+    p.add_argument("file", nargs="?", default=DEFAULT_OUTPUT)
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "list":
+            with open(args.file, "rb") as f:
+                for code, raw in read_entries(f.read()):
+                    print(f"{code}\t{len(decode_entry(raw)['networks'])} CIDRs")
+            return 0
+        table = DualStackTable.from_file(args.list)
+        if args.command == "build":
+            start = time.perf_counter()
+            entries, cidrs, size = build(table, args.output, args.code, args.merge)
+            verify(args.output, table, args.code)
+            print(f"✅ {args.output}: {rule_name(args.output, args.code)} with {cidrs} CIDRs "
+                  f"({entries} entries, {size} bytes) in {(time.perf_counter() - start) * 1000:.1f} ms, verified")
+        else:
+            cidrs = verify(args.file, table, args.code)
+            print(f"✅ {rule_name(args.file, args.code)} in {args.file} matches {args.list} ({cidrs} CIDRs)")
+    except (OSError, GeoIPError, UnicodeDecodeError, ValueError) as e:
+        print(f"❌ {e}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
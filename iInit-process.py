@@ -1,18 +1,39 @@
 #!/usr/bin/env python3
 
 import os
+import shutil
+import signal
 import subprocess
 import sys
-import zipfile
 import re
 
+from pkginstall import (batched_install, format_report, build_wheelhouse,
+                        has_wheelhouse, install_from_wheelhouse, WHEELHOUSE_DIR)
+from pkgindex import default_index
+from streamzip import stream_extract_url, drive_download_url
+from downloader import fetch as cached_fetch
+from deploy import delta_extract, StreamDelta, ReleaseStore, format_stats
+from procscan import ProcScanner, format_table, signal_processes
+from svcmonitor import live_monitor, export_samples
+from svclog import remove_logs, live_logs
+from logview import tail, follow, make_filter, LEVELS
+from svclaunch import request_restart, format_restart, load_supervisor_status, format_supervisor
+from passwall import Installer, format_summary
+
 # =======================
 # 🟢 Configuration
 # =======================
-PROJECT_DIR = "/last"
+RELEASE_ROOT = "/last-releases"
+PROJECT_DIR = os.path.join(RELEASE_ROOT, "current")
+LEGACY_PROJECT_DIR = "/last"
+KEEP_RELEASES = 5
 APP_FILE = os.path.join(PROJECT_DIR, "app.py")
 INIT_FILE = "/etc/init.d/minerpanel"
 LOG_FILE = "/tmp/minerpanel.log"
+HELPER_DIR = "/usr/lib/minerpanel"  # helper modules the init script runs
+SERVICE_HELPERS = ["procscan.py", "svclaunch.py", "svclog.py"]
+WORKERS = 0  # procd instances of app.py sharing the port; 0 = one per CPU core
+DELETE_STALE_FILES = False  # remove files the previous deploy wrote but the new archive lacks
 
 PYTHON_PACKAGES = [
     "flask",
@@ -69,12 +90,40 @@ def install_packages():
     print("🔧 Installing Python packages...")
     print("="*60)
 
-    print("🔄 Running opkg update...")
-    run_command(["opkg", "update"])
+    missing = default_index().missing_python(PYTHON_PACKAGES)
+    if not missing:
+        print(f"✅ All {len(PYTHON_PACKAGES)} packages already installed, nothing to do")
+        pause()
+        return
+
+    if has_wheelhouse():
+        print(f"📦 Installing offline from wheelhouse: {WHEELHOUSE_DIR}")
+        report = install_from_wheelhouse()
+        for line in format_report(report):
+            indented_print(line, prefix="")
+        if not report["ok"]:
+            print(f"❌ Offline install failed: {report['error']}")
+        else:
+            print("✅ All packages installed")
+        pause()
+        return
+
+    print("🔄 Running opkg update in background...")
+    print(f"📦 Resolving {len(missing)} missing packages in one pass: {', '.join(missing)}")
+    report = batched_install(missing)
+    for line in format_report(report):
+        indented_print(line, prefix="")
+    if report["opkg_output"]:
+        print(report["opkg_output"])
+    if not report["opkg_ok"]:
+        print("⚠️ opkg update failed")
 
-    for pkg in PYTHON_PACKAGES:
-        print(f"📦 Installing {pkg} ...")
-        run_command(["pip3", "install", "--no-cache-dir", "--timeout", "120", "--retries", "10", pkg])
+    if not report["ok"]:
+        print(f"❌ Batched install failed: {report['error']}")
+        print("🔄 Falling back to one-by-one install...")
+        for pkg in missing:
+            print(f"📦 Installing {pkg} ...")
+            run_command(["pip3", "install", "--no-cache-dir", "--timeout", "120", "--retries", "10", pkg])
     print("✅ All packages installed")
     pause()
 
@@ -87,14 +136,6 @@ def download_project():
     print("📥 Download project from Google Drive")
     print("="*60)
     
-    # اول چک کنیم gdown نصب هست یا نه
-    try:
-        import gdown
-    except ImportError:
-        print("❌ gdown not installed! Run Option 1 first.")
-        pause()
-        return
-    
     # گرفتن لینک
     print("\n📎 Enter Google Drive link or File ID:")
     print("Example: https://drive.google.com/file/d/ABC123/view")
@@ -127,8 +168,116 @@ def download_project():
     
     print(f"✅ File ID: {file_id}")
     
-    # دانلود در مسیر فعلی
+    # سوال برای مسیر اکسترکت
     current_dir = os.getcwd()
+    print("\n📁 Where to extract files?")
+    print("Press Enter to extract here, type 'r' to deploy as a new release")
+    extract_path = input("Extract to: ").strip()
+    
+    store = None
+    if extract_path.lower() == "r":
+        # ریلیز جدید کنار ریلیز فعلی، فایل‌های بدون تغییر هاردلینک می‌شوند
+        store = ReleaseStore(RELEASE_ROOT)
+        release_id, extract_path, info = store.prepare(seed_dir=LEGACY_PROJECT_DIR)
+        print(f"📦 New release {release_id}: {info['linked']} files hardlinked, "
+              f"{info['copied']} copied from {info['base'] or 'nothing'}")
+    elif not extract_path:
+        extract_path = current_dir  # انتر = همینجا
+    
+    # ایجاد پوشه اگر لازم باشه
+    if not os.path.exists(extract_path):
+        os.makedirs(extract_path, exist_ok=True)
+        print(f"📁 Created folder: {extract_path}")
+    
+    # حالت دانلود: استریم یا کش با قابلیت ادامه
+    print("\n📦 Download mode: Enter = stream (no ZIP on disk), c = cached & resumable")
+    if input("Mode: ").strip().lower() == "c":
+        ok = download_cached(file_id, extract_path)
+    else:
+        ok = download_streaming(file_id, extract_path)
+        if not ok:
+            print("🔄 Falling back to gdown...")
+            ok = download_with_gdown(file_id, current_dir, extract_path)
+    
+    if store:
+        finish_release(store, release_id, ok)
+    pause()
+
+def download_streaming(file_id, extract_path):
+    # دانلود و اکسترکت همزمان، بدون ذخیره project.zip
+    print(f"\n🗜 Streaming and extracting to: {extract_path}")
+    print("⏳ Please wait...")
+    try:
+        delta = StreamDelta(extract_path, DELETE_STALE_FILES)
+        stats = stream_extract_url(
+            drive_download_url(file_id), extract_path, delta=delta,
+            on_bytes=lambda total: print(f"\r    {total / (1024*1024):.2f} MB received", end="", flush=True))
+        print()
+        print(f"✅ Extracted {stats['files']} files ({stats['downloaded'] / (1024*1024):.2f} MB downloaded"
+              f" in {stats['seconds']:.1f}s, largest file {stats['peak_member'] / 1024:.0f} KB)")
+        print(f"✅ {format_stats(delta.finish())}")
+        return True
+    except Exception as e:
+        print()
+        print(f"❌ Streaming download failed: {e}")
+        return False
+
+def finish_release(store, release_id, ok):
+    if not ok:
+        store.discard(release_id)
+        print(f"❌ Release {release_id} discarded, live release unchanged")
+        return
+    store.publish(release_id)
+    seconds = store.activate(release_id)
+    print(f"✅ Release {release_id} is live ({seconds * 1000:.2f} ms switch)")
+    for old in store.prune(KEEP_RELEASES):
+        print(f"🗑 Pruned old release {old}")
+    if os.path.exists(INIT_FILE):
+        if input("Restart service now? (y/n): ").strip().lower() == "y":
+            run_command([INIT_FILE, "restart"])
+
+def show_download_progress(event):
+    if event["event"] == "progress":
+        total = f"/{event['total'] / (1024*1024):.2f}" if event["total"] else ""
+        print(f"\r    {event['bytes'] / (1024*1024):.2f}{total} MB  {event['rate_bps'] / 1024:.0f} KB/s",
+              end="", flush=True)
+    elif event["event"] == "start" and event["offset"]:
+        print(f"⏯ Resuming from {event['offset'] / (1024*1024):.2f} MB")
+    elif event["event"] == "retry":
+        print(f"\n⚠️ Attempt {event['attempt']} failed: {event['error']}, retrying...")
+
+def download_cached(file_id, extract_path):
+    print("⏳ Please wait...")
+    try:
+        result = cached_fetch(drive_download_url(file_id), file_id, on_progress=show_download_progress)
+    except Exception as e:
+        print(f"\n❌ Download failed: {e}")
+        return False
+
+    if result["cached"]:
+        print("♻️ Build unchanged, using cached archive")
+    else:
+        rate = result["downloaded"] / result["seconds"] / 1024 if result["seconds"] else 0
+        print(f"\n✅ Downloaded {result['size'] / (1024*1024):.2f} MB in {result['seconds']:.1f}s ({rate:.0f} KB/s)")
+
+    print(f"\n🗜 Extracting to: {extract_path}")
+    try:
+        stats = delta_extract(result["path"], extract_path, DELETE_STALE_FILES)
+        print(f"✅ {format_stats(stats)}")
+        return True
+    except Exception as e:
+        print(f"❌ Extract error: {e}")
+        return False
+
+def download_with_gdown(file_id, current_dir, extract_path):
+    # اول چک کنیم gdown نصب هست یا نه
+    try:
+        import gdown
+    except ImportError:
+        print("❌ gdown not installed! Run Option 1 first.")
+        return False
+    
+    # دانلود در مسیر فعلی
     zip_file = os.path.join(current_dir, "project.zip")
     
     print(f"\n📂 Downloading to: {current_dir}")
@@ -141,34 +290,20 @@ def download_project():
         
         if not os.path.exists(zip_file):
             print("❌ Download failed!")
-            pause()
-            return
+            return False
         
         file_size = os.path.getsize(zip_file) / (1024*1024)
         print(f"✅ Downloaded: {os.path.basename(zip_file)} ({file_size:.2f} MB)")
         
-        # سوال برای مسیر اکسترکت
-        print("\n📁 Where to extract files?")
-        print("Press Enter to extract here")
-        extract_path = input("Extract to: ").strip()
-        
-        if not extract_path:
-            extract_path = current_dir  # انتر = همینجا
-        
-        # ایجاد پوشه اگر لازم باشه
-        if not os.path.exists(extract_path):
-            os.makedirs(extract_path, exist_ok=True)
-            print(f"📁 Created folder: {extract_path}")
-        
         # اکسترکت
         print(f"\n🗜 Extracting to: {extract_path}")
         try:
-            with zipfile.ZipFile(zip_file, 'r') as zip_ref:
-                file_count = len(zip_ref.namelist())
-                zip_ref.extractall(extract_path)
-                print(f"✅ Extracted {file_count} files")
+            stats = delta_extract(zip_file, extract_path, DELETE_STALE_FILES)
+            print(f"✅ {format_stats(stats)}")
+            ok = True
         except Exception as e:
             print(f"❌ Extract error: {e}")
+            ok = False
         
         # سوال برای حذف
         print("\n🗑 Delete the ZIP file?")
@@ -181,10 +316,11 @@ def download_project():
         else:
             print("⚠️ ZIP file kept")
         
+        return ok
+        
     except Exception as e:
         print(f"❌ Error: {e}")
-    
-    pause()
+        return False
 
 # =======================
 # 🟢 Option 3: Create init.d service & start
@@ -195,6 +331,16 @@ def create_init_service():
     print("🚀 Creating init.d service...")
     print("="*60)
 
+    store = ReleaseStore(RELEASE_ROOT)
+    if store.current() is None and os.path.isdir(LEGACY_PROJECT_DIR):
+        release_id, _, info = store.prepare(seed_dir=LEGACY_PROJECT_DIR)
+        store.publish(release_id)
+        store.activate(release_id)
+        print(f"📦 Imported {LEGACY_PROJECT_DIR} as release {release_id}")
+
+    install_service_helpers()
+    workers = ask_workers()
+
     init_content = f"""#!/bin/sh /etc/rc.common
 
 START=95
@@ -205,28 +351,41 @@ PROG=/usr/bin/python3
 APP={APP_FILE}
 WORKDIR={PROJECT_DIR}
 LOGFILE={LOG_FILE}
+HELPERS={HELPER_DIR}
+WORKERS={workers}
 
 start_service() {{
     echo "🌐 Starting minerpanel service..."
-    rm -f $LOGFILE
-    procd_open_instance
-    procd_set_param command $PROG $APP
-    procd_set_param cwd $WORKDIR
-    procd_set_param respawn 3600 5 5
-    procd_set_param env PYTHONUNBUFFERED=1
-    procd_close_instance
-    echo "✅ Service started, logging to $LOGFILE"
+    # One instance per worker, each respawned on its own; they share the port via SO_REUSEPORT
+    for i in $(seq 1 $WORKERS); do
+        procd_open_instance "worker$i"
+        # Output goes through a size-capped, gzip-rotated log (/tmp is RAM)
+        procd_set_param command $PROG $HELPERS/svclaunch.py run --log $LOGFILE $APP
+        procd_set_param term_timeout 15
+        procd_set_param cwd $WORKDIR
+        # respawn only covers the launcher; app.py exits get its backoff and crash-loop handling
+        procd_set_param respawn 3600 5 5
+        procd_set_param env PYTHONUNBUFFERED=1 MINERPANEL_WORKER=$i MINERPANEL_WORKERS=$WORKERS
+        procd_close_instance
+    done
+    echo "✅ Service started with $WORKERS worker(s), logging to $LOGFILE"
 }}
 
 stop_service() {{
-    pid=$(pgrep -f "$APP")
-    if [ -n "$pid" ]; then
-        kill -9 $pid
-        echo "🛑 Service stopped"
+    # procd sends TERM to each launcher after this and the launcher drains its app.py;
+    # signalling by cmdline here would also hit the launchers (their argv names $APP)
+    if $PROG $HELPERS/procscan.py --match "$APP" --pids >/dev/null; then
+        echo "🛑 Stopping service"
     else
         echo "⚠️ Service not running"
     fi
 }}
+
+reload_service() {{
+    # Workers restart one at a time: each new app.py binds next to the old one,
+    # the old one drains; prints the downtime per worker
+    $PROG $HELPERS/svclaunch.py restart --app "$APP"
+}}
 """
     with open(INIT_FILE, "w") as f:
         f.write(init_content)
@@ -236,6 +395,24 @@ stop_service() {{
     print("✅ Service created and started!")
     pause()
 
+def ask_workers():
+    default = WORKERS or os.cpu_count() or 1
+    print("Each worker is its own app.py process; all share the port via SO_REUSEPORT.")
+    print("In-memory state (caches, sessions) is per worker.")
+    answer = input(f"Workers [default: {default}]: ").strip()
+    if answer.isdigit() and int(answer) > 0:
+        return int(answer)
+    if answer:
+        print(f"⚠️ Invalid number, using {default}")
+    return default
+
+def install_service_helpers():
+    # The init script runs these, so they must not depend on where this manager lives
+    source_dir = os.path.dirname(os.path.abspath(__file__))
+    os.makedirs(HELPER_DIR, exist_ok=True)
+    for name in SERVICE_HELPERS:
+        shutil.copy2(os.path.join(source_dir, name), os.path.join(HELPER_DIR, name))
+
 # =======================
 # 🟢 Option 4: Manage Python service
 # =======================
@@ -248,6 +425,9 @@ def manage_service():
         print("[2] Stop service")
         print("[3] Restart service")
         print("[4] Show status")
+        print("[5] Resource monitor")
+        print("[6] Restart history")
+        print("[7] View logs")
         print("[0] Back to main menu")
         choice = input("Select an option: ").strip()
         if choice == "1":
@@ -255,18 +435,85 @@ def manage_service():
         elif choice == "2":
             run_command([INIT_FILE, "stop"])
         elif choice == "3":
-            run_command([INIT_FILE, "restart"])
+            print("🔄 Graceful restart, measuring downtime...")
+            reports = request_restart(APP_FILE)
+            if reports is None:
+                print("⚠️ Launcher not running, doing a full restart")
+                run_command([INIT_FILE, "restart"])
+            else:
+                for report in reports:
+                    print(format_restart(report))
         elif choice == "4":
-            ret = subprocess.run(["pgrep","-af","app.py"], capture_output=True, text=True)
-            if ret.stdout.strip():
+            processes = ProcScanner().find(re.escape(APP_FILE))
+            if processes:
                 print("⚙️ Service is running:")
-                print(ret.stdout.strip())
+                print("\n".join(format_table(processes)))
             else:
                 print("❌ Service is not running")
+        elif choice == "5":
+            monitor_service()
+        elif choice == "6":
+            statuses = load_supervisor_status()
+            if not statuses:
+                print("⚠️ No supervisor state yet (service not started by svclaunch)")
+            for status in statuses:
+                print("\n".join(format_supervisor(status)))
+        elif choice == "7":
+            view_logs()
         elif choice == "0":
             break
         pause()
 
+def monitor_service():
+    sampler = live_monitor(re.escape(APP_FILE))
+    print()
+    if not len(sampler.buffer):
+        return
+    path = input("💾 Export samples to (.json/.csv, Enter to skip): ").strip()
+    if path:
+        try:
+            count = export_samples(sampler.buffer, path)
+            print(f"✅ {count} samples written to {path}")
+        except OSError as e:
+            print(f"❌ Export failed: {e}")
+
+def view_logs():
+    logs = live_logs(LOG_FILE)
+    if not logs:
+        print(f"⚠️ No log yet at {LOG_FILE}")
+        return
+    path = logs[0]
+    if len(logs) > 1:
+        for i, log in enumerate(logs, 1):
+            print(f"[{i}] {log}")
+        pick = input("Worker log [default: 1]: ").strip()
+        if pick.isdigit() and 1 <= int(pick) <= len(logs):
+            path = logs[int(pick) - 1]
+    count = input("Lines [default: 50]: ").strip()
+    count = int(count) if count.isdigit() else 50
+    level = input(f"Minimum level ({'/'.join(LEVELS)}, Enter = all): ").strip().upper() or None
+    if level and level not in LEVELS:
+        print("⚠️ Unknown level, showing all")
+        level = None
+    pattern = input("Regex filter (Enter = none): ").strip() or None
+    try:
+        line_filter = make_filter(level, pattern)
+    except re.error as e:
+        print(f"❌ Bad regex: {e}")
+        return
+
+    print("-" * 60)
+    for line in tail(path, count, line_filter):
+        print(line)
+    if input("Follow new lines? (y/n): ").strip().lower() != "y":
+        return
+    print(f"Following {path} — Ctrl+C to stop")
+    try:
+        for line in follow(path, make_filter(level, pattern)):
+            print(line, flush=True)
+    except KeyboardInterrupt:
+        print()
+
 # =======================
 # 🟢 Option 5: List & kill Python processes
 # =======================
@@ -276,15 +523,18 @@ def list_and_kill_processes():
     print("🔎 Active Python processes")
     print("="*60)
 
-    ret = subprocess.run(["pgrep","-af","python3"], capture_output=True, text=True)
-    lines = [l for l in ret.stdout.strip().split("\n") if l]
-    if lines:
-        for l in lines:
-            print(l)
+    processes = ProcScanner().find("python3")
+    if processes:
+        print("\n".join(format_table(processes)))
         kill_id = input("\nEnter PID to kill (or press Enter to skip): ").strip()
         if kill_id:
-            run_command(["kill","-9", kill_id])
-            print(f"✅ PID {kill_id} killed")
+            targets = [p for p in processes if str(p.pid) == kill_id]
+            if not targets:
+                print(f"❌ PID {kill_id} is not in the list")
+            elif signal_processes(targets, signal.SIGKILL):
+                print(f"✅ PID {kill_id} killed")
+            else:
+                print(f"⚠️ PID {kill_id} already exited")
     else:
         print("❌ No Python processes found")
     pause()
@@ -302,9 +552,8 @@ def remove_service():
         run_command([INIT_FILE, "stop"])
         run_command([INIT_FILE, "disable"])
 
-    if os.path.exists(LOG_FILE):
-        os.remove(LOG_FILE)
-        print("🗑 Log file removed")
+    if remove_logs(LOG_FILE):
+        print("🗑 Log files removed")
 
     if os.path.exists(INIT_FILE):
         os.remove(INIT_FILE)
@@ -313,6 +562,98 @@ def remove_service():
     print("✅ Service cleanup completed")
     pause()
 
+# =======================
+# 🟢 Option 7: Releases / rollback
+# =======================
+def manage_releases():
+    store = ReleaseStore(RELEASE_ROOT)
+    while True:
+        print_logo()
+        print("="*60)
+        print("⏪ Releases / rollback")
+        print("="*60)
+
+        current = store.current()
+        releases = store.list_releases()
+        if not releases:
+            print(f"❌ No releases in {RELEASE_ROOT} yet (deploy with 'r' in option 2)")
+        for release_id in releases:
+            indented_print(f"{release_id} (live)" if release_id == current else release_id,
+                           prefix="▶ " if release_id == current else "  ")
+        print("\n[r] Roll back to previous release")
+        print("[a ID] Activate a specific release")
+        print("[0] Back to main menu")
+
+        cmd = input("Select an option: ").strip()
+        try:
+            if cmd == "r":
+                target, seconds = store.rollback()
+                print(f"✅ Rolled back to {target} ({seconds * 1000:.2f} ms switch)")
+            elif cmd.startswith("a "):
+                target = cmd.split()[1]
+                seconds = store.activate(target)
+                print(f"✅ Activated {target} ({seconds * 1000:.2f} ms switch)")
+            elif cmd == "0":
+                break
+            else:
+                continue
+        except ValueError as e:
+            print(f"❌ {e}")
+            pause()
+            continue
+        if os.path.exists(INIT_FILE):
+            run_command([INIT_FILE, "restart"])
+        pause()
+
+# =======================
+# 🟢 Option 8: Install PassWall2 (resumable)
+# =======================
+def install_passwall():
+    print_logo()
+    print("="*60)
+    print("🛡️ PassWall2 installation")
+    print("="*60)
+
+    installer = Installer()
+    names = [step.name for step in installer.steps()]
+    if installer.state["steps"]:
+        print("Last run (completed steps are skipped):")
+        print("\n".join(format_summary(installer.state, names)))
+        print()
+    print("⚠️  WARNING: This will modify your router configuration")
+    if input("Type 'YES' to continue: ").strip() != "YES":
+        print("Installation cancelled.")
+        pause()
+        return
+    unattended = input("Pause after each step? (Enter=Yes, n=No): ").strip().lower() == "n"
+    try:
+        ok = installer.run(interactive=not unattended)
+    except KeyboardInterrupt:
+        print("\n⏸ Interrupted; the next run continues from the unfinished step")
+        ok = False
+    print()
+    print("\n".join(format_summary(installer.state, names)))
+    if ok:
+        print("✅ INSTALLATION COMPLETED SUCCESSFULLY!")
+        print("Next: open LuCI → Services → PassWall2 and configure your proxy")
+    pause()
+
+# =======================
+# 🟢 Build offline wheelhouse: iInit-process.py build-wheelhouse [DIR]
+# =======================
+def build_wheelhouse_command(args):
+    dest = args[0] if args else WHEELHOUSE_DIR
+    print(f"📦 Building wheelhouse in {dest} ...")
+    try:
+        result = build_wheelhouse(PYTHON_PACKAGES, dest)
+    except Exception as e:
+        print(f"❌ Wheelhouse build failed: {e}")
+        return 1
+    total = sum(p["bytes"] for p in result["packages"]) / (1024*1024)
+    print(f"✅ {len(result['packages'])} files ({total:.2f} MB) in {result['seconds']:.1f}s")
+    print(f"✅ Copy {dest} to each router and set MINERPANEL_WHEELHOUSE if not {WHEELHOUSE_DIR}")
+    return 0
+
 # =======================
 # 🟢 Main Menu
 # =======================
@@ -326,6 +667,8 @@ def main_menu():
         indented_print("4  Manage Python service")
         indented_print("5  List & kill Python processes")
         indented_print("6  Remove service / cleanup")
+        indented_print("7  Releases / rollback")
+        indented_print("8  Install PassWall2")
         indented_print("0  Exit")
         choice = input("    Select an option: ").strip()
         if choice == "1":
@@ -340,6 +683,10 @@ def main_menu():
             list_and_kill_processes()
         elif choice == "6":
             remove_service()
+        elif choice == "7":
+            manage_releases()
+        elif choice == "8":
+            install_passwall()
         elif choice == "0":
             print("👋 Exiting...")
             sys.exit(0)
@@ -351,4 +698,6 @@ def main_menu():
 # 🟢 Entry Point
 # =======================
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "build-wheelhouse":
+        sys.exit(build_wheelhouse_command(sys.argv[2:]))
     main_menu()
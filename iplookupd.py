@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+
+# Resident IP-lookup daemon for the `iran` list
+# Author: KOP3MA
+#
+# One process keeps the compiled prefix table in memory and answers over a
+# Unix socket, so the panel, scripts and log processors stop reloading it.
+#
+# Protocol, both directions: u32 big-endian length, then that many bytes.
+#   request   newline-separated addresses, or a command: !stats, !reload
+#   response  one ASCII byte per line: 1 domestic, 0 foreign, ? invalid or
+#             blank (one trailing newline ends the request, it adds no line);
+#             commands answer with a JSON object
+# Connections stay open for any number of request/response pairs.
+
+import os
+import sys
+import json
+import time
+import socket
+import signal
+import struct
+import asyncio
+import argparse
+from collections import OrderedDict, deque
+
+from prefixlist import DEFAULT_LIST
+from prefixbin import load_dual_table, DEFAULT_OUTPUT
+from ipclassify import BulkClassifier, DOMESTIC, FOREIGN, INVALID
+
+# =======================
+# 🟢 Configuration
+# =======================
+SOCKET_PATH = os.environ.get("MINERPANEL_IPLOOKUP_SOCKET", "/var/run/minerpanel-iplookup.sock")
+CACHE_SIZE = 4096
+RELOAD_INTERVAL = 2.0
+LATENCY_SAMPLES = 10000
+MAX_FRAME = 1024 * 1024
+FRAME = struct.Struct(">I")
+ANSWERS = {DOMESTIC: b"1", FOREIGN: b"0"}
+INVALID_ANSWER = b"?"
+
+class ProtocolError(Exception):
+    pass
+
+# =======================
+# 🟢 Lookup service
+# =======================
+class LRUCache:
+    def __init__(self, capacity=CACHE_SIZE):
+        self.capacity = capacity
+        self.items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        try:
+            value = self.items[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self.items.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self.items[key] = value
+        self.items.move_to_end(key)
+        if len(self.items) > self.capacity:
+            self.items.popitem(last=False)
+
+    def clear(self):
+        self.items.clear()
+
+class LookupService:
+    def __init__(self, list_path=DEFAULT_LIST, compiled=DEFAULT_OUTPUT, cache_size=CACHE_SIZE):
+        self.list_path = list_path
+        self.compiled = compiled
+        self.cache = LRUCache(cache_size)
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.requests = 0
+        self.lookups = 0
+        self.reloads = 0
+        self.started = time.time()
+        self.table = None
+        self.classifier = None
+        self.signature = None
+        self.reload()
+
+    def _signature(self):
+        sig = []
+        for path in (self.list_path, self.compiled):
+            try:
+                st = os.stat(path)
+                sig.append((st.st_mtime_ns, st.st_size, st.st_ino))
+            except OSError:
+                sig.append(None)
+        return tuple(sig)
+
+    def reload(self):
+        signature = self._signature()
+        # Build the new classifier first; lookups keep using the old one until the swap.
+        # Requests are small, where bisect beats NumPy's per-call overhead.
+        table = load_dual_table(self.compiled, self.list_path)
+        self.table, self.classifier = table, BulkClassifier(table.v4, use_numpy=False)
+        self.signature = signature
+        self.cache.clear()
+        self.reloads += 1
+        return len(table)
+
+    def reload_if_changed(self):
+        if self._signature() != self.signature:
+            return self.reload()
+        return None
+
+    def classify(self, addresses):
+        # IPv4 in one bulk call, IPv6 one by one against the dual-stack table
+        labels = [INVALID] * len(addresses)
+        v4 = [i for i, address in enumerate(addresses) if ":" not in address]
+        for i, label in zip(v4, self.classifier.classify([addresses[i] for i in v4])):
+            labels[i] = int(label)
+        for i, address in enumerate(addresses):
+            if ":" in address:
+                try:
+                    labels[i] = DOMESTIC if address in self.table.v6 else FOREIGN
+                except ValueError:
+                    pass
+        return labels
+
+    def lookup(self, addresses):
+        start = time.perf_counter()
+        answers = [None] * len(addresses)
+        missing = []
+        for i, address in enumerate(addresses):
+            cached = self.cache.get(address)
+            if cached is None:
+                missing.append(i)
+            else:
+                answers[i] = cached
+        if missing:
+            labels = self.classify([addresses[i] for i in missing])
+            for i, label in zip(missing, labels):
+                answer = ANSWERS.get(label, INVALID_ANSWER)
+                answers[i] = answer
+                self.cache.put(addresses[i], answer)
+        self.requests += 1
+        self.lookups += len(addresses)
+        self.latencies.append(time.perf_counter() - start)
+        return b"".join(answers)
+
+    def stats(self):
+        samples = sorted(self.latencies)
+        def percentile(p):
+            return samples[min(len(samples) - 1, int(len(samples) * p))] * 1e6 if samples else 0.0
+        total = self.cache.hits + self.cache.misses
+        return {"intervals": len(self.table), "requests": self.requests, "lookups": self.lookups,
+                "cache_size": len(self.cache.items), "cache_hits": self.cache.hits,
+                "cache_misses": self.cache.misses, "hit_rate": round(self.cache.hits / total, 4) if total else 0.0,
+                "p50_us": round(percentile(0.50), 1), "p99_us": round(percentile(0.99), 1),
+                "reloads": self.reloads, "uptime": int(time.time() - self.started)}
+
+    def handle(self, payload):
+        if payload.startswith(b"!"):
+            command = payload[1:].strip().decode(errors="replace")
+            if command == "stats":
+                return json.dumps(self.stats()).encode()
+            if command == "reload":
+                try:
+                    return json.dumps({"intervals": self.reload()}).encode()
+                except (OSError, ValueError) as e:
+                    return json.dumps({"error": f"reload failed, keeping the old table: {e}"}).encode()
+            return json.dumps({"error": f"unknown command {command}"}).encode()
+        if not payload:
+            return b""
+        lines = payload[:-1] if payload.endswith(b"\n") else payload
+        # Answers line up with request lines, so a blank line answers "?" instead of being skipped
+        return self.lookup([a.strip().decode(errors="replace") for a in lines.split(b"\n")])
+
+# =======================
+# 🟢 Server
+# =======================
+async def read_frame(reader):
+    header = await reader.readexactly(FRAME.size)
+    (length,) = FRAME.unpack(header)
+    if length > MAX_FRAME:
+        raise ProtocolError(f"frame of {length} bytes exceeds {MAX_FRAME}")
+    return await reader.readexactly(length)
+
+async def serve_client(service, reader, writer, clients):
+    clients.add(writer)
+    try:
+        while True:
+            payload = await read_frame(reader)
+            answer = service.handle(payload)
+            writer.write(FRAME.pack(len(answer)) + answer)
+            await writer.drain()
+    except (asyncio.IncompleteReadError, asyncio.CancelledError, ConnectionError, ProtocolError):
+        pass
+    finally:
+        clients.discard(writer)
+        writer.close()
+
+def safe_reload(reload):
+    try:
+        count = reload()
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Reload failed, keeping the old table: {e}", flush=True)
+        return
+    if count is not None:
+        print(f"🔄 Reloaded prefix table ({count} intervals)", flush=True)
+
+async def watch_files(service, interval):
+    while True:
+        await asyncio.sleep(interval)
+        safe_reload(service.reload_if_changed)
+
+async def serve(service, path=SOCKET_PATH, reload_interval=RELOAD_INTERVAL):
+    if os.path.exists(path):
+        os.remove(path)
+    clients = set()
+    server = await asyncio.start_unix_server(lambda r, w: serve_client(service, r, w, clients), path=path)
+    os.chmod(path, 0o666)
+    loop = asyncio.get_running_loop()
+    loop.add_signal_handler(signal.SIGHUP, safe_reload, service.reload)
+    stop = loop.create_future()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, lambda: stop.done() or stop.set_result(None))
+    watcher = asyncio.ensure_future(watch_files(service, reload_interval))
+    print(f"✅ Listening on {path} ({len(service.table)} intervals)", flush=True)
+    try:
+        await stop
+    finally:
+        watcher.cancel()
+        server.close()
+        for writer in list(clients):
+            writer.close()
+        await server.wait_closed()
+        if os.path.exists(path):
+            os.remove(path)
+
+# =======================
+# 🟢 Client
+# =======================
+def _recv_exact(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("daemon closed the connection")
+        data += chunk
+    return bytes(data)
+
+def request(payload, path=SOCKET_PATH, timeout=5.0):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path)
+        sock.sendall(FRAME.pack(len(payload)) + payload)
+        (length,) = FRAME.unpack(_recv_exact(sock, FRAME.size))
+        return _recv_exact(sock, length)
+
+def lookup(addresses, path=SOCKET_PATH):
+    # Returns {address: "domestic" | "foreign" | "invalid"}
+    answer = request("\n".join(addresses).encode(), path)
+    names = {b"1"[0]: "domestic", b"0"[0]: "foreign"}
+    return {a: names.get(c, "invalid") for a, c in zip(addresses, answer)}
+
+def stats(path=SOCKET_PATH):
+    return json.loads(request(b"!stats", path))
+
+# =======================
+# 🟢 CLI
+# =======================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resident iran-list lookup daemon over a Unix socket")
+    parser.add_argument("--socket", default=SOCKET_PATH, help="socket path (default: %(default)s)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("serve", help="run the daemon in the foreground")
+    p.add_argument("--list", default=DEFAULT_LIST, help="prefix list (default: %(default)s)")
+    p.add_argument("--compiled", default=DEFAULT_OUTPUT, help="compiled list (default: %(default)s)")
+    p.add_argument("--cache", type=int, default=CACHE_SIZE, help="LRU entries (default: %(default)s)")
+    p.add_argument("--reload-interval", type=float, default=RELOAD_INTERVAL,
+                   help="seconds between list file checks (default: %(default)s)")
+    p = sub.add_parser("query", help="ask the daemon about addresses")
+    p.add_argument("addresses", nargs="+")
+    sub.add_parser("stats", help="print daemon counters")
+    sub.add_parser("reload", help="make the daemon reload the list now")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        try:
+            service = LookupService(args.list, args.compiled, args.cache)
+        except (OSError, ValueError) as e:
+            print(f"❌ {e}")
+            return 1
+        asyncio.run(serve(service, args.socket, args.reload_interval))
+        return 0
+    try:
+        if args.command == "query":
+            for address, label in lookup(args.addresses, args.socket).items():
+                print(f"{address}\t{label}")
+        elif args.command == "stats":
+            for key, value in stats(args.socket).items():
+                print(f"{key}: {value}")
+        else:
+            print(request(b"!reload", args.socket).decode())
+    except (OSError, ValueError) as e:
+        print(f"❌ Daemon not reachable on {args.socket}: {e}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+
+# Batched policy-routing installer for the domestic prefix list
+# Author: KOP3MA
+#
+# All routes go through one `ip -batch` process instead of one `ip route add`
+# fork per prefix. Routes we own are tagged with a private protocol number so
+# the installed set can be listed back and only the difference applied.
+#
+# LAN, loopback, link-local, CGNAT and directly connected ranges are cut out
+# of the list first: routed via the WAN gateway they would take the router
+# off its own LAN. With a separate table a `suppress_prefixlength 0` rule
+# ahead of ours lets anything main routes more specifically than its default
+# route (connected networks, VPN interfaces) keep going through main.
+#
+# After a successful apply the table, gateway and device are saved, so an
+# incremental refresh (prefixdiff.py) updates the same routes the same way.
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import ipaddress
+import subprocess
+
+from prefixlist import PrefixTable, DEFAULT_LIST, aggregate, intervals_to_cidrs
+from prefixdiff import subtract
+
+# =======================
+# 🟢 Configuration
+# =======================
+ROUTE_PROTO = "233"
+DEFAULT_TABLE = "main"
+RULE_PRIORITY = "100"
+SUPPRESS_PRIORITY = "99"
+STATE_FILE = "/var/run/minerpanel-routes.json"
+LOCAL_RANGES = ("0.0.0.0/8", "10.0.0.0/8", "100.64.0.0/10", "127.0.0.0/8", "169.254.0.0/16",
+                "172.16.0.0/12", "192.168.0.0/16", "224.0.0.0/4", "240.0.0.0/4")
+
+class RouteError(Exception):
+    pass
+
+# =======================
+# 🟢 Kernel state
+# =======================
+def run_ip_json(args):
+    result = subprocess.run(["ip", "-j"] + args, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RouteError(result.stderr.strip() or f"ip {' '.join(args)} failed")
+    return json.loads(result.stdout or "[]")
+
+def default_gateway():
+    for route in run_ip_json(["-4", "route", "show", "default"]):
+        return route.get("gateway"), route.get("dev")
+    raise RouteError("no IPv4 default route; pass --via/--dev")
+
+def normalize_dst(dst):
+    return str(ipaddress.IPv4Network(dst if "/" in dst else dst + "/32"))
+
+def installed_routes(table=DEFAULT_TABLE, proto=ROUTE_PROTO):
+    # {cidr: (gateway, dev)} for routes this tool owns in the table
+    routes = {}
+    try:
+        listed = run_ip_json(["-4", "route", "show", "table", table, "proto", proto])
+    except RouteError as e:
+        if "does not exist" in str(e):
+            return routes
+        raise
+    for route in listed:
+        if route.get("dst") and route["dst"] != "default":
+            routes[normalize_dst(route["dst"])] = (route.get("gateway"), route.get("dev"))
+    return routes
+
+def connected_routes():
+    # Networks the router is directly attached to (LAN bridge, WAN subnet)
+    nets = []
+    for route in run_ip_json(["-4", "route", "show", "table", "main", "scope", "link"]):
+        if route.get("dst") and route["dst"] != "default":
+            nets.append(normalize_dst(route["dst"]))
+    return nets
+
+def rule_present(table, priority=RULE_PRIORITY):
+    for rule in run_ip_json(["-4", "rule", "show"]):
+        if str(rule.get("priority")) == str(priority) and str(rule.get("table")) == str(table):
+            return True
+    return False
+
+# =======================
+# 🟢 Batch generation
+# =======================
+def exclude_local(wanted, connected=()):
+    # The wanted prefixes minus LOCAL_RANGES and the connected networks
+    def intervals(cidrs):
+        nets = [ipaddress.IPv4Network(c) for c in cidrs]
+        return aggregate((int(n.network_address), int(n.broadcast_address)) for n in nets)
+    kept = subtract(intervals(wanted), intervals(list(LOCAL_RANGES) + list(connected)))
+    return [str(net) for net in intervals_to_cidrs(kept)]
+
+def wanted_routes(path=DEFAULT_LIST, connected=()):
+    return exclude_local([str(net) for net in PrefixTable.from_file(path).cidrs()], connected)
+
+def policy_rules(table, action, present=(False, False)):
+    # `present` tells which of (suppress rule, table rule) already exist
+    rules = [f"lookup main suppress_prefixlength 0 priority {SUPPRESS_PRIORITY}",
+             f"lookup {table} priority {RULE_PRIORITY}"]
+    if action == "add":
+        return [f"add {r}" for r, there in zip(rules, present) if not there]
+    return [f"del {r}" for r, there in zip(rules, present) if there]
+
+def route_target(via, dev, table, proto):
+    parts = []
+    if via:
+        parts += ["via", via]
+    if dev:
+        parts += ["dev", dev]
+    return " ".join(parts + ["table", table, "proto", proto])
+
+def build_batch(wanted, installed=None, via=None, dev=None, table=DEFAULT_TABLE,
+                proto=ROUTE_PROTO, rules=()):
+    # Returns (batch_text, added, removed, changed); rules are policy_rules() lines
+    installed = installed or {}
+    target = route_target(via, dev, table, proto)
+    wanted_set = set(wanted)
+
+    def differs(current):
+        gateway, device = current
+        return bool((via and gateway != via) or (dev and device != dev))
+
+    added = [c for c in wanted if c not in installed]
+    removed = [c for c in installed if c not in wanted_set]
+    changed = [c for c in wanted if c in installed and differs(installed[c])]
+    lines = [f"route del {c} table {table} proto {proto}" for c in removed]
+    lines += [f"route replace {c} {target}" for c in changed]
+    lines += [f"route add {c} {target}" for c in added]
+    lines += [f"rule {r}" for r in rules]
+    return "\n".join(lines) + ("\n" if lines else ""), added, removed, changed
+
+def apply_batch(batch):
+    start = time.perf_counter()
+    result = subprocess.run(["ip", "-batch", "-"], input=batch, capture_output=True, text=True)
+    return result.returncode == 0, result.stderr.strip(), time.perf_counter() - start
+
+# =======================
+# 🟢 Install state
+# =======================
+def save_install_state(table, via, dev, path=STATE_FILE):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"table": table, "via": via, "dev": dev}, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+def load_install_state(path=STATE_FILE):
+    # {"table", "via", "dev"} of the last install, None when routes were never installed (or removed)
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def clear_install_state(path=STATE_FILE):
+    if os.path.exists(path):
+        os.remove(path)
+
+# =======================
+# 🟢 CLI
+# =======================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Route the iran prefixes around the proxy with one ip -batch")
+    parser.add_argument("--list", default=DEFAULT_LIST, help="prefix list (default: %(default)s)")
+    parser.add_argument("--via", help="gateway (default: current default route)")
+    parser.add_argument("--dev", help="output device (default: current default route)")
+    parser.add_argument("--table", default=DEFAULT_TABLE,
+                        help="routing table; anything but 'main' also gets one 'ip rule' (default: %(default)s)")
+    parser.add_argument("--remove", action="store_true", help="delete every route this tool installed")
+    parser.add_argument("--dry-run", action="store_true", help="print the batch file, change nothing")
+    parser.add_argument("-o", "--output", help="also write the batch file here")
+    args = parser.parse_args(argv)
+
+    try:
+        have_ip = shutil.which("ip") is not None
+        wanted = [] if args.remove else wanted_routes(args.list, connected_routes() if have_ip else ())
+        installed = installed_routes(args.table) if have_ip else {}
+        via, dev = args.via, args.dev
+        if not args.remove and not via and not dev:
+            via, dev = default_gateway()
+        rules = []
+        if args.table != "main":
+            present = (rule_present("main", SUPPRESS_PRIORITY), rule_present(args.table)) if have_ip else (False, False)
+            rules = policy_rules(args.table, "del" if args.remove else "add", present)
+    except (RouteError, OSError, ValueError) as e:
+        print(f"❌ {e}")
+        return 1
+
+    batch, added, removed, changed = build_batch(wanted, installed, via, dev, args.table, rules=rules)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(batch)
+    summary = f"+{len(added)} -{len(removed)} ~{len(changed)} routes in table {args.table}"
+
+    if args.dry_run:
+        sys.stdout.write(batch)
+        print(f"✅ dry run: {summary}", file=sys.stderr)
+        return 0
+    if not batch:
+        print(f"✅ Routes already up to date ({len(wanted)} in table {args.table})")
+        return 0
+    ok, error, seconds = apply_batch(batch)
+    if not ok:
+        print(f"❌ ip -batch failed: {error}")
+        return 1
+    try:
+        if args.remove:
+            clear_install_state()
+        else:
+            save_install_state(args.table, via, dev)
+    except OSError as e:
+        print(f"⚠️ Cannot record the install in {STATE_FILE}: {e}")
+    print(f"✅ Applied {summary} in {seconds * 1000:.1f} ms (one ip process)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+
+# Requests/sec vs worker count for the multi-worker service mode
+# Author: KOP3MA
+#
+# For each worker count N the test starts N copies of the app through
+# `svclaunch.py child` (so they share the port with SO_REUSEPORT exactly like
+# the procd instances do), drives them from client processes for a fixed time
+# and prints req/s, the speedup over one worker and how the kernel spread the
+# requests across workers. Without --app a small CPU-bound demo server is
+# used, so the numbers show the scaling of the mode, not of one app's routes.
+#
+# The clients run on the same machine and take CPU from the workers; on an
+# N-core router the scaling therefore flattens before N workers.
+
+import os
+import sys
+import time
+import signal
+import argparse
+import subprocess
+import multiprocessing
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from svclaunch import listening_ports
+
+# =======================
+# 🟢 Configuration
+# =======================
+PORT = 5099
+DURATION = 5.0
+WARMUP = 1.0
+WORK = 20000          # loop iterations per demo request, roughly 1 ms of CPU on a router core
+READY_TIMEOUT = 15.0
+SVCLAUNCH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "svclaunch.py")
+
+# =======================
+# 🟢 Demo app
+# =======================
+def demo_server(port, work):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            total = 0
+            for i in range(work):
+                total += i * i
+            body = f"{os.getpid()} {total}\n".encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    ThreadingHTTPServer(("127.0.0.1", port), Handler).serve_forever()
+
+# =======================
+# 🟢 Workers
+# =======================
+def start_workers(count, app, app_args, port):
+    command = [sys.executable, SVCLAUNCH, "child", "--drain", "1", app, "--"] + app_args
+    workers = [subprocess.Popen(command, stdout=subprocess.DEVNULL) for _ in range(count)]
+    deadline = time.monotonic() + READY_TIMEOUT
+    for worker in workers:
+        while not any(p == port for _, p in listening_ports(worker.pid)):
+            if worker.poll() is not None or time.monotonic() > deadline:
+                stop_workers(workers)
+                raise RuntimeError(f"worker {worker.pid} did not listen on port {port}")
+            time.sleep(0.05)
+    return workers
+
+def stop_workers(workers):
+    for worker in workers:
+        if worker.poll() is None:
+            worker.send_signal(signal.SIGTERM)
+    for worker in workers:
+        try:
+            worker.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            worker.kill()
+            worker.wait()
+
+# =======================
+# 🟢 Client
+# =======================
+def _client(port, path, deadline, results):
+    # One connection per request (HTTP/1.0), like browsers hitting a panel
+    import socket
+    request = f"GET {path} HTTP/1.0\r\nHost: localhost\r\n\r\n".encode()
+    done, errors, pids = 0, 0, Counter()
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+                sock.sendall(request)
+                chunks = []
+                while True:
+                    chunk = sock.recv(65536)
+                    if not chunk:
+                        break
+                    chunks.append(chunk)
+            response = b"".join(chunks)
+            if response[9:12] != b"200":
+                errors += 1
+                continue
+            done += 1
+            # The demo server answers with its pid; other apps land under "?"
+            first = response.partition(b"\r\n\r\n")[2].split(b" ", 1)[0]
+            pids[first.decode() if first.isdigit() else "?"] += 1
+        except OSError:
+            errors += 1
+    results.put((done, errors, dict(pids)))
+
+def drive(port, path, clients, duration):
+    results = multiprocessing.Queue()
+    deadline = time.monotonic() + duration
+    procs = [multiprocessing.Process(target=_client, args=(port, path, deadline, results)) for _ in range(clients)]
+    for proc in procs:
+        proc.start()
+    done, errors, pids = 0, 0, Counter()
+    for _ in procs:
+        d, e, p = results.get()
+        done += d
+        errors += e
+        pids.update(p)
+    for proc in procs:
+        proc.join()
+    return done, errors, pids
+
+def run_series(counts, app, app_args, port, path, clients, duration):
+    rows = []
+    for count in counts:
+        workers = start_workers(count, app, app_args, port)
+        try:
+            drive(port, path, clients, WARMUP)
+            done, errors, pids = drive(port, path, clients, duration)
+        finally:
+            stop_workers(workers)
+        rows.append({"workers": count, "rps": done / duration, "errors": errors,
+                     "spread": sorted(pids.values(), reverse=True)})
+    return rows
+
+def format_rows(rows):
+    base = rows[0]["rps"] or 1
+    lines = [f"{'WORKERS':>7} {'REQ/S':>9} {'SPEEDUP':>8} {'ERRORS':>7}  REQUESTS PER WORKER"]
+    for row in rows:
+        spread = " ".join(str(n) for n in row["spread"])
+        lines.append(f"{row['workers']:>7} {row['rps']:>9.1f} {row['rps'] / base:>7.2f}x {row['errors']:>7}  {spread}")
+    return lines
+
+# =======================
+# 🟢 CLI
+# =======================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure req/s scaling of SO_REUSEPORT workers")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("run", help="run the load test")
+    p.add_argument("--workers", default=None,
+                   help="comma-separated worker counts (default: 1..CPU cores)")
+    p.add_argument("--app", help="app to test instead of the demo server; must listen on --port")
+    p.add_argument("--path", default="/", help="request path (default: %(default)s)")
+    p.add_argument("--port", type=int, default=PORT)
+    p.add_argument("--clients", type=int, default=None, help="client processes (default: 2 x cores)")
+    p.add_argument("--duration", type=float, default=DURATION, help="seconds per worker count")
+    p.add_argument("--work", type=int, default=WORK, help="demo server CPU loop per request")
+    p = sub.add_parser("serve", help="internal: run the demo server")
+    p.add_argument("--port", type=int, default=PORT)
+    p.add_argument("--work", type=int, default=WORK)
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        demo_server(args.port, args.work)
+        return 0
+
+    cores = os.cpu_count() or 1
+    counts = [int(n) for n in args.workers.split(",")] if args.workers else list(range(1, cores + 1))
+    clients = args.clients or 2 * cores
+    if args.app:
+        app, app_args = args.app, []
+    else:
+        app, app_args = os.path.abspath(__file__), ["serve", "--port", str(args.port), "--work", str(args.work)]
+    print(f"🚀 {cores} CPU core(s), {clients} client process(es), {args.duration:g}s per run")
+    try:
+        rows = run_series(counts, app, app_args, args.port, args.path, clients, args.duration)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return 1
+    print("\n".join(format_rows(rows)))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
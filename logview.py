@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+
+# Tail / follow / filter for the minerpanel service log
+# Author: KOP3MA
+#
+# The last N lines are found by reading the file backwards in fixed blocks,
+# so a large log is never loaded whole. Follow mode waits on inotify (via
+# ctypes; OpenWrt ships python3-ctypes separately) and falls back to polling
+# the file size. A rotated or truncated log is reopened from the start.
+# Memory stays bounded: one block, the N lines asked for and at most
+# MAX_LINE bytes of an unfinished line.
+
+import os
+import re
+import sys
+import time
+import select
+import struct
+import argparse
+from collections import deque
+
+from svclog import LOG_FILE
+
+# =======================
+# 🟢 Configuration
+# =======================
+BLOCK_SIZE = 8192
+MAX_LINE = 64 * 1024
+MAX_CONTINUATION = 200      # unlevelled lines (tracebacks) kept while looking for their level
+POLL_INTERVAL = 0.5
+MIN_POLL = 0.05             # polling speeds up to this while the log is being written
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40, "CRITICAL": 50}
+LEVEL_RE = re.compile(r"\b(DEBUG|INFO|WARN(?:ING)?|ERROR|CRITICAL|FATAL)\b")
+
+# =======================
+# 🟢 Reading backwards
+# =======================
+def reverse_lines(path, block_size=BLOCK_SIZE):
+    # Yields lines newest first, reading the file from the end in blocks
+    with open(path, "rb") as f:
+        position = f.seek(0, os.SEEK_END)
+        partial = b""
+        while position > 0:
+            step = min(block_size, position)
+            position -= step
+            f.seek(position)
+            chunk = f.read(step) + partial
+            lines = chunk.split(b"\n")
+            partial = lines.pop(0)
+            for line in reversed(lines):
+                yield line
+            if len(partial) > MAX_LINE:
+                # One enormous line: hand out its tail rather than buffering it all
+                yield partial[-MAX_LINE:]
+                partial = b""
+        yield partial
+
+def tail(path, count, line_filter=None):
+    # Last `count` lines (after filtering), oldest first
+    picked = deque()
+    if count <= 0:
+        return []
+    lines = reverse_lines(path)
+    first = next(lines, None)
+    if first:
+        # Text after the last newline; empty when the file ends with one
+        lines = _prepend(first, lines)
+    for line in (line_filter.reverse(lines) if line_filter else lines):
+        picked.appendleft(line.decode(errors="replace"))
+        if len(picked) >= count:
+            break
+    return list(picked)
+
+def _prepend(first, rest):
+    yield first
+    yield from rest
+
+# =======================
+# 🟢 Filters
+# =======================
+def line_level(line):
+    match = LEVEL_RE.search(line)
+    if not match:
+        return None
+    name = match.group(1)
+    return LEVELS.get({"WARN": "WARNING", "FATAL": "CRITICAL"}.get(name, name))
+
+def make_filter(level=None, pattern=None):
+    # None when there is nothing to filter, so tail() stops after `count` lines
+    if not level and not pattern:
+        return None
+    return LineFilter(level, pattern)
+
+class LineFilter:
+    # Minimum level and/or regex. Lines without a level (tracebacks) inherit the
+    # level of the log line they follow.
+    def __init__(self, level=None, pattern=None):
+        self.min_level = LEVELS[level.upper()] if level else None
+        self.regex = re.compile(pattern) if pattern else None
+        self._current = None
+
+    def _level_ok(self, level):
+        return self.min_level is None or (level is not None and level >= self.min_level)
+
+    def _regex_ok(self, text):
+        return self.regex is None or self.regex.search(text) is not None
+
+    def accept(self, text):
+        # Forward direction, one line at a time (follow mode)
+        level = line_level(text)
+        if level is not None:
+            self._current = level
+        return self._level_ok(self._current) and self._regex_ok(text)
+
+    def reverse(self, lines):
+        # Backward direction: an unlevelled line's level is only known once the
+        # older line it belongs to is reached, so hold a bounded run of them.
+        # A longer run is treated as having no level, like the start of the
+        # file in forward mode.
+        if self.min_level is None:
+            for raw in lines:
+                if self._regex_ok(raw.decode(errors="replace")):
+                    yield raw
+            return
+        pending, overflow = [], False
+        for raw in lines:
+            text = raw.decode(errors="replace")
+            level = line_level(text)
+            if level is None:
+                if len(pending) < MAX_CONTINUATION:
+                    pending.append((raw, text))
+                else:
+                    overflow = True
+                continue
+            if self._level_ok(level):
+                if not overflow:
+                    for held, held_text in pending:
+                        if self._regex_ok(held_text):
+                            yield held
+                if self._regex_ok(text):
+                    yield raw
+            pending, overflow = [], False
+
+# =======================
+# 🟢 Change notification
+# =======================
+class InotifyWatch:
+    # Directory watch through libc; raises OSError when inotify is unavailable
+    IN_MODIFY, IN_MOVED_FROM, IN_MOVED_TO, IN_CREATE, IN_DELETE = 0x2, 0x40, 0x80, 0x100, 0x200
+    IN_NONBLOCK, IN_CLOEXEC = 0o4000, 0o2000000
+    HEADER = struct.Struct("iIII")
+
+    def __init__(self, path):
+        try:
+            import ctypes
+            libc = ctypes.CDLL(None, use_errno=True)
+            init, add_watch = libc.inotify_init1, libc.inotify_add_watch
+        except (ImportError, OSError, AttributeError) as e:
+            raise OSError(f"inotify unavailable: {e}")
+        self.name = os.path.basename(path).encode()
+        self.fd = init(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = self.IN_MODIFY | self.IN_MOVED_FROM | self.IN_MOVED_TO | self.IN_CREATE | self.IN_DELETE
+        directory = os.path.dirname(os.path.abspath(path)).encode()
+        if add_watch(self.fd, directory, mask) < 0:
+            error = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(error, "inotify_add_watch failed")
+
+    def wait(self, timeout):
+        # True when the watched file changed; other files in the directory are ignored
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return False
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return False
+        offset, changed = 0, False
+        while offset + self.HEADER.size <= len(data):
+            _, _, _, length = self.HEADER.unpack_from(data, offset)
+            name = data[offset + self.HEADER.size:offset + self.HEADER.size + length].rstrip(b"\0")
+            changed = changed or name == self.name
+            offset += self.HEADER.size + length
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+class PollWatch:
+    # Adaptive: MIN_POLL while the file keeps changing, backing off to `interval`
+    # when idle. A segment that is created and rotated away between two polls is
+    # still missed, which inotify avoids by waking on every write.
+    def __init__(self, path, interval=POLL_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self._delay = MIN_POLL
+        self._last = self._signature()
+
+    def _signature(self):
+        try:
+            st = os.stat(self.path)
+            return st.st_ino, st.st_size, st.st_mtime_ns
+        except OSError:
+            return None
+
+    def wait(self, timeout):
+        time.sleep(min(self._delay, timeout))
+        current = self._signature()
+        changed, self._last = current != self._last, current
+        self._delay = MIN_POLL if changed else min(self._delay * 2, self.interval)
+        return changed
+
+    def close(self):
+        pass
+
+def make_watch(path, poll=False):
+    if not poll:
+        try:
+            return InotifyWatch(path)
+        except OSError:
+            pass
+    return PollWatch(path)
+
+# =======================
+# 🟢 Follow
+# =======================
+def follow(path, line_filter=None, poll=False, from_end=True, idle_check=2.0):
+    # Yields new lines as they are written; stops only when the caller stops iterating
+    watch = make_watch(path, poll)
+    f, inode, partial = None, None, b""
+    try:
+        while True:
+            if f is None:
+                try:
+                    f = open(path, "rb")
+                    inode = os.fstat(f.fileno()).st_ino
+                    if from_end:
+                        f.seek(0, os.SEEK_END)
+                    from_end = False      # a reopened (rotated) file is read from its start
+                except OSError:
+                    f = None
+            if f is not None:
+                while True:
+                    chunk = f.read(BLOCK_SIZE)
+                    if not chunk:
+                        break
+                    lines = (partial + chunk).split(b"\n")
+                    partial = lines.pop()
+                    if len(partial) > MAX_LINE:
+                        lines.append(partial)
+                        partial = b""
+                    for raw in lines:
+                        text = raw.decode(errors="replace")
+                        if line_filter is None or line_filter.accept(text):
+                            yield text
+                if _replaced(path, f, inode):
+                    # Rotated away or truncated: drain what was left, then start on the new file
+                    f.close()
+                    f, partial = None, b""
+                    continue
+            watch.wait(idle_check)
+    finally:
+        watch.close()
+        if f is not None:
+            f.close()
+
+def _replaced(path, f, inode):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    return st.st_ino != inode or st.st_size < f.tell()
+
+# =======================
+# 🟢 CLI
+# =======================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tail and follow the minerpanel service log")
+    parser.add_argument("--log", default=LOG_FILE)
+    parser.add_argument("-n", "--lines", type=int, default=50)
+    parser.add_argument("--level", type=str.upper, choices=sorted(LEVELS, key=LEVELS.get),
+                        help="minimum level to show")
+    parser.add_argument("--grep", metavar="REGEX", help="only lines matching REGEX")
+    parser.add_argument("-f", "--follow", action="store_true", help="keep printing new lines")
+    parser.add_argument("--poll", action="store_true", help="poll instead of using inotify")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.log):
+        print(f"❌ No log at {args.log}")
+        return 1
+    for line in tail(args.log, args.lines, make_filter(args.level, args.grep)):
+        print(line)
+    if args.follow:
+        try:
+            for line in follow(args.log, make_filter(args.level, args.grep), args.poll):
+                print(line, flush=True)
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+
+# Atomic nftables interval-set loader for the `iran` prefix list
+# Author: KOP3MA
+#
+# Everything is applied as a single `nft -f` transaction: the kernel swaps in
+# the whole batch at once, so the set is never seen empty or half-filled.
+# When the set already exists only the CIDRs that differ are deleted/added.
+#
+# --domain-sets creates the empty sets dnsmasq fills from domaintrie.py's
+# nftset= rules, now and, through an fw4 include, again on every boot.
+
+import os
+
+import sys
+import json
+import time
+import shutil
+import argparse
+import ipaddress
+import subprocess
+
+from prefixlist import PrefixTable, DEFAULT_LIST, parse_lines
+
+# =======================
+# 🟢 Configuration
+# =======================
+NFT_FAMILY = "inet"
+NFT_TABLE = "minerpanel"
+NFT_SET = "iran_v4"
+ELEMENTS_PER_LINE = 500
+DOMAIN_SET_V4 = "iran_domains_v4"
+DOMAIN_SET_V6 = "iran_domains_v6"
+NFT_INCLUDE = "/usr/share/nftables.d/ruleset-post/minerpanel-domain-sets.nft"
+
+# =======================
+# 🟢 Current kernel state
+# =======================
+def _element_interval(elem):
+    if isinstance(elem, str):
+        value = int(ipaddress.IPv4Address(elem))
+        return value, value
+    if "prefix" in elem:
+        net = ipaddress.IPv4Network(f"{elem['prefix']['addr']}/{elem['prefix']['len']}")
+        return int(net.network_address), int(net.broadcast_address)
+    if "range" in elem:
+        start, end = elem["range"]
+        return int(ipaddress.IPv4Address(start)), int(ipaddress.IPv4Address(end))
+    if "elem" in elem:
+        return _element_interval(elem["elem"]["val"])
+    raise ValueError(f"unknown set element {elem!r}")
+
+def current_elements(family=NFT_FAMILY, table=NFT_TABLE, name=NFT_SET):
+    # None when nft is missing or the set does not exist yet
+    if not shutil.which("nft"):
+        return None
+    result = subprocess.run(["nft", "-j", "list", "set", family, table, name], capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    for item in json.loads(result.stdout).get("nftables", []):
+        if "set" in item:
+            return {_element_interval(e) for e in item["set"].get("elem", [])}
+    return set()
+
+def elements_from_list(path):
+    with open(path) as f:
+        intervals, _ = parse_lines(f)
+    return set(cidr_intervals(PrefixTable(intervals)))
+
+def cidr_intervals(table):
+    return [(int(n.network_address), int(n.broadcast_address)) for n in table.cidrs()]
+
+# =======================
+# 🟢 Script generation
+# =======================
+def format_element(interval):
+    start, end = interval
+    return str(next(ipaddress.summarize_address_range(ipaddress.IPv4Address(start), ipaddress.IPv4Address(end))))
+
+def _element_lines(verb, family, table, name, intervals):
+    lines = []
+    items = [format_element(i) for i in sorted(intervals)]
+    for i in range(0, len(items), ELEMENTS_PER_LINE):
+        lines.append(f"{verb} element {family} {table} {name} {{ {', '.join(items[i:i + ELEMENTS_PER_LINE])} }}")
+    return lines
+
+def build_script(wanted, current=None, family=NFT_FAMILY, table=NFT_TABLE, name=NFT_SET):
+    # Returns (script, added, removed); current=None means a full (re)load
+    lines = [f"add table {family} {table}",
+             f"add set {family} {table} {name} {{ type ipv4_addr; flags interval; }}"]
+    if current is None:
+        added, removed = set(wanted), set()
+        lines.append(f"flush set {family} {table} {name}")
+    else:
+        added, removed = set(wanted) - current, current - set(wanted)
+    lines += _element_lines("delete", family, table, name, removed)
+    lines += _element_lines("add", family, table, name, added)
+    return "\n".join(lines) + "\n", added, removed
+
+def domain_sets_script(family=NFT_FAMILY, table=NFT_TABLE, set4=DOMAIN_SET_V4, set6=DOMAIN_SET_V6):
+    # `add` never touches a set that already exists, so addresses dnsmasq already put there stay
+    lines = [f"add table {family} {table}",
+             f"add set {family} {table} {set4} {{ type ipv4_addr; }}"]
+    if set6:
+        lines.append(f"add set {family} {table} {set6} {{ type ipv6_addr; }}")
+    return "\n".join(lines) + "\n"
+
+def ensure_domain_sets(family=NFT_FAMILY, table=NFT_TABLE, set4=DOMAIN_SET_V4, set6=DOMAIN_SET_V6,
+                       include=NFT_INCLUDE):
+    # Creates the sets now and writes the fw4 include that recreates them at boot.
+    # Returns (ok, error); without nft only the include is written.
+    script = domain_sets_script(family, table, set4, set6)
+    if include:
+        os.makedirs(os.path.dirname(include), exist_ok=True)
+        tmp = include + ".tmp"
+        with open(tmp, "w") as f:
+            f.write("# Generated by nftset.py: sets filled by dnsmasq nftset= rules\n" + script)
+        os.replace(tmp, include)
+    if not shutil.which("nft"):
+        return True, ""
+    ok, error, _ = apply_script(script)
+    return ok, error
+
+def check_script(script):
+    # Offline sanity check: every element parses and no two added elements overlap
+    added = []
+    for line in script.splitlines():
+        if not line.startswith(("add element", "delete element")):
+            continue
+        body = line[line.index("{") + 1:line.rindex("}")]
+        for item in body.split(","):
+            net = ipaddress.IPv4Network(item.strip())
+            if line.startswith("add"):
+                added.append((int(net.network_address), int(net.broadcast_address)))
+    added.sort()
+    for (s1, e1), (s2, e2) in zip(added, added[1:]):
+        if s2 <= e1:
+            raise ValueError(f"overlapping elements {format_element((s1, e1))} and {format_element((s2, e2))}")
+    return len(added)
+
+def apply_script(script, check_only=False):
+    cmd = ["nft", "-c", "-f", "-"] if check_only else ["nft", "-f", "-"]
+    start = time.perf_counter()
+    result = subprocess.run(cmd, input=script, capture_output=True, text=True)
+    return result.returncode == 0, result.stderr.strip(), time.perf_counter() - start
+
+# =======================
+# 🟢 CLI
+# =======================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load the iran prefix list into an nftables interval set")
+    parser.add_argument("--list", default=DEFAULT_LIST, help="prefix list (default: %(default)s)")
+    parser.add_argument("--family", default=NFT_FAMILY)
+    parser.add_argument("--table", default=NFT_TABLE)
+    parser.add_argument("--set", dest="name", default=NFT_SET)
+    parser.add_argument("--full", action="store_true", help="flush and reload instead of applying a delta")
+    parser.add_argument("--current", metavar="FILE", help="diff against this list instead of the live set")
+    parser.add_argument("--dry-run", action="store_true", help="print and check the script, change nothing")
+    parser.add_argument("-o", "--output", help="also write the generated script here")
+    parser.add_argument("--domain-sets", action="store_true",
+                        help=f"only create the dnsmasq sets {DOMAIN_SET_V4}/{DOMAIN_SET_V6} (also at boot)")
+    args = parser.parse_args(argv)
+
+    if args.domain_sets:
+        if args.dry_run:
+            sys.stdout.write(domain_sets_script(args.family, args.table))
+            return 0
+        try:
+            ok, error = ensure_domain_sets(args.family, args.table)
+        except OSError as e:
+            ok, error = False, str(e)
+        if not ok:
+            print(f"❌ Cannot create the domain sets: {error}")
+            return 1
+        print(f"✅ Sets {DOMAIN_SET_V4}, {DOMAIN_SET_V6} in {args.family} {args.table} (boot include {NFT_INCLUDE})")
+        return 0
+
+    wanted = elements_from_list(args.list)
+    if args.full:
+        current = None
+    elif args.current:
+        current = elements_from_list(args.current)
+    else:
+        current = current_elements(args.family, args.table, args.name)
+    script, added, removed = build_script(wanted, current, args.family, args.table, args.name)
+    mode = "full load" if current is None else "delta"
+
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(script)
+
+    if args.dry_run:
+        sys.stdout.write(script)
+        try:
+            check_script(script)
+        except ValueError as e:
+            print(f"❌ {e}", file=sys.stderr)
+            return 1
+        if shutil.which("nft"):
+            ok, error, _ = apply_script(script, check_only=True)
+            if not ok:
+                print(f"❌ nft -c: {error}", file=sys.stderr)
+                return 1
+        print(f"✅ {mode}: +{len(added)} -{len(removed)} elements ({len(wanted)} in set), script OK",
+              file=sys.stderr)
+        return 0
+
+    if current is not None and not added and not removed:
+        print(f"✅ {args.family} {args.table} {args.name} already up to date ({len(wanted)} elements)")
+        return 0
+    ok, error, seconds = apply_script(script)
+    if not ok:
+        print(f"❌ nft failed: {error}")
+        return 1
+    print(f"✅ {mode}: +{len(added)} -{len(removed)} elements in one transaction ({seconds * 1000:.1f} ms)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+
+# Checkpointed PassWall2 installer (port of the PassWall shell script)
+# Author: KOP3MA
+#
+# The eight steps of the shell installer run as a pipeline. After every step
+# its result and duration go to a state file, so a failed run can be resumed:
+# a step whose effect is already in place (package installed, key present,
+# feed lines written, package lists downloaded) is skipped instead of being
+# done again. That includes both slow `opkg update` runs, as long as the
+# lists they downloaded are still on disk and younger than LISTS_MAX_AGE.
+# customfeeds.conf is edited line by line, so repeated runs never duplicate
+# the repo lines.
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import subprocess
+import urllib.request
+from collections import namedtuple
+
+from pkgindex import InstalledIndex, OPKG_STATUS_FILE
+
+# =======================
+# 🟢 Configuration
+# =======================
+STATE_FILE = os.environ.get("MINERPANEL_PASSWALL_STATE", "/etc/minerpanel/passwall-state.json")
+RELEASE_FILE = "/etc/openwrt_release"
+CUSTOMFEEDS = "/etc/opkg/customfeeds.conf"
+OPKG_LISTS_DIR = "/var/opkg-lists"
+OPKG_KEYS_DIR = "/etc/opkg/keys"
+DNSMASQ_INIT = "/etc/init.d/dnsmasq"
+FEED_BASE = "https://master.dl.sourceforge.net/project/openwrt-passwall-build"
+KEY_URL = FEED_BASE + "/passwall.pub"
+FEEDS = ("passwall_packages", "passwall2")
+KMODS = ["kmod-nft-tproxy", "kmod-nft-socket"]
+PASSWALL_PACKAGES = ["luci-app-passwall2", "v2ray-geosite-ir"]
+LISTS_MAX_AGE = 24 * 3600
+
+Step = namedtuple("Step", "name title run done")
+
+class StepError(Exception):
+    pass
+
+# =======================
+# 🟢 Helpers
+# =======================
+def read_release(path=RELEASE_FILE):
+    # {"DISTRIB_RELEASE": "23.05.3", "DISTRIB_ARCH": "mipsel_24kc", ...}
+    info = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                match = re.match(r"(\w+)=['\"]?(.*?)['\"]?\s*$", line)
+                if match:
+                    info[match.group(1)] = match.group(2)
+    except OSError:
+        pass
+    return info
+
+def feed_lines(release, arch):
+    # The feed tree is per OpenWrt series (packages-23.05), not per point release
+    series = ".".join(release.split(".")[:2])
+    return [f"src/gz {name} {FEED_BASE}/releases/packages-{series}/{arch}/{name}" for name in FEEDS]
+
+def merge_feed_lines(existing, wanted):
+    # Returns (new text, changed). A line for the same feed name with another
+    # URL is replaced in place; exact duplicates are collapsed.
+    names = {line.split()[1]: line for line in wanted}
+    out, seen, changed = [], set(), False
+    for line in existing.splitlines():
+        fields = line.split()
+        name = fields[1] if len(fields) >= 3 and fields[0].startswith("src") else None
+        if name in names:
+            if name in seen or line != names[name]:
+                changed = True
+            if name not in seen:
+                out.append(names[name])
+                seen.add(name)
+            continue
+        out.append(line)
+    for name, line in names.items():
+        if name not in seen:
+            out.append(line)
+            changed = True
+    return "\n".join(out) + "\n", changed
+
+# =======================
+# 🟢 Pipeline context
+# =======================
+class Installer:
+    def __init__(self, state_file=STATE_FILE, dry_run=False, out=print):
+        self.state_file = state_file
+        self.dry_run = dry_run
+        self.out = out
+        self.index = InstalledIndex(OPKG_STATUS_FILE)
+        self.state = self.load_state()
+        self.changed = False          # something was actually done in this run
+        self.feeds_changed = False
+
+    def load_state(self):
+        try:
+            with open(self.state_file) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"steps": {}}
+
+    def save_state(self):
+        os.makedirs(os.path.dirname(self.state_file) or ".", exist_ok=True)
+        tmp = self.state_file + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.state, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.state_file)
+
+    def step_ok(self, name):
+        return self.state["steps"].get(name, {}).get("status") == "ok"
+
+    def command(self, cmd, check=True):
+        self.out(f"   $ {' '.join(cmd)}")
+        if self.dry_run:
+            return
+        try:
+            code = subprocess.run(cmd).returncode
+        except OSError as e:
+            raise StepError(f"{cmd[0]}: {e}")
+        self.changed = True
+        if check and code != 0:
+            raise StepError(f"`{' '.join(cmd)}` exited with code {code}")
+
+    def missing(self, packages):
+        return self.index.missing_opkg(packages)
+
+    def to_install(self, packages):
+        # A forced step with nothing missing reinstalls the whole set, never a bare `opkg install`
+        return self.missing(packages) or list(packages)
+
+    # -----------------------
+    # Steps
+    # -----------------------
+    def lists_fresh(self, step, names=None, newer_than=None):
+        # The lists this step last downloaded are still there (not wiped by a
+        # reboot or replaced by older ones) and not older than LISTS_MAX_AGE
+        updated = self.state["steps"].get(step, {}).get("updated")
+        if not updated or time.time() - updated > LISTS_MAX_AGE:
+            return False
+        if newer_than is not None and updated < newer_than:
+            return False
+        try:
+            present = set(os.listdir(OPKG_LISTS_DIR))
+        except OSError:
+            return False
+        names = set(names) if names is not None else present
+        if not names or not names <= present:
+            return False
+        return all(os.path.getmtime(os.path.join(OPKG_LISTS_DIR, name)) >= updated for name in names)
+
+    def feeds_mtime(self):
+        try:
+            return int(os.path.getmtime(CUSTOMFEEDS))
+        except OSError:
+            return None
+
+    def step_update(self):
+        started = int(time.time())
+        self.command(["opkg", "update"])
+        return {} if self.dry_run else {"updated": started}
+
+    def step_dnsmasq(self):
+        if self.index.opkg_installed("dnsmasq"):
+            # As in the shell script a failed removal is not fatal; the install decides
+            self.command(["opkg", "remove", "dnsmasq", "--force-removal-of-dependent-packages"], check=False)
+        self.command(["opkg", "install", "dnsmasq-full"])
+
+    def step_kmods(self):
+        self.command(["opkg", "install"] + self.to_install(KMODS))
+
+    def key_installed(self):
+        key = self.state["steps"].get("key", {}).get("key_file")
+        return self.step_ok("key") and key is not None and os.path.exists(key)
+
+    def step_key(self):
+        path = "/tmp/passwall.pub"
+        self.out(f"   ⬇ {KEY_URL}")
+        if self.dry_run:
+            self.command(["opkg-key", "add", path])
+            return {}
+        try:
+            urllib.request.urlretrieve(KEY_URL, path)
+            with open(path, "rb") as f:
+                key = f.read()
+            self.command(["opkg-key", "add", path])
+        except OSError as e:
+            raise StepError(f"key download failed: {e}")
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+        # opkg-key stores the key under its fingerprint; remember that file for the skip check
+        for name in sorted(os.listdir(OPKG_KEYS_DIR)):
+            with open(os.path.join(OPKG_KEYS_DIR, name), "rb") as f:
+                if f.read() == key:
+                    return {"key_file": os.path.join(OPKG_KEYS_DIR, name)}
+        raise StepError(f"key not found in {OPKG_KEYS_DIR} after opkg-key add")
+
+    def wanted_feeds(self):
+        info = read_release(RELEASE_FILE)
+        release, arch = info.get("DISTRIB_RELEASE"), info.get("DISTRIB_ARCH")
+        if not release or not arch:
+            raise StepError(f"cannot read DISTRIB_RELEASE/DISTRIB_ARCH from {RELEASE_FILE}")
+        return feed_lines(release, arch)
+
+    def feeds_present(self):
+        try:
+            with open(CUSTOMFEEDS) as f:
+                existing = f.read()
+        except OSError:
+            return False
+        try:
+            return not merge_feed_lines(existing, self.wanted_feeds())[1]
+        except StepError:
+            return False
+
+    def step_feeds(self):
+        wanted = self.wanted_feeds()
+        self.out(f"   Detected feeds: {', '.join(line.split()[2] for line in wanted)}")
+        try:
+            with open(CUSTOMFEEDS) as f:
+                existing = f.read()
+        except FileNotFoundError:
+            existing = ""
+        text, changed = merge_feed_lines(existing, wanted)
+        if not changed:
+            return
+        self.out(f"   ✏ {CUSTOMFEEDS}")
+        if not self.dry_run:
+            tmp = CUSTOMFEEDS + ".tmp"
+            with open(tmp, "w") as f:
+                f.write(text)
+            os.replace(tmp, CUSTOMFEEDS)
+            self.changed = self.feeds_changed = True
+
+    def step_install(self):
+        self.command(["opkg", "install"] + self.to_install(PASSWALL_PACKAGES))
+
+    def step_restart(self):
+        self.command([DNSMASQ_INIT, "restart"])
+        self.command([DNSMASQ_INIT, "enable"])
+
+    def steps(self):
+        return [
+            Step("update", "Updating package lists", self.step_update,
+                 lambda: self.lists_fresh("update")),
+            Step("dnsmasq", "Replacing dnsmasq with dnsmasq-full", self.step_dnsmasq,
+                 lambda: not self.missing(["dnsmasq-full"])),
+            Step("kmods", "Installing kernel modules", self.step_kmods,
+                 lambda: not self.missing(KMODS)),
+            Step("key", "Adding PassWall2 repository key", self.step_key, self.key_installed),
+            Step("feeds", "Adding PassWall2 repositories", self.step_feeds, self.feeds_present),
+            Step("update-feeds", "Updating packages with new repositories", self.step_update,
+                 lambda: self.lists_fresh("update-feeds", FEEDS, self.feeds_mtime()) and not self.feeds_changed),
+            Step("install", "Installing PassWall2", self.step_install,
+                 lambda: not self.missing(PASSWALL_PACKAGES)),
+            # Only needed when this run changed something, or it never completed
+            Step("restart", "Final configuration (dnsmasq)", self.step_restart,
+                 lambda: self.step_ok("restart") and not self.changed),
+        ]
+
+    # -----------------------
+    # Runner
+    # -----------------------
+    def run(self, interactive=True, force=(), ask=input):
+        steps = self.steps()
+        total = len(steps)
+        for number, step in enumerate(steps, 1):
+            self.out(f"[STEP {number}/{total}] {step.title}...")
+            if step.name not in force and step.done():
+                self.out("   ⏭ [SKIP] already done")
+                self.record(step.name, "skipped", 0.0)
+                continue
+            start = time.monotonic()
+            try:
+                extra = step.run() or {}
+            except (StepError, OSError) as e:
+                self.record(step.name, "failed", time.monotonic() - start, error=str(e))
+                self.out(f"   ❌ [FAIL] {e}")
+                self.out("   Run the installer again to resume from this step.")
+                return False
+            # A dry run did nothing, so it must not make a later run skip the step
+            self.record(step.name, "dry-run" if self.dry_run else "ok", time.monotonic() - start, **extra)
+            self.out(f"   ✅ [OK] {time.monotonic() - start:.1f}s")
+            if interactive and number < total:
+                if ask("Press Enter to continue (q to stop)... ").strip().lower() == "q":
+                    self.out("⏸ Stopped; the next run continues from here")
+                    return False
+        if not self.dry_run:
+            self.state["completed"] = int(time.time())
+            self.save_state()
+        return True
+
+    def record(self, name, status, seconds, **extra):
+        entry = dict(self.state["steps"].get(name, {}))
+        if status == "skipped" and entry.get("status") == "ok":
+            # Keep the duration of the run that did the work
+            entry["skipped_at"] = int(time.time())
+        else:
+            entry = {"status": status, "seconds": round(seconds, 2), "time": int(time.time())}
+            entry.update(extra)
+        self.state["steps"][name] = entry
+        if not self.dry_run:
+            self.save_state()
+
+def format_summary(state, names):
+    lines = [f"{'STEP':<13} {'STATUS':<8} {'SECONDS':>8}"]
+    for name in names:
+        entry = state["steps"].get(name)
+        if entry is None:
+            continue
+        lines.append(f"{name:<13} {entry['status']:<8} {entry['seconds']:>8.1f}"
+                     + (f"  {entry['error']}" if entry.get("error") else ""))
+    return lines
+
+# =======================
+# 🟢 CLI
+# =======================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Install PassWall2 on OpenWrt, resumable step by step")
+    parser.add_argument("--yes", action="store_true", help="non-interactive: no confirmation or pauses")
+    parser.add_argument("--force", default="", metavar="STEPS",
+                        help="comma-separated steps to run even if done (e.g. update,feeds)")
+    parser.add_argument("--state", default=STATE_FILE, help="state file (default: %(default)s)")
+    parser.add_argument("--dry-run", action="store_true", help="print commands, change nothing")
+    parser.add_argument("--status", action="store_true", help="show the last recorded run and exit")
+    args = parser.parse_args(argv)
+
+    installer = Installer(args.state, args.dry_run)
+    names = [step.name for step in installer.steps()]
+    if args.status:
+        if not installer.state["steps"]:
+            print("❌ No recorded run")
+            return 1
+        print("\n".join(format_summary(installer.state, names)))
+        return 0
+    force = {name for name in args.force.split(",") if name}
+    if force - set(names):
+        print(f"❌ Unknown step(s): {', '.join(sorted(force - set(names)))}; steps: {', '.join(names)}")
+        return 2
+    if not args.yes:
+        print("⚠️  WARNING: This will modify your router configuration")
+        if input("Type 'YES' to continue: ").strip() != "YES":
+            print("Installation cancelled.")
+            return 1
+    ok = installer.run(interactive=not args.yes, force=force)
+    print("\n".join(format_summary(installer.state, names)))
+    if ok:
+        print("✅ INSTALLATION COMPLETED SUCCESSFULLY! Configure it under Services → PassWall2")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
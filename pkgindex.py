@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+
+# Installed-state index for opkg and Python packages
+# Author: KOP3MA
+
+import os
+import re
+import sys
+import importlib.metadata
+
+# =======================
+# 🟢 Configuration
+# =======================
+OPKG_STATUS_FILE = "/usr/lib/opkg/status"
+_STALE = object()
+
+def normalize_name(name):
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+# =======================
+# 🟢 Parsers
+# =======================
+def parse_opkg_status(path=OPKG_STATUS_FILE):
+    packages = {}
+    if not os.path.exists(path):
+        return packages
+    name = version = status = None
+    with open(path, errors="replace") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line:
+                if name and status and status.split()[-1] == "installed":
+                    packages[name] = version
+                name = version = status = None
+            elif line.startswith("Package:"):
+                name = line.split(":", 1)[1].strip()
+            elif line.startswith("Version:"):
+                version = line.split(":", 1)[1].strip()
+            elif line.startswith("Status:"):
+                status = line.split(":", 1)[1].strip()
+    if name and status and status.split()[-1] == "installed":
+        packages[name] = version
+    return packages
+
+def scan_python_dists(paths=None):
+    packages = {}
+    for dist in importlib.metadata.distributions(path=paths if paths is not None else sys.path):
+        name = dist.metadata["Name"]
+        if name:
+            packages.setdefault(normalize_name(name), dist.version)
+    return packages
+
+# =======================
+# 🟢 Index
+# =======================
+class InstalledIndex:
+    def __init__(self, opkg_status=OPKG_STATUS_FILE, python_paths=None):
+        self.opkg_status = opkg_status
+        self.python_paths = python_paths
+        self._opkg = {}
+        self._python = {}
+        self._opkg_sig = _STALE
+        self._python_sig = _STALE
+
+    def _mtime(self, path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _python_dirs(self):
+        paths = self.python_paths if self.python_paths is not None else sys.path
+        return [p for p in paths if p and os.path.isdir(p)]
+
+    def _refresh(self):
+        sig = self._mtime(self.opkg_status)
+        if sig != self._opkg_sig:
+            self._opkg = parse_opkg_status(self.opkg_status)
+            self._opkg_sig = sig
+
+        dirs = self._python_dirs()
+        sig = tuple((p, self._mtime(p)) for p in dirs)
+        if sig != self._python_sig:
+            self._python = scan_python_dists(dirs)
+            self._python_sig = sig
+
+    def invalidate(self):
+        self._opkg_sig = _STALE
+        self._python_sig = _STALE
+
+    def opkg_version(self, name):
+        self._refresh()
+        return self._opkg.get(name)
+
+    def python_version(self, name):
+        self._refresh()
+        return self._python.get(normalize_name(name))
+
+    def opkg_installed(self, name, version=None):
+        found = self.opkg_version(name)
+        return found is not None and (version is None or found == version)
+
+    def python_installed(self, name, version=None):
+        found = self.python_version(name)
+        return found is not None and (version is None or found == version)
+
+    def missing_opkg(self, names):
+        return [n for n in names if not self.opkg_installed(n)]
+
+    def missing_python(self, names):
+        return [n for n in names if not self.python_installed(n)]
+
+_default_index = None
+
+def default_index():
+    global _default_index
+    if _default_index is None:
+        _default_index = InstalledIndex()
+    return _default_index
+
+# =======================
+# 🟢 CLI: pkgindex.py opkg|python NAME[==VERSION]...
+# =======================
+def main(argv):
+    if len(argv) < 2 or argv[0] not in ("opkg", "python"):
+        print("Usage: pkgindex.py opkg|python NAME[==VERSION]...")
+        return 2
+    index = default_index()
+    check = index.opkg_installed if argv[0] == "opkg" else index.python_installed
+    missing = 0
+    for spec in argv[1:]:
+        name, _, version = spec.partition("==")
+        if check(name, version or None):
+            print(f"✅ {spec}")
+        else:
+            print(f"❌ {spec}")
+            missing += 1
+    return 1 if missing else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
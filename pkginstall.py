@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+
+# Package install helpers shared by full+init.py and iInit-process.py
+# Author: KOP3MA
+
+import os
+import sys
+import json
+import time
+import hashlib
+import sysconfig
+import tempfile
+import subprocess
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+# =======================
+# 🟢 Configuration
+# =======================
+PIP_CMD = "pip3"
+PIP_NET_OPTS = ["--timeout", "120", "--retries", "10"]
+WHEEL_CACHE = os.environ.get("MINERPANEL_WHEEL_CACHE", "/root/.cache/minerpanel/wheels")
+WHEELHOUSE_DIR = os.environ.get("MINERPANEL_WHEELHOUSE", "/root/wheelhouse")
+MANIFEST_FILE = "manifest.json"
+LOCK_FILE = "requirements.lock"
+DOWNLOAD_WORKERS = 4
+CHUNK_SIZE = 64 * 1024
+
+# =======================
+# 🟢 opkg update in background
+# =======================
+def start_opkg_update():
+    try:
+        return subprocess.Popen(["opkg", "update"], stdout=subprocess.PIPE,
+                                stderr=subprocess.STDOUT, text=True)
+    except OSError:
+        return None
+
+def finish_opkg_update(proc):
+    if proc is None:
+        return False, "opkg not found"
+    output, _ = proc.communicate()
+    return proc.returncode == 0, (output or "").strip()
+
+# =======================
+# 🟢 Resolve the whole list in one pip pass
+# =======================
+def resolve_packages(packages, pip=PIP_CMD, ignore_installed=False):
+    fd, report_file = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    try:
+        cmd = [pip, "install", "--dry-run", "--quiet", "--report", report_file] + PIP_NET_OPTS
+        if ignore_installed:
+            cmd.append("--ignore-installed")
+        cmd += list(packages)
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip() or "pip resolve failed")
+        with open(report_file) as f:
+            report = json.load(f)
+    finally:
+        os.remove(report_file)
+
+    items = []
+    for entry in report.get("install", []):
+        info = entry.get("download_info", {})
+        url = info.get("url", "")
+        items.append({
+            "name": entry["metadata"]["name"],
+            "version": entry["metadata"]["version"],
+            "requested": entry.get("requested", False),
+            "url": url,
+            "filename": url.rsplit("/", 1)[-1].split("#", 1)[0],
+            "sha256": info.get("archive_info", {}).get("hashes", {}).get("sha256"),
+        })
+    return items
+
+# =======================
+# 🟢 Parallel wheel downloads into the persistent cache
+# =======================
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def fetch_wheel(item, cache_dir=WHEEL_CACHE):
+    target = os.path.join(cache_dir, item["filename"])
+    start = time.monotonic()
+    stat = {"name": item["name"], "version": item["version"], "file": item["filename"],
+            "bytes": 0, "cached": False, "ok": True, "error": ""}
+
+    if os.path.exists(target) and (not item["sha256"] or file_sha256(target) == item["sha256"]):
+        stat["cached"] = True
+        stat["bytes"] = os.path.getsize(target)
+        stat["seconds"] = time.monotonic() - start
+        return stat
+
+    part = target + ".part"
+    try:
+        digest = hashlib.sha256()
+        with urllib.request.urlopen(item["url"], timeout=120) as resp, open(part, "wb") as out:
+            for chunk in iter(lambda: resp.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+                out.write(chunk)
+                stat["bytes"] += len(chunk)
+        if item["sha256"] and digest.hexdigest() != item["sha256"]:
+            raise ValueError("sha256 mismatch")
+        os.replace(part, target)
+    except Exception as e:
+        stat["ok"] = False
+        stat["error"] = str(e)
+        if os.path.exists(part):
+            os.remove(part)
+    stat["seconds"] = time.monotonic() - start
+    return stat
+
+def fetch_wheels(items, cache_dir=WHEEL_CACHE, workers=DOWNLOAD_WORKERS):
+    os.makedirs(cache_dir, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda item: fetch_wheel(item, cache_dir), items))
+
+# =======================
+# 🟢 Batched install
+# =======================
+def batched_install(packages, pip=PIP_CMD, cache_dir=WHEEL_CACHE, workers=DOWNLOAD_WORKERS):
+    report = {"ok": False, "mode": "batched", "packages": [], "error": "",
+              "resolve_seconds": 0.0, "download_seconds": 0.0, "install_seconds": 0.0,
+              "opkg_ok": False, "opkg_output": ""}
+    total_start = time.monotonic()
+    opkg = start_opkg_update()
+
+    try:
+        start = time.monotonic()
+        try:
+            items = resolve_packages(packages, pip)
+        except (RuntimeError, OSError, ValueError, KeyError) as e:
+            # Old pip without --report: still one resolver pass, pip's own cache
+            report["mode"] = "single-pass"
+            report["error"] = str(e)
+            items = None
+        report["resolve_seconds"] = time.monotonic() - start
+
+        if items is None:
+            start = time.monotonic()
+            cmd = [pip, "install", "--cache-dir", os.path.dirname(cache_dir)] + PIP_NET_OPTS + list(packages)
+            result = subprocess.run(cmd, capture_output=True, text=True)
+            report["install_seconds"] = time.monotonic() - start
+            report["ok"] = result.returncode == 0
+            if not report["ok"]:
+                report["error"] = result.stderr.strip()
+            return report
+
+        start = time.monotonic()
+        report["packages"] = fetch_wheels(items, cache_dir, workers)
+        report["download_seconds"] = time.monotonic() - start
+
+        failed = [p["name"] for p in report["packages"] if not p["ok"]]
+        if failed:
+            report["error"] = "download failed: " + ", ".join(failed)
+            return report
+
+        if items:
+            start = time.monotonic()
+            cmd = [pip, "install", "--no-index", "--find-links", cache_dir] + list(packages)
+            result = subprocess.run(cmd, capture_output=True, text=True)
+            report["install_seconds"] = time.monotonic() - start
+            if result.returncode != 0:
+                report["error"] = result.stderr.strip()
+                return report
+        report["ok"] = True
+        return report
+    finally:
+        report["opkg_ok"], report["opkg_output"] = finish_opkg_update(opkg)
+        report["total_seconds"] = time.monotonic() - total_start
+
+# =======================
+# 🟢 Offline wheelhouse
+# =======================
+def build_wheelhouse(packages, dest=WHEELHOUSE_DIR, pip=PIP_CMD, workers=DOWNLOAD_WORKERS):
+    start = time.monotonic()
+    items = resolve_packages(packages, pip, ignore_installed=True)
+    stats = fetch_wheels(items, dest, workers)
+    failed = [s["name"] for s in stats if not s["ok"]]
+    if failed:
+        raise RuntimeError("download failed: " + ", ".join(failed))
+
+    for item in items:
+        if not item["sha256"]:
+            item["sha256"] = file_sha256(os.path.join(dest, item["filename"]))
+
+    manifest = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": "%d.%d" % sys.version_info[:2],
+        "platform": sysconfig.get_platform(),
+        "requested": list(packages),
+        "packages": [{k: item[k] for k in ("name", "version", "filename", "sha256", "requested")}
+                     for item in items],
+    }
+    with open(os.path.join(dest, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+    with open(os.path.join(dest, LOCK_FILE), "w") as f:
+        for item in sorted(items, key=lambda i: i["name"].lower()):
+            f.write(f"{item['name']}=={item['version']} --hash=sha256:{item['sha256']}\n")
+
+    return {"packages": stats, "seconds": time.monotonic() - start, "dest": dest}
+
+def load_manifest(wheelhouse=WHEELHOUSE_DIR):
+    path = os.path.join(wheelhouse, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def wheelhouse_mismatch(manifest):
+    # Reason the wheels cannot be installed on this interpreter, or "" when they fit.
+    # Pure-Python wheels (*-none-any.whl) install on any platform.
+    python = "%d.%d" % sys.version_info[:2]
+    if manifest.get("python") != python:
+        return (f"wheelhouse was built for Python {manifest.get('python')}, this router runs {python}; "
+                f"rebuild it with the router's Python version")
+    platform = sysconfig.get_platform()
+    native = [item["filename"] for item in manifest["packages"] if not item["filename"].endswith("-none-any.whl")]
+    if manifest.get("platform") not in (None, platform) and native:
+        return (f"wheelhouse was built for {manifest['platform']}, this router is {platform}; "
+                f"platform wheels would not install: {', '.join(native)}")
+    return ""
+
+def has_wheelhouse(wheelhouse=WHEELHOUSE_DIR):
+    return os.path.exists(os.path.join(wheelhouse, MANIFEST_FILE))
+
+def install_from_wheelhouse(wheelhouse=WHEELHOUSE_DIR, pip=PIP_CMD):
+    report = {"ok": False, "mode": "offline", "packages": [], "error": "",
+              "resolve_seconds": 0.0, "download_seconds": 0.0, "install_seconds": 0.0}
+    start = time.monotonic()
+    manifest = load_manifest(wheelhouse)
+    if manifest is None:
+        report["error"] = f"no {MANIFEST_FILE} in {wheelhouse}"
+        return report
+    report["error"] = wheelhouse_mismatch(manifest)
+    if report["error"]:
+        return report
+
+    for item in manifest["packages"]:
+        path = os.path.join(wheelhouse, item["filename"])
+        exists = os.path.exists(path)
+        report["packages"].append({"name": item["name"], "version": item["version"], "file": item["filename"],
+                                   "bytes": os.path.getsize(path) if exists else 0, "cached": exists,
+                                   "ok": exists, "error": "" if exists else "missing", "seconds": 0.0})
+    missing = [p["file"] for p in report["packages"] if not p["ok"]]
+    if missing:
+        report["error"] = "wheelhouse incomplete: " + ", ".join(missing)
+        return report
+
+    # The lock is fully pinned and hashed, so pip never resolves or touches an index
+    cmd = [pip, "install", "--no-index", "--no-deps", "--require-hashes",
+           "--find-links", wheelhouse, "-r", os.path.join(wheelhouse, LOCK_FILE)]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    report["install_seconds"] = time.monotonic() - start
+    report["total_seconds"] = report["install_seconds"]
+    report["ok"] = result.returncode == 0
+    if not report["ok"]:
+        report["error"] = result.stderr.strip()
+    return report
+
+def format_report(report):
+    lines = [f"{'package':<22}{'version':<12}{'size':>10}{'time':>9}  source"]
+    for p in report["packages"]:
+        source = "cache" if p["cached"] else ("download" if p["ok"] else "FAILED")
+        lines.append(f"{p['name']:<22}{p['version']:<12}{p['bytes'] / 1024:>8.0f}KB{p['seconds']:>8.2f}s  {source}")
+    lines.append(f"resolve {report['resolve_seconds']:.2f}s | download {report['download_seconds']:.2f}s"
+                 f" | install {report['install_seconds']:.2f}s | total {report.get('total_seconds', 0):.2f}s")
+    return lines
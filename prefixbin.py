@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+
+# Compact binary, mmap-able form of the prefix list
+# Author: KOP3MA
+#
+# File layout (the header is always little-endian; the body arrays use the
+# byte order named by the header flag):
+#   header   magic "IRPX", u16 version, u16 flags, u32 v4 count, u32 v6 count,
+#            u32 crc32 of the body, u32 reserved                    (24 bytes)
+#   body     v4 starts[count] u32, v4 ends[count] u32,
+#            v6 starts_hi[count] u64, starts_lo, ends_hi, ends_lo   (version 2)
+# Version 1 files (no v6 section) are still read.
+#
+# Readers mmap the file and bisect straight over the mapped pages, so start
+# up costs no parsing and every process shares one copy through the page cache.
+
+import os
+import sys
+import mmap
+import zlib
+import struct
+import argparse
+from array import array
+
+from prefixlist import PrefixTable, PrefixTable6, DualStackTable, DEFAULT_LIST
+
+# =======================
+# 🟢 Configuration
+# =======================
+MAGIC = b"IRPX"
+FORMAT_VERSION = 2
+READ_VERSIONS = (1, 2)
+HEADER = struct.Struct("<4sHHIIII")
+FLAG_BIG_ENDIAN = 0x1
+DEFAULT_OUTPUT = os.path.splitext(DEFAULT_LIST)[0] + ".bin"
+
+class PrefixFileError(Exception):
+    pass
+
+# =======================
+# 🟢 Compiler
+# =======================
+def compile_table(table, path, byteorder=sys.byteorder, table6=None):
+    columns = [array("I", table.starts), array("I", table.ends)]
+    if columns[0].itemsize != 4:
+        raise PrefixFileError("platform array('I') is not 32-bit")
+    table6 = table6 if table6 is not None else PrefixTable6()
+    columns += [array("Q", table6.starts_hi), array("Q", table6.starts_lo),
+                array("Q", table6.ends_hi), array("Q", table6.ends_lo)]
+    if columns[2].itemsize != 8:
+        raise PrefixFileError("platform array('Q') is not 64-bit")
+    if byteorder != sys.byteorder:
+        for column in columns:
+            column.byteswap()
+    body = b"".join(column.tobytes() for column in columns)
+    flags = FLAG_BIG_ENDIAN if byteorder == "big" else 0
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, flags, len(table), len(table6), zlib.crc32(body), 0)
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(header)
+        f.write(body)
+    # rename keeps the old inode alive for readers that still have it mapped
+    os.replace(tmp, path)
+    return len(header) + len(body)
+
+# =======================
+# 🟢 Reader
+# =======================
+def read_header(data):
+    if len(data) < HEADER.size:
+        raise PrefixFileError("file too short")
+    magic, version, flags, v4_count, v6_count, crc, _ = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise PrefixFileError("not a prefix file (bad magic)")
+    if version not in READ_VERSIONS:
+        raise PrefixFileError(f"unsupported format version {version}")
+    return {"version": version, "flags": flags, "v4": v4_count, "v6": v6_count, "crc32": crc,
+            "byteorder": "big" if flags & FLAG_BIG_ENDIAN else "little"}
+
+class MappedPrefixTable(PrefixTable):
+    def __init__(self, path, verify=True):
+        self.path = path
+        with open(path, "rb") as f:
+            # mmap refuses an empty file with ValueError
+            if os.fstat(f.fileno()).st_size < HEADER.size:
+                raise PrefixFileError("file too short")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.header = read_header(self._map)
+        count, count6 = self.header["v4"], self.header["v6"]
+        split = HEADER.size + count * 8
+        end = split + count6 * 32
+        if len(self._map) < end:
+            raise PrefixFileError("file truncated")
+        body = memoryview(self._map)[HEADER.size:end]
+        if verify and zlib.crc32(body) != self.header["crc32"]:
+            raise PrefixFileError("checksum mismatch")
+
+        words = self._column(body[:split - HEADER.size], "I")
+        self.starts = words[:count]
+        self.ends = words[count:]
+        wide = self._column(body[split - HEADER.size:], "Q")
+        self.v6 = PrefixTable6.from_arrays(*(wide[i * count6:(i + 1) * count6] for i in range(4)))
+
+    def _column(self, view, typecode):
+        if self.header["byteorder"] == sys.byteorder:
+            return view.cast(typecode)
+        # Foreign byte order: one private swapped copy instead of shared pages
+        words = array(typecode, view.tobytes())
+        words.byteswap()
+        return words
+
+    def close(self):
+        self.starts = self.ends = self.v6 = None
+        self._map.close()
+
+def load_table(path=DEFAULT_OUTPUT, source=DEFAULT_LIST):
+    # Prefer the compiled file while it is newer than the text list
+    try:
+        if os.path.getmtime(path) >= os.path.getmtime(source):
+            return MappedPrefixTable(path)
+    except (OSError, PrefixFileError):
+        pass
+    return PrefixTable.from_file(source)
+
+def load_dual_table(path=DEFAULT_OUTPUT, source=DEFAULT_LIST):
+    # Both families: the mapped file while it is fresh, the text list otherwise
+    table = load_table(path, source)
+    if isinstance(table, MappedPrefixTable):
+        return DualStackTable(table, table.v6)
+    return DualStackTable.from_file(source)
+
+# =======================
+# 🟢 CLI
+# =======================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile the prefix list into an mmap-able binary file")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("compile", help="compile a text list")
+    p.add_argument("--list", default=DEFAULT_LIST, help="prefix list (default: %(default)s)")
+    p.add_argument("-o", "--output", default=DEFAULT_OUTPUT, help="binary file (default: %(default)s)")
+    p.add_argument("--byteorder", choices=("little", "big"), default=sys.byteorder,
+                   help="target byte order, e.g. big for ath79 MIPS routers (default: %(default)s)")
+    p = sub.add_parser("info", help="show header of a compiled file")
+    p.add_argument("file", nargs="?", default=DEFAULT_OUTPUT)
+    p = sub.add_parser("lookup", help="check addresses against a compiled file")
+    p.add_argument("--file", default=DEFAULT_OUTPUT)
+    p.add_argument("addresses", nargs="+")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "compile":
+            table = DualStackTable.from_file(args.list)
+            size = compile_table(table.v4, args.output, args.byteorder, table.v6)
+            print(f"✅ {len(table.v4)} IPv4 + {len(table.v6)} IPv6 intervals -> {args.output} "
+                  f"({size} bytes, {args.byteorder}-endian)")
+        elif args.command == "info":
+            with open(args.file, "rb") as f:
+                header = read_header(f.read(HEADER.size))
+            for key, value in header.items():
+                print(f"{key}: {value}")
+        else:
+            mapped = MappedPrefixTable(args.file)
+            table = DualStackTable(mapped, mapped.v6)
+            for address in args.addresses:
+                print(f"{address}\t{'domestic' if address in table else 'foreign'}")
+    except (OSError, PrefixFileError, ValueError) as e:
+        print(f"❌ {e}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+
+# Interval-level diff and incremental refresh of the `iran` prefix list
+# Author: KOP3MA
+#
+# Two versions of the list are compared after aggregation, so reordering,
+# splitting a /16 into two /17s or adding a prefix already covered by another
+# produces no change. IPv4 and IPv6 are diffed separately. `refresh` fetches
+# the upstream list with a conditional request and pushes only the resulting
+# delta into the downstream stores.
+
+import os
+import sys
+import json
+import time
+import argparse
+import urllib.error
+import urllib.request
+
+from prefixlist import PrefixTable, PrefixTable6, DEFAULT_LIST, aggregate, parse_families, intervals_to_cidrs
+from downloader import USER_AGENT, HTTP_TIMEOUT
+
+# =======================
+# 🟢 Configuration
+# =======================
+PREFIX_URL = os.environ.get("MINERPANEL_PREFIX_URL")
+STORES = ("bin", "nft", "routes")
+DEFAULT_STORES = "bin"
+
+class RefreshError(Exception):
+    pass
+
+# =======================
+# 🟢 Interval diff
+# =======================
+def subtract(a, b):
+    # Parts of the merged intervals `a` not covered by the merged intervals `b`
+    result = []
+    j = 0
+    for start, end in a:
+        while j < len(b) and b[j][1] < start:
+            j += 1
+        k = j
+        while start <= end:
+            if k >= len(b) or b[k][0] > end:
+                result.append((start, end))
+                break
+            if b[k][0] > start:
+                result.append((start, b[k][0] - 1))
+            start = b[k][1] + 1
+            k += 1
+    return result
+
+def diff_intervals(old, new):
+    # Returns (added, removed) as sorted, merged [start, end] intervals
+    old, new = aggregate(old), aggregate(new)
+    return subtract(new, old), subtract(old, new)
+
+def read_families(path):
+    # {4: intervals, 6: intervals}
+    with open(path) as f:
+        families, _ = parse_families(f)
+    return families
+
+def diff_families(old, new):
+    # Returns (added, removed), each {4: intervals, 6: intervals}
+    added, removed = {}, {}
+    for version in (4, 6):
+        added[version], removed[version] = diff_intervals(old.get(version, []), new.get(version, []))
+    return added, removed
+
+def diff_lines(added, removed):
+    lines = []
+    for version in (4, 6):
+        lines += [f"- {net}" for net in intervals_to_cidrs(removed[version], version)]
+        lines += [f"+ {net}" for net in intervals_to_cidrs(added[version], version)]
+    return lines
+
+def range_count(families):
+    return sum(len(intervals) for intervals in families.values())
+
+def address_total(intervals):
+    return sum(end - start + 1 for start, end in intervals)
+
+# =======================
+# 🟢 Conditional fetch
+# =======================
+def state_path(path):
+    return path + ".http.json"
+
+def load_state(path):
+    try:
+        with open(state_path(path)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_state(path, state):
+    tmp = state_path(path) + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp, state_path(path))
+
+def fetch_if_changed(url, state, timeout=HTTP_TIMEOUT):
+    # Returns (text, new_state), text is None when the server answered 304
+    headers = {"User-Agent": USER_AGENT}
+    if state.get("url") == url:
+        if state.get("etag"):
+            headers["If-None-Match"] = state["etag"]
+        if state.get("last_modified"):
+            headers["If-Modified-Since"] = state["last_modified"]
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=timeout) as resp:
+            body = resp.read()
+            new_state = {"url": url, "etag": resp.headers.get("ETag"),
+                         "last_modified": resp.headers.get("Last-Modified")}
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return None, state
+        raise RefreshError(f"HTTP {e.code} from {url}")
+    except (urllib.error.URLError, OSError) as e:
+        raise RefreshError(f"cannot fetch {url}: {e}")
+    try:
+        return body.decode(), new_state
+    except UnicodeDecodeError:
+        raise RefreshError("upstream list is not text")
+
+def write_list(path, text):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+# =======================
+# 🟢 Downstream stores
+# =======================
+# Appliers get the old and new lists as {4: intervals, 6: intervals}
+def apply_bin(path, old, new, dry_run):
+    # The binary file is a flat sorted array per family; rewriting it is the delta
+    import prefixbin
+    output = os.path.splitext(path)[0] + ".bin"
+    if dry_run:
+        return f"would recompile {output}"
+    size = prefixbin.compile_table(PrefixTable(new[4]), output, table6=PrefixTable6(new[6]))
+    return f"recompiled {output} ({size} bytes)"
+
+def apply_nft(path, old, new, dry_run):
+    import nftset
+    if old[4] == new[4]:
+        return "no IPv4 change for the nft set"
+    wanted = set(nftset.cidr_intervals(PrefixTable(new[4])))
+    current = nftset.current_elements()
+    if current is None:
+        current = set(nftset.cidr_intervals(PrefixTable(old[4])))
+    script, added, removed = nftset.build_script(wanted, current)
+    if not added and not removed:
+        return "nft set already up to date"
+    if dry_run:
+        return f"would change nft set +{len(added)} -{len(removed)}"
+    ok, error, seconds = nftset.apply_script(script)
+    if not ok:
+        raise RefreshError(f"nft failed: {error}")
+    return f"nft set +{len(added)} -{len(removed)} in {seconds * 1000:.1f} ms"
+
+def apply_routes(path, old, new, dry_run):
+    import iproute_batch
+    if old[4] == new[4]:
+        return "no IPv4 change for the routes"
+    # Same table, gateway and device as the install, so the delta lands next to the existing routes
+    setup = iproute_batch.load_install_state()
+    if setup is None:
+        return "no routes installed by iproute_batch, skipped"
+    try:
+        installed = iproute_batch.installed_routes(setup["table"])
+        connected = iproute_batch.connected_routes()
+    except iproute_batch.RouteError as e:
+        raise RefreshError(f"cannot read routes: {e}")
+    wanted = iproute_batch.exclude_local([str(net) for net in PrefixTable(new[4]).cidrs()], connected)
+    batch, added, removed, _ = iproute_batch.build_batch(wanted, installed, setup["via"], setup["dev"],
+                                                         setup["table"])
+    if not batch:
+        return "routes already up to date"
+    if dry_run:
+        return f"would change routes +{len(added)} -{len(removed)}"
+    ok, error, seconds = iproute_batch.apply_batch(batch)
+    if not ok:
+        raise RefreshError(f"ip -batch failed: {error}")
+    return f"routes +{len(added)} -{len(removed)} in {seconds * 1000:.1f} ms"
+
+APPLIERS = {"bin": apply_bin, "nft": apply_nft, "routes": apply_routes}
+
+# =======================
+# 🟢 Refresh
+# =======================
+def refresh(url, path=DEFAULT_LIST, stores=(DEFAULT_STORES,), dry_run=False, force=False):
+    # Returns a report dict: changed, added, removed ({4: intervals, 6: intervals}), stores {name: message}, seconds
+    start = time.perf_counter()
+    state = {} if force else load_state(path)
+    text, new_state = fetch_if_changed(url, state)
+    report = {"changed": False, "added": {4: [], 6: []}, "removed": {4: [], 6: []}, "stores": {},
+              "not_modified": text is None}
+    if text is not None:
+        new, issues = parse_families(text.splitlines())
+        if not range_count(new):
+            raise RefreshError(f"upstream list has no usable prefixes ({len(issues)} bad lines), keeping current")
+        try:
+            old = read_families(path)
+        except OSError:
+            old = {4: [], 6: []}
+        old = {version: aggregate(intervals) for version, intervals in old.items()}
+        new = {version: aggregate(intervals) for version, intervals in new.items()}
+        added, removed = diff_families(old, new)
+        report.update(changed=bool(range_count(added) or range_count(removed)), added=added, removed=removed)
+        # Kernel stores first: if one fails the list and validators stay old and the next run retries
+        ordered = [s for s in stores if s != "bin"] if report["changed"] else []
+        for name in ordered:
+            report["stores"][name] = APPLIERS[name](path, old, new, dry_run)
+        if not dry_run:
+            write_list(path, text)
+        # The binary file goes last so it ends up newer than the list it was compiled from
+        if report["changed"] and "bin" in stores:
+            report["stores"]["bin"] = apply_bin(path, old, new, dry_run)
+        if not dry_run:
+            save_state(path, new_state)
+    report["seconds"] = time.perf_counter() - start
+    return report
+
+# =======================
+# 🟢 CLI
+# =======================
+def cmd_diff(args):
+    added, removed = diff_families(read_families(args.old), read_families(args.new))
+    text = "".join(line + "\n" for line in diff_lines(added, removed))
+    sys.stdout.write(text)
+    for version in (4, 6):
+        print(f"IPv{version}: {len(added[version])} ranges added ({address_total(added[version])} addresses), "
+              f"{len(removed[version])} ranges removed ({address_total(removed[version])} addresses)",
+              file=sys.stderr)
+    return 1 if range_count(added) or range_count(removed) else 0
+
+def cmd_refresh(args):
+    if not args.url:
+        print("❌ No upstream URL; pass --url or set MINERPANEL_PREFIX_URL")
+        return 2
+    stores = [s for s in args.apply.split(",") if s]
+    unknown = [s for s in stores if s not in APPLIERS]
+    if unknown:
+        print(f"❌ Unknown store(s): {', '.join(unknown)} (choose from {', '.join(STORES)})")
+        return 2
+    try:
+        report = refresh(args.url, args.list, stores, args.dry_run, args.force)
+    except (RefreshError, OSError, ValueError) as e:
+        print(f"❌ {e}")
+        return 1
+    if report["not_modified"]:
+        print(f"✅ Not modified upstream ({report['seconds'] * 1000:.0f} ms)")
+        return 0
+    if not report["changed"]:
+        print(f"✅ Upstream list covers the same ranges, nothing to apply ({report['seconds'] * 1000:.0f} ms)")
+        return 0
+    for line in diff_lines(report["added"], report["removed"]):
+        print(f"  {line}")
+    print(f"🔄 +{range_count(report['added'])} -{range_count(report['removed'])} ranges")
+    for name, message in report["stores"].items():
+        print(f"  {name}: {message}")
+    print(f"✅ {'Dry run' if args.dry_run else 'Refreshed'} in {report['seconds'] * 1000:.0f} ms")
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Diff prefix list versions and refresh them incrementally")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("diff", help="show ranges added/removed between two lists (exit 1 if they differ)")
+    p.add_argument("old")
+    p.add_argument("new")
+    p = sub.add_parser("refresh", help="fetch the upstream list if changed and apply only the delta")
+    p.add_argument("--url", default=PREFIX_URL, help="upstream list (default: $MINERPANEL_PREFIX_URL)")
+    p.add_argument("--list", default=DEFAULT_LIST, help="local list to update (default: %(default)s)")
+    p.add_argument("--apply", default=DEFAULT_STORES,
+                   help=f"comma-separated stores to update: {', '.join(STORES)} (default: %(default)s)")
+    p.add_argument("--force", action="store_true", help="ignore saved ETag/Last-Modified")
+    p.add_argument("--dry-run", action="store_true", help="fetch and diff, change nothing")
+    args = parser.parse_args(argv)
+    return {"diff": cmd_diff, "refresh": cmd_refresh}[args.command](args)
+
+if __name__ == "__main__":
+    sys.exit(main())
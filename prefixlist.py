@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+
+# Compiled CIDR engine for the `iran` prefix list
+# Author: KOP3MA
+#
+# The list is parsed once into merged [start, end] integer intervals held in
+# two sorted arrays; membership is a single bisect over the start array.
+# IPv6 entries go into a separate table whose 128-bit bounds are split into
+# high/low 64-bit arrays, so lookups stay on C-level bisects as well.
+
+import os
+import sys
+import time
+import random
+import socket
+import argparse
+import ipaddress
+from array import array
+from bisect import bisect_left, bisect_right
+
+# =======================
+# 🟢 Configuration
+# =======================
+DEFAULT_LIST = os.path.join(os.path.dirname(os.path.abspath(__file__)), "iran")
+MASK64 = (1 << 64) - 1
+
+# =======================
+# 🟢 Parsing and validation
+# =======================
+def special_purpose(net):
+    # Never reachable as a destination; private LAN ranges stay, they are listed on purpose for bypass
+    return net.is_loopback or net.is_multicast or net.is_reserved or net.is_unspecified
+
+def parse_families(lines, keep_special=False):
+    # Returns ({4: intervals, 6: intervals}, issues); issues are (line_no, text, reason) tuples
+    families = {4: [], 6: []}
+    issues = []
+    for line_no, raw in enumerate(lines, 1):
+        text = raw.split("#", 1)[0].strip()
+        if not text:
+            continue
+        try:
+            net = ipaddress.ip_network(text, strict=False)
+        except ValueError:
+            issues.append((line_no, text, "invalid"))
+            continue
+        if special_purpose(net) and not keep_special:
+            issues.append((line_no, text, "special-purpose range dropped"))
+            continue
+        if "/" in text and net.network_address != ipaddress.ip_address(text.split("/", 1)[0]):
+            issues.append((line_no, text, f"host bits set, using {net}"))
+        elif "/" not in text:
+            issues.append((line_no, text, f"bare address, using {net}"))
+        families[net.version].append((int(net.network_address), int(net.broadcast_address)))
+    return families, issues
+
+def parse_lines(lines, keep_special=False, version=4):
+    # Intervals of one family; entries of the other family are skipped silently
+    families, issues = parse_families(lines, keep_special)
+    return families[version], issues
+
+def aggregate(intervals):
+    # Merge overlapping and adjacent [start, end] intervals
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + 1:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+def intervals_to_cidrs(intervals, version=4):
+    address = ipaddress.IPv4Address if version == 4 else ipaddress.IPv6Address
+    cidrs = []
+    for start, end in intervals:
+        cidrs.extend(ipaddress.summarize_address_range(address(start), address(end)))
+    return cidrs
+
+# =======================
+# 🟢 Lookup table
+# =======================
+class PrefixTable:
+    version = 4
+
+    def __init__(self, intervals=()):
+        merged = aggregate(intervals)
+        self.starts = array("I", (s for s, _ in merged))
+        self.ends = array("I", (e for _, e in merged))
+
+    @classmethod
+    def from_file(cls, path=DEFAULT_LIST, keep_special=False):
+        with open(path) as f:
+            intervals, _ = parse_lines(f, keep_special)
+        return cls(intervals)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def contains_int(self, value):
+        i = bisect_right(self.starts, value) - 1
+        return i >= 0 and value <= self.ends[i]
+
+    def __contains__(self, address):
+        if isinstance(address, int):
+            return self.contains_int(address)
+        try:
+            packed = socket.inet_pton(socket.AF_INET, address)
+        except OSError:
+            raise ValueError(f"invalid IPv4 address {address!r}")
+        return self.contains_int(int.from_bytes(packed, "big"))
+
+    def intervals(self):
+        return list(zip(self.starts, self.ends))
+
+    def cidrs(self):
+        return intervals_to_cidrs(self.intervals())
+
+    def address_count(self):
+        return sum(e - s + 1 for s, e in zip(self.starts, self.ends))
+
+class PrefixTable6:
+    # 128-bit bounds stored as (high, low) u64 pairs in four parallel arrays
+    version = 6
+
+    def __init__(self, intervals=()):
+        merged = aggregate(intervals)
+        self.starts_hi = array("Q", (s >> 64 for s, _ in merged))
+        self.starts_lo = array("Q", (s & MASK64 for s, _ in merged))
+        self.ends_hi = array("Q", (e >> 64 for _, e in merged))
+        self.ends_lo = array("Q", (e & MASK64 for _, e in merged))
+
+    @classmethod
+    def from_arrays(cls, starts_hi, starts_lo, ends_hi, ends_lo):
+        table = cls.__new__(cls)
+        table.starts_hi, table.starts_lo = starts_hi, starts_lo
+        table.ends_hi, table.ends_lo = ends_hi, ends_lo
+        return table
+
+    @classmethod
+    def from_file(cls, path=DEFAULT_LIST, keep_special=False):
+        with open(path) as f:
+            intervals, _ = parse_lines(f, keep_special, version=6)
+        return cls(intervals)
+
+    def __len__(self):
+        return len(self.starts_hi)
+
+    def contains_int(self, value):
+        high, low = value >> 64, value & MASK64
+        # Narrow to the run of intervals sharing the high word, then bisect the low word inside it
+        j = bisect_right(self.starts_hi, high)
+        k = bisect_left(self.starts_hi, high, 0, j)
+        i = bisect_right(self.starts_lo, low, k, j) - 1
+        if i < 0:
+            return False
+        end_high = self.ends_hi[i]
+        return end_high > high or (end_high == high and self.ends_lo[i] >= low)
+
+    def __contains__(self, address):
+        if isinstance(address, int):
+            return self.contains_int(address)
+        try:
+            packed = socket.inet_pton(socket.AF_INET6, address)
+        except OSError:
+            raise ValueError(f"invalid IPv6 address {address!r}")
+        return self.contains_int(int.from_bytes(packed, "big"))
+
+    def intervals(self):
+        return [(sh << 64 | sl, eh << 64 | el)
+                for sh, sl, eh, el in zip(self.starts_hi, self.starts_lo, self.ends_hi, self.ends_lo)]
+
+    def cidrs(self):
+        return intervals_to_cidrs(self.intervals(), version=6)
+
+    def address_count(self):
+        return sum(e - s + 1 for s, e in self.intervals())
+
+class DualStackTable:
+    # One table per family; string lookups pick the family from the address text
+    def __init__(self, v4=None, v6=None):
+        self.v4 = v4 if v4 is not None else PrefixTable()
+        self.v6 = v6 if v6 is not None else PrefixTable6()
+
+    @classmethod
+    def from_file(cls, path=DEFAULT_LIST, keep_special=False):
+        with open(path) as f:
+            families, _ = parse_families(f, keep_special)
+        return cls(PrefixTable(families[4]), PrefixTable6(families[6]))
+
+    def __len__(self):
+        return len(self.v4) + len(self.v6)
+
+    def __contains__(self, address):
+        return address in (self.v6 if ":" in address else self.v4)
+
+    def cidrs(self):
+        return self.v4.cidrs() + self.v6.cidrs()
+
+# =======================
+# 🟢 CLI
+# =======================
+def load(path, keep_special=False):
+    with open(path) as f:
+        lines = f.readlines()
+    families, issues = parse_families(lines, keep_special)
+    return lines, families, issues
+
+def cmd_stats(args):
+    start = time.perf_counter()
+    lines, families, issues = load(args.file, args.keep_special)
+    table = DualStackTable(PrefixTable(families[4]), PrefixTable6(families[6]))
+    cidrs = {4: table.v4.cidrs(), 6: table.v6.cidrs()}
+    elapsed = time.perf_counter() - start
+    entries = sum(1 for l in lines if l.split("#", 1)[0].strip())
+    total = len(cidrs[4]) + len(cidrs[6])
+    for line_no, text, reason in issues:
+        print(f"  line {line_no}: {text} -> {reason}")
+    print(f"📄 Input entries:      {entries}")
+    print(f"✅ Valid prefixes:     {len(families[4])} IPv4, {len(families[6])} IPv6")
+    print(f"🔗 Merged intervals:   {len(table.v4)} IPv4, {len(table.v6)} IPv6")
+    shrink = 100 * (1 - total / entries) if entries else 0.0
+    print(f"📦 Minimal CIDR set:   {len(cidrs[4])} IPv4, {len(cidrs[6])} IPv6 ({shrink:.1f}% smaller)")
+    print(f"🌐 Addresses covered:  {table.v4.address_count()} IPv4, {len(table.v6) and table.v6.address_count()} IPv6")
+    print(f"⏱ Compiled in {elapsed * 1000:.1f} ms")
+    return 0
+
+def cmd_aggregate(args):
+    _, families, _ = load(args.file, args.keep_special)
+    nets = intervals_to_cidrs(aggregate(families[4])) + intervals_to_cidrs(aggregate(families[6]), version=6)
+    text = "".join(f"{net}\n" for net in nets)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text)
+    return 0
+
+def cmd_lookup(args):
+    table = DualStackTable.from_file(args.file, args.keep_special)
+    invalid = 0
+    for address in args.addresses:
+        try:
+            found = address in table
+        except ValueError:
+            print(f"{address}\tinvalid")
+            invalid += 1
+            continue
+        print(f"{address}\t{'domestic' if found else 'foreign'}")
+    return 1 if invalid else 0
+
+def benchmark(table, count):
+    # Per-family lookup rate on random addresses: (family, intervals, lookups/s, int lookups/s)
+    rows = []
+    samples = {4: [random.getrandbits(32) for _ in range(count)],
+               6: [(0x2 << 124) | random.getrandbits(124) for _ in range(count)]}
+    texts = {4: [str(ipaddress.IPv4Address(v)) for v in samples[4]],
+             6: [str(ipaddress.IPv6Address(v)) for v in samples[6]]}
+    for version, family in ((4, table.v4), (6, table.v6)):
+        contains = family.contains_int
+        start = time.perf_counter()
+        for value in samples[version]:
+            contains(value)
+        int_rate = count / (time.perf_counter() - start)
+        start = time.perf_counter()
+        for text in texts[version]:
+            text in table
+        rows.append((f"IPv{version}", len(family), count / (time.perf_counter() - start), int_rate))
+    return rows
+
+def cmd_bench(args):
+    table = DualStackTable.from_file(args.file, args.keep_special)
+    if not len(table.v6):
+        # The list has no IPv6 yet; bench against a synthetic table of comparable size
+        starts = [(0x2 << 124) | (random.getrandbits(60) << 64) for _ in range(max(len(table.v4), 1))]
+        table.v6 = PrefixTable6((s, s | MASK64) for s in starts)
+        print(f"ℹ️ No IPv6 entries in {args.file}, using {len(table.v6)} random /64s")
+    rows = benchmark(table, args.count)
+    for family, size, rate, int_rate in rows:
+        print(f"{family:<6}{size:>8} intervals {rate:>14,.0f} lookups/s {int_rate:>14,.0f} int lookups/s")
+    print(f"IPv6/IPv4 cost: {rows[0][2] / rows[1][2]:.2f}x (text), {rows[0][3] / rows[1][3]:.2f}x (int)")
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parse, aggregate and query the iran prefix list")
+    parser.add_argument("--file", default=DEFAULT_LIST, help="prefix list (default: %(default)s)")
+    parser.add_argument("--keep-special", action="store_true", help="keep loopback/multicast/reserved ranges")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="report how much the list shrinks")
+    p = sub.add_parser("aggregate", help="print the minimal CIDR set")
+    p.add_argument("-o", "--output", help="write to file instead of stdout")
+    p = sub.add_parser("lookup", help="check addresses against the list")
+    p.add_argument("addresses", nargs="+")
+    p = sub.add_parser("bench", help="compare IPv4 and IPv6 lookup speed")
+    p.add_argument("-n", "--count", type=int, default=200000, help="lookups per family (default: %(default)s)")
+    args = parser.parse_args(argv)
+    commands = {"stats": cmd_stats, "aggregate": cmd_aggregate, "lookup": cmd_lookup, "bench": cmd_bench}
+    return commands[args.command](args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+
+# In-process /proc scanner, replacing `pgrep -af` in the manager menus
+# Author: KOP3MA
+#
+# One sweep lists /proc and reads each /proc/<pid>/stat once. Fields that
+# never change for a process (cmdline, start time) are cached per
+# (pid, start time), so a reused pid is never mixed up with the old one and
+# repeated refreshes only re-read stat. The root is a parameter so the
+# scanner can run against a fake /proc tree.
+
+import os
+import re
+import sys
+import time
+import signal
+import argparse
+from collections import namedtuple
+
+# =======================
+# 🟢 Configuration
+# =======================
+PROC_ROOT = "/proc"
+REFRESH_INTERVAL = 1.0
+
+Process = namedtuple("Process", "pid ppid name state cmdline rss utime stime threads start_time cpu_percent")
+
+def _sysconf(name, default):
+    try:
+        return os.sysconf(name)
+    except (ValueError, OSError, AttributeError):
+        return default
+
+CLK_TCK = _sysconf("SC_CLK_TCK", 100)
+PAGE_SIZE = _sysconf("SC_PAGE_SIZE", 4096)
+
+# =======================
+# 🟢 Parsing
+# =======================
+def parse_stat(text):
+    # comm may contain spaces and ')' so split on the last one
+    head, _, tail = text.rpartition(")")
+    pid_text, _, name = head.partition(" (")
+    fields = tail.split()
+    # fields[0] is field 3 (state) of proc(5)
+    return {"pid": int(pid_text), "name": name, "state": fields[0], "ppid": int(fields[1]),
+            "utime": int(fields[11]), "stime": int(fields[12]), "threads": int(fields[17]),
+            "starttime": int(fields[19]), "rss_pages": int(fields[21])}
+
+def _read(path, mode="r"):
+    with open(path, mode) as f:
+        return f.read()
+
+# =======================
+# 🟢 Scanner
+# =======================
+class ProcScanner:
+    def __init__(self, root=PROC_ROOT, refresh_interval=REFRESH_INTERVAL):
+        self.root = root
+        self.refresh_interval = refresh_interval
+        self._static = {}      # (pid, start time) -> cmdline
+        self._ticks = {}       # (pid, start time) -> (utime + stime, sample time)
+        self._snapshot = []
+        self._scanned_at = None
+        self._boot_time = None
+
+    def boot_time(self):
+        if self._boot_time is None:
+            self._boot_time = 0.0
+            try:
+                for line in _read(os.path.join(self.root, "stat")).splitlines():
+                    if line.startswith("btime "):
+                        self._boot_time = float(line.split()[1])
+                        break
+            except OSError:
+                pass
+        return self._boot_time
+
+    def _cmdline(self, pid, name):
+        try:
+            raw = _read(os.path.join(self.root, str(pid), "cmdline"), "rb")
+        except OSError:
+            raw = b""
+        # Kernel threads have an empty cmdline; show them like ps does
+        return raw.rstrip(b"\0").replace(b"\0", b" ").decode(errors="replace") or f"[{name}]"
+
+    def scan(self, force=False):
+        # Returns a list of Process records; reuses the last sweep within refresh_interval
+        now = time.monotonic()
+        if not force and self._scanned_at is not None and now - self._scanned_at < self.refresh_interval:
+            return self._snapshot
+        try:
+            entries = os.listdir(self.root)
+        except OSError:
+            return []
+        processes = []
+        alive = set()
+        for entry in entries:
+            if entry.isdigit():
+                process = self.read(entry, now)
+                if process is not None:
+                    alive.add((process.pid, process.start_time))
+                    processes.append(process)
+        for key in list(self._static):
+            if key not in alive:
+                del self._static[key]
+                self._ticks.pop(key, None)
+        self._snapshot = processes
+        self._scanned_at = now
+        return processes
+
+    def read(self, pid, now=None):
+        # One process by pid, or None when it has exited; no /proc listing involved
+        now = time.monotonic() if now is None else now
+        try:
+            stat = parse_stat(_read(os.path.join(self.root, str(pid), "stat")))
+        except (OSError, ValueError, IndexError):
+            # Exited between listdir and read, or not a process directory
+            return None
+        start_time = self.boot_time() + stat["starttime"] / CLK_TCK
+        key = (stat["pid"], start_time)
+        cmdline = self._static.get(key)
+        if cmdline is None:
+            cmdline = self._static[key] = self._cmdline(stat["pid"], stat["name"])
+        ticks = stat["utime"] + stat["stime"]
+        previous = self._ticks.get(key)
+        cpu = 0.0
+        if previous and now > previous[1]:
+            cpu = 100.0 * (ticks - previous[0]) / CLK_TCK / (now - previous[1])
+        self._ticks[key] = (ticks, now)
+        return Process(stat["pid"], stat["ppid"], stat["name"], stat["state"], cmdline,
+                       stat["rss_pages"] * PAGE_SIZE, stat["utime"], stat["stime"],
+                       stat["threads"], start_time, cpu)
+
+    def find(self, pattern, sort="rss", force=False):
+        # Like `pgrep -f`: regex search over the full command line, this process excluded
+        regex = re.compile(pattern)
+        own = os.getpid()
+        found = [p for p in self.scan(force) if p.pid != own and regex.search(p.cmdline)]
+        return sort_processes(found, sort)
+
+def sort_processes(processes, key="rss"):
+    if key == "cpu":
+        return sorted(processes, key=lambda p: (p.cpu_percent, p.utime + p.stime), reverse=True)
+    if key == "pid":
+        return sorted(processes, key=lambda p: p.pid)
+    return sorted(processes, key=lambda p: p.rss, reverse=True)
+
+def find_processes(pattern, sort="rss", root=PROC_ROOT):
+    return ProcScanner(root).find(pattern, sort)
+
+# =======================
+# 🟢 Display and signals
+# =======================
+def human_size(size):
+    for unit in ("B", "K", "M", "G"):
+        if size < 1024 or unit == "G":
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
+
+def human_age(seconds):
+    seconds = int(max(seconds, 0))
+    if seconds >= 86400:
+        return f"{seconds // 86400}d{seconds % 86400 // 3600}h"
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60}m"
+    return f"{seconds // 60}m{seconds % 60}s"
+
+def format_table(processes, width=60):
+    lines = [f"{'PID':>6} {'PPID':>6} {'RSS':>7} {'CPU s':>7} {'UP':>7}  COMMAND"]
+    now = time.time()
+    for p in processes:
+        cpu_seconds = (p.utime + p.stime) / CLK_TCK
+        command = p.cmdline if len(p.cmdline) <= width else p.cmdline[:width - 1] + "…"
+        lines.append(f"{p.pid:>6} {p.ppid:>6} {human_size(p.rss):>7} {cpu_seconds:>7.1f} "
+                     f"{human_age(now - p.start_time):>7}  {command}")
+    return lines
+
+def signal_processes(processes, sig=signal.SIGKILL):
+    # Returns the pids that were signalled; already-exited ones are skipped
+    sent = []
+    for p in processes:
+        try:
+            os.kill(p.pid, sig)
+            sent.append(p.pid)
+        except ProcessLookupError:
+            pass
+    return sent
+
+# =======================
+# 🟢 CLI
+# =======================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List processes from /proc without forking pgrep/ps")
+    parser.add_argument("--match", default="", help="regex over the full command line (default: all)")
+    parser.add_argument("--sort", choices=("rss", "cpu", "pid"), default="rss")
+    parser.add_argument("--root", default=PROC_ROOT, help="proc mount, e.g. a fake tree (default: %(default)s)")
+    parser.add_argument("--pids", action="store_true", help="print matching pids only, one per line")
+    parser.add_argument("--kill", metavar="SIGNAL", nargs="?", const="KILL",
+                        help="signal every match (default signal: KILL); exit 1 if none matched")
+    args = parser.parse_args(argv)
+
+    processes = find_processes(args.match, args.sort, args.root)
+    if args.kill:
+        name = args.kill.upper()
+        sig = getattr(signal, name if name.startswith("SIG") else "SIG" + name)
+        sent = signal_processes(processes, sig)
+        print(" ".join(str(pid) for pid in sent))
+        return 0 if sent else 1
+    if args.pids:
+        for p in processes:
+            print(p.pid)
+    else:
+        print("\n".join(format_table(processes)))
+    return 0 if processes else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
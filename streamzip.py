@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+
+# Streaming download-and-extract for project archives
+# Author: KOP3MA
+#
+# Reads the zip local file headers straight off the HTTP response and writes
+# each member as soon as its data arrives, so the archive itself never lands
+# on flash or tmpfs.
+
+import os
+import sys
+import time
+import zlib
+import struct
+import urllib.request
+
+# =======================
+# 🟢 Configuration
+# =======================
+CHUNK_SIZE = 64 * 1024
+HTTP_TIMEOUT = 60
+USER_AGENT = "minerpanel/3.0"
+
+LOCAL_HEADER_SIG = 0x04034b50
+CENTRAL_DIR_SIG = 0x02014b50
+END_OF_DIR_SIG = 0x06054b50
+DATA_DESCRIPTOR_SIG = 0x08074b50
+ZIP64_EXTRA_ID = 0x0001
+
+FLAG_ENCRYPTED = 0x1
+FLAG_DATA_DESCRIPTOR = 0x8
+
+METHOD_STORED = 0
+METHOD_DEFLATED = 8
+
+class StreamZipError(Exception):
+    pass
+
+def drive_download_url(file_id):
+    return f"https://drive.usercontent.google.com/download?id={file_id}&export=download&confirm=t"
+
+# =======================
+# 🟢 Buffered reader with push-back
+# =======================
+class ByteStream:
+    def __init__(self, raw, on_bytes=None):
+        self.raw = raw
+        self.buffer = b""
+        self.on_bytes = on_bytes
+        self.total = 0
+
+    def _fill(self):
+        chunk = self.raw.read(CHUNK_SIZE)
+        if chunk:
+            self.total += len(chunk)
+            if self.on_bytes:
+                self.on_bytes(self.total)
+        return chunk
+
+    def read(self, size=CHUNK_SIZE):
+        if not self.buffer:
+            self.buffer = self._fill()
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+    def read_exact(self, size):
+        parts = []
+        while size > 0:
+            data = self.read(min(size, CHUNK_SIZE))
+            if not data:
+                raise StreamZipError("unexpected end of archive")
+            parts.append(data)
+            size -= len(data)
+        return b"".join(parts)
+
+    def unread(self, data):
+        self.buffer = data + self.buffer
+
+# =======================
+# 🟢 Member handling
+# =======================
+def safe_member_path(dest, name):
+    parts = [p for p in name.replace("\\", "/").split("/") if p not in ("", ".", "..")]
+    if not parts:
+        return None
+    path = os.path.join(dest, *parts)
+    if not os.path.abspath(path).startswith(os.path.abspath(dest) + os.sep):
+        raise StreamZipError(f"unsafe member path: {name}")
+    return path
+
+def parse_zip64_sizes(extra, csize, usize):
+    pos = 0
+    while pos + 4 <= len(extra):
+        header_id, length = struct.unpack_from("<HH", extra, pos)
+        if header_id == ZIP64_EXTRA_ID:
+            fields = extra[pos + 4:pos + 4 + length]
+            offset = 0
+            if usize == 0xFFFFFFFF:
+                usize = struct.unpack_from("<Q", fields, offset)[0]
+                offset += 8
+            if csize == 0xFFFFFFFF:
+                csize = struct.unpack_from("<Q", fields, offset)[0]
+            return csize, usize, True
+        pos += 4 + length
+    return csize, usize, False
+
+def read_member_data(stream, out, method, csize, descriptor):
+    crc = 0
+    written = 0
+    if method == METHOD_DEFLATED:
+        inflater = zlib.decompressobj(-15)
+        while not inflater.eof:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                raise StreamZipError("truncated deflate stream")
+            data = inflater.decompress(chunk)
+            if data:
+                crc = zlib.crc32(data, crc)
+                written += len(data)
+                if out:
+                    out.write(data)
+        if inflater.unused_data:
+            stream.unread(inflater.unused_data)
+    elif method == METHOD_STORED:
+        if descriptor and csize == 0:
+            raise StreamZipError("stored member with data descriptor cannot be streamed")
+        remaining = csize
+        while remaining > 0:
+            chunk = stream.read(min(remaining, CHUNK_SIZE))
+            if not chunk:
+                raise StreamZipError("truncated stored member")
+            remaining -= len(chunk)
+            crc = zlib.crc32(chunk, crc)
+            written += len(chunk)
+            if out:
+                out.write(chunk)
+    else:
+        raise StreamZipError(f"unsupported compression method {method}")
+    return crc, written
+
+def read_data_descriptor(stream, zip64):
+    head = stream.read_exact(4)
+    if struct.unpack("<I", head)[0] != DATA_DESCRIPTOR_SIG:
+        stream.unread(head)
+    crc = struct.unpack("<I", stream.read_exact(4))[0]
+    stream.read_exact(16 if zip64 else 8)
+    return crc
+
+# =======================
+# 🟢 Extract a zip from any readable stream
+# =======================
+def extract_stream(raw, dest, on_member=None, on_bytes=None, delta=None):
+    stream = ByteStream(raw, on_bytes)
+    os.makedirs(dest, exist_ok=True)
+    stats = {"files": 0, "dirs": 0, "bytes": 0, "peak_member": 0}
+
+    while True:
+        head = stream.read(4)
+        if not head:
+            break
+        if len(head) < 4:
+            head += stream.read_exact(4 - len(head))
+        sig = struct.unpack("<I", head)[0]
+        if sig in (CENTRAL_DIR_SIG, END_OF_DIR_SIG):
+            break
+        if sig != LOCAL_HEADER_SIG:
+            raise StreamZipError("not a zip archive (bad local header)")
+
+        (_, flags, method, _, _, crc, csize, usize,
+         name_len, extra_len) = struct.unpack("<HHHHHIIIHH", stream.read_exact(26))
+        name = stream.read_exact(name_len).decode("utf-8" if flags & 0x800 else "cp437")
+        extra = stream.read_exact(extra_len)
+        csize, usize, zip64 = parse_zip64_sizes(extra, csize, usize)
+        descriptor = bool(flags & FLAG_DATA_DESCRIPTOR)
+        if flags & FLAG_ENCRYPTED:
+            raise StreamZipError(f"encrypted member not supported: {name}")
+
+        path = safe_member_path(dest, name)
+        if path is None or name.endswith("/"):
+            # A directory has no data; stored with a data descriptor its header sizes
+            # are 0, which for a directory is simply the truth
+            if not (name.endswith("/") and method == METHOD_STORED and descriptor):
+                read_member_data(stream, None, method, csize, descriptor)
+            if path:
+                os.makedirs(path, exist_ok=True)
+                stats["dirs"] += 1
+            if descriptor:
+                read_data_descriptor(stream, zip64)
+            continue
+
+        if delta and not delta.should_write(name, None if descriptor else crc, usize):
+            read_member_data(stream, None, method, csize, descriptor)
+            continue
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        part = path + ".part"
+        try:
+            with open(part, "wb") as out:
+                actual_crc, written = read_member_data(stream, out, method, csize, descriptor)
+            if descriptor:
+                crc = read_data_descriptor(stream, zip64)
+            if actual_crc != crc:
+                raise StreamZipError(f"CRC mismatch in {name}")
+            os.replace(part, path)
+        except BaseException:
+            if os.path.exists(part):
+                os.remove(part)
+            raise
+
+        if delta:
+            delta.written(name, crc, written)
+        stats["files"] += 1
+        stats["bytes"] += written
+        stats["peak_member"] = max(stats["peak_member"], written)
+        if on_member:
+            on_member(name, written)
+
+    stats["downloaded"] = stream.total
+    return stats
+
+# =======================
+# 🟢 HTTP download + extract
+# =======================
+def stream_extract_url(url, dest, on_member=None, on_bytes=None, timeout=HTTP_TIMEOUT, delta=None):
+    request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+    start = time.monotonic()
+    with urllib.request.urlopen(request, timeout=timeout) as resp:
+        if resp.headers.get_content_type() == "text/html":
+            raise StreamZipError("server returned an HTML page instead of the archive")
+        stats = extract_stream(resp, dest, on_member, on_bytes, delta)
+    stats["seconds"] = time.monotonic() - start
+    return stats
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: streamzip.py URL DEST")
+        sys.exit(2)
+    result = stream_extract_url(sys.argv[1], sys.argv[2],
+                                on_member=lambda name, size: print(f"  {name} ({size} bytes)"))
+    print(f"✅ Extracted {result['files']} files, {result['bytes']} bytes in {result['seconds']:.2f}s")
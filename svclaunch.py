@@ -0,0 +1,588 @@
+#!/usr/bin/env python3
+
+# Graceful-restart launcher for the minerpanel service
+# Author: KOP3MA
+#
+# procd runs `svclaunch.py run app.py`. The launcher (master) starts app.py in
+# a child that binds its TCP sockets with SO_REUSEPORT and drains on SIGTERM.
+# On SIGHUP the master:
+#   1. starts a second child, which binds the same port next to the old one
+#   2. waits until the new child owns a listening socket on every port the
+#      old child listens on, and is still alive
+#   3. sends SIGTERM to the old child: it closes its listener, lets in-flight
+#      requests finish (up to the drain timeout) and exits
+# Meanwhile a prober sends HTTP requests to the port and the longest run of
+# failures is reported as the downtime window. With several workers (one
+# master per procd instance, all on the same port) `restart` rolls through
+# the masters one at a time.
+#
+# The master also supervises the app. Every exit is recorded with its code,
+# uptime and time, and the app is started again after an exponential backoff
+# with jitter. Many exits in a short window count as a crash loop: the master
+# then retries every BACKOFF_MAX instead of giving up silently like procd's
+# respawn threshold. The state, including the time spent serving vs
+# restarting, goes to one JSON file per worker.
+#
+# With --log the app's stdout/stderr is piped through svclog's capped,
+# rotating log instead of being left to procd.
+
+import os
+import re
+import sys
+import glob
+import json
+import time
+import random
+import runpy
+import signal
+import socket
+import weakref
+import argparse
+import threading
+import subprocess
+
+from procscan import ProcScanner, signal_processes, human_age
+from svclog import LogPipeline, TOTAL_BUDGET, split_budget, worker_log
+
+# =======================
+# 🟢 Configuration
+# =======================
+DRAIN_TIMEOUT = 10.0
+READY_TIMEOUT = 30.0
+SETTLE_TIME = 0.5
+PROBE_INTERVAL = 0.01
+PROBE_TIMEOUT = 0.5
+STATUS_FILE = "/tmp/minerpanel-restart.json"
+SUPERVISOR_FILE = "/tmp/minerpanel-supervisor-{worker}.json"
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 300.0
+STABLE_UPTIME = 60.0       # an app that ran this long resets the backoff
+CRASH_LOOP_EXITS = 5
+CRASH_LOOP_WINDOW = 120.0
+HISTORY_LIMIT = 20
+SAVE_EVERY = 10.0
+
+# =======================
+# 🟢 Child side: reuseport bind and drain on SIGTERM
+# =======================
+_listeners = []
+_connections = weakref.WeakSet()
+_draining = []
+
+def _install_socket_hooks():
+    original_bind = socket.socket.bind
+    original_listen = socket.socket.listen
+    original_accept = socket.socket.accept
+
+    def bind(self, address):
+        if self.type == socket.SOCK_STREAM and self.family in (socket.AF_INET, socket.AF_INET6):
+            self.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        return original_bind(self, address)
+
+    def listen(self, *args):
+        _listeners.append(self)
+        return original_listen(self, *args)
+
+    def accept(self):
+        conn, address = original_accept(self)
+        _connections.add(conn)
+        return conn, address
+
+    socket.socket.bind = bind
+    socket.socket.listen = listen
+    socket.socket.accept = accept
+
+def _drain(timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if not any(conn.fileno() != -1 for conn in list(_connections)):
+            break
+        time.sleep(0.05)
+    sys.stdout.flush()
+    os._exit(0)
+
+def _on_sigterm(timeout):
+    def handler(signum, frame):
+        if _draining:
+            return
+        # Swap each listening fd for a pipe that never becomes readable: the kernel
+        # listener closes (new connections go to the other process) while the app's
+        # accept loop keeps waiting harmlessly and in-flight requests run to the end.
+        read_end, write_end = os.pipe()
+        _draining.append(write_end)
+        for listener in _listeners:
+            if listener.fileno() != -1:
+                os.dup2(read_end, listener.fileno())
+        threading.Thread(target=_drain, args=(timeout,), daemon=True).start()
+    return handler
+
+def run_child(app, args, drain_timeout):
+    _install_socket_hooks()
+    signal.signal(signal.SIGTERM, _on_sigterm(drain_timeout))
+    app = os.path.abspath(app)
+    sys.argv = [app] + list(args)
+    sys.path.insert(0, os.path.dirname(app))
+    runpy.run_path(app, run_name="__main__")
+
+# =======================
+# 🟢 Listening sockets from /proc
+# =======================
+def _decode_address(text):
+    host, port = text.split(":")
+    raw = bytes.fromhex(host)
+    if len(raw) == 4:
+        return socket.inet_ntop(socket.AF_INET, raw[::-1]), int(port, 16)
+    # tcp6: four little-endian 32-bit words
+    words = b"".join(raw[i:i + 4][::-1] for i in range(0, 16, 4))
+    return socket.inet_ntop(socket.AF_INET6, words), int(port, 16)
+
+def listening_ports(pid, proc_root="/proc"):
+    # Set of (ip, port) the process listens on, from its fds and /proc/net/tcp{,6}
+    inodes = set()
+    fd_dir = os.path.join(proc_root, str(pid), "fd")
+    try:
+        for fd in os.listdir(fd_dir):
+            try:
+                target = os.readlink(os.path.join(fd_dir, fd))
+            except OSError:
+                continue
+            if target.startswith("socket:["):
+                inodes.add(target[8:-1])
+    except OSError:
+        return set()
+    ports = set()
+    for table in ("tcp", "tcp6"):
+        try:
+            with open(os.path.join(proc_root, str(pid), "net", table)) as f:
+                next(f)
+                for line in f:
+                    fields = line.split()
+                    if fields[3] == "0A" and fields[9] in inodes:
+                        ports.add(_decode_address(fields[1]))
+        except (OSError, StopIteration):
+            continue
+    return ports
+
+def probe_target(address):
+    ip, port = address
+    if ip in ("0.0.0.0", "::"):
+        ip = "127.0.0.1" if ip == "0.0.0.0" else "::1"
+    return ip, port
+
+# =======================
+# 🟢 Downtime prober
+# =======================
+class Prober(threading.Thread):
+    # Sends `HEAD /` in a loop; the longest run of failed requests is the downtime
+    def __init__(self, target, interval=PROBE_INTERVAL):
+        super().__init__(daemon=True)
+        self.target = target
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.total = 0
+        self.failed = 0
+        self.longest = 0.0
+        self._failing_since = None
+
+    def probe(self):
+        try:
+            with socket.create_connection(self.target, timeout=PROBE_TIMEOUT) as sock:
+                sock.sendall(b"HEAD / HTTP/1.0\r\nHost: localhost\r\n\r\n")
+                return sock.recv(12).startswith(b"HTTP/")
+        except OSError:
+            return False
+
+    def run(self):
+        while not self.stop_event.is_set():
+            now = time.monotonic()
+            ok = self.probe()
+            self.total += 1
+            if ok:
+                if self._failing_since is not None:
+                    self.longest = max(self.longest, now - self._failing_since)
+                    self._failing_since = None
+            else:
+                self.failed += 1
+                if self._failing_since is None:
+                    self._failing_since = now
+            self.stop_event.wait(self.interval)
+
+    def finish(self):
+        self.stop_event.set()
+        self.join()
+        if self._failing_since is not None:
+            self.longest = max(self.longest, time.monotonic() - self._failing_since)
+        return {"probes": self.total, "failed_probes": self.failed, "downtime_ms": round(self.longest * 1000, 1)}
+
+# =======================
+# 🟢 Master
+# =======================
+class Master:
+    def __init__(self, app, args=(), drain_timeout=DRAIN_TIMEOUT, ready_timeout=READY_TIMEOUT,
+                 status_file=STATUS_FILE, log_file=None):
+        self.app = app
+        self.args = list(args)
+        self.drain_timeout = drain_timeout
+        self.ready_timeout = ready_timeout
+        self.status_file = status_file
+        self.worker = os.environ.get("MINERPANEL_WORKER", "1")
+        self.supervisor_file = SUPERVISOR_FILE.format(worker=self.worker)
+        self.pipeline = None
+        if log_file:
+            budget, segment = split_budget(TOTAL_BUDGET, os.environ.get("MINERPANEL_WORKERS", 1))
+            self.pipeline = LogPipeline(worker_log(log_file, self.worker), budget, segment)
+        self.child = None
+        self.restart_requested = False
+        self.stop_requested = False
+        # Supervision state
+        self.phase = "starting"      # starting | serving | backoff | stopped
+        self.phase_since = time.monotonic()
+        self.totals = {"serving": 0.0, "restarting": 0.0}
+        self.child_started = None
+        self.respawn_at = None
+        self.failures = 0            # consecutive short-lived runs, drives the backoff
+        self.recent_exits = []       # monotonic exit times inside CRASH_LOOP_WINDOW
+        self.crash_loop = False
+        self.history = []
+        self.restarts = 0
+        self.saved_at = 0.0
+
+    def spawn(self):
+        # Resolved on every spawn, so after a release switch the app runs from the new
+        # release directory, with relative paths (templates, config) working there
+        app = os.path.realpath(self.app)
+        command = [sys.executable, os.path.abspath(__file__), "child",
+                   "--drain", str(self.drain_timeout), app, "--"] + self.args
+        if self.pipeline is None:
+            return subprocess.Popen(command, cwd=os.path.dirname(app))
+        child = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                 cwd=os.path.dirname(app))
+        self.pipeline.pump_thread(child.stdout)
+        return child
+
+    def log(self, message):
+        line = f"[svclaunch] {message}"
+        if self.pipeline is None:
+            print(line, flush=True)
+        else:
+            self.pipeline.write(line + "\n")
+
+    def stop_child(self, child):
+        # SIGTERM starts the drain; SIGKILL only if it overruns
+        if child.poll() is not None:
+            return 0.0
+        start = time.monotonic()
+        child.send_signal(signal.SIGTERM)
+        try:
+            child.wait(self.drain_timeout + 2)
+        except subprocess.TimeoutExpired:
+            child.kill()
+            child.wait()
+        return time.monotonic() - start
+
+    def wait_ready(self, child, ports):
+        # Ready = listening on all of the old child's ports (any port when unknown), then alive for SETTLE_TIME
+        deadline = time.monotonic() + self.ready_timeout
+        while time.monotonic() < deadline:
+            if child.poll() is not None:
+                return False, f"new process exited with code {child.returncode} during startup"
+            have = listening_ports(child.pid)
+            if have and (not ports or {p for _, p in ports} <= {p for _, p in have}):
+                time.sleep(SETTLE_TIME)
+                if child.poll() is not None:
+                    return False, f"new process exited with code {child.returncode} after binding"
+                return True, None
+            time.sleep(0.05)
+        return False, f"new process not listening after {self.ready_timeout:g}s"
+
+    def graceful_restart(self):
+        start = time.monotonic()
+        old = self.child
+        ports = listening_ports(old.pid) if old and old.poll() is None else set()
+        report = {"ok": False, "time": int(time.time()), "old_pid": old.pid if old else None,
+                  "ports": sorted(p for _, p in ports)}
+        prober = None
+        if ports:
+            prober = Prober(probe_target(sorted(ports)[0]))
+            prober.start()
+        new = self.spawn()
+        report["new_pid"] = new.pid
+        ok, error = self.wait_ready(new, ports)
+        report["ready_seconds"] = round(time.monotonic() - start, 3)
+        if ok:
+            self.child = new
+            if old is not None:
+                report["drain_seconds"] = round(self.stop_child(old), 3)
+            report["ok"] = True
+        else:
+            # Keep serving from the old process; the failed one is discarded
+            self.stop_child(new)
+            report["error"] = error
+        if prober:
+            time.sleep(0.2)
+            report.update(prober.finish())
+        report["seconds"] = round(time.monotonic() - start, 3)
+        self.write_status(report)
+        self.log(f"restart {'ok' if ok else 'failed'}: {json.dumps(report, sort_keys=True)}")
+        return report
+
+    def write_status(self, report):
+        self._write_json(self.status_file, report)
+
+    def _write_json(self, path, data):
+        tmp = path + ".tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(data, f, indent=2, sort_keys=True)
+            os.replace(tmp, path)
+        except OSError as e:
+            self.log(f"cannot write {path}: {e}")
+
+    # -----------------------
+    # Supervision
+    # -----------------------
+    def set_phase(self, phase):
+        now = time.monotonic()
+        if self.phase != "stopped":
+            self.totals["serving" if self.phase == "serving" else "restarting"] += now - self.phase_since
+        self.phase, self.phase_since = phase, now
+
+    def start_child(self):
+        self.child = self.spawn()
+        self.child_started = time.monotonic()
+        self.respawn_at = None
+        self.set_phase("starting")
+
+    def check_ready(self):
+        # Serving once the app listens; an app that never listens counts as serving after ready_timeout
+        if listening_ports(self.child.pid):
+            return True
+        return time.monotonic() - self.child_started >= self.ready_timeout
+
+    def on_exit(self, code):
+        now = time.monotonic()
+        uptime = now - self.child_started
+        self.child = None
+        self.restarts += 1
+        if uptime >= STABLE_UPTIME:
+            self.failures = 0
+        self.failures += 1
+        self.recent_exits = [t for t in self.recent_exits if now - t < CRASH_LOOP_WINDOW] + [now]
+        delay = backoff_delay(self.failures)
+        if len(self.recent_exits) >= CRASH_LOOP_EXITS:
+            if not self.crash_loop:
+                self.log(f"crash loop: {len(self.recent_exits)} exits in {CRASH_LOOP_WINDOW:g}s, "
+                         f"retrying every {BACKOFF_MAX:g}s")
+            self.crash_loop = True
+            delay = BACKOFF_MAX
+        self.respawn_at = now + delay
+        self.set_phase("backoff")
+        entry = {"time": int(time.time()), "code": code, "reason": exit_reason(code),
+                 "uptime": round(uptime, 1), "backoff": round(delay, 1)}
+        self.history = (self.history + [entry])[-HISTORY_LIMIT:]
+        self.log(f"app {entry['reason']} after {uptime:.1f}s, starting again in {delay:.1f}s")
+        self.save_state()
+
+    def state(self):
+        now = time.monotonic()
+        totals = dict(self.totals)
+        if self.phase != "stopped":
+            totals["serving" if self.phase == "serving" else "restarting"] += now - self.phase_since
+        return {"worker": self.worker, "app": self.app, "pid": os.getpid(),
+                "child_pid": self.child.pid if self.child else None,
+                "state": "crash-loop" if self.crash_loop and self.phase == "backoff" else self.phase,
+                "serving_seconds": round(totals["serving"], 1),
+                "restarting_seconds": round(totals["restarting"], 1),
+                "restarts": self.restarts, "crash_loop": self.crash_loop,
+                "next_start_in": round(max(self.respawn_at - now, 0), 1) if self.respawn_at else None,
+                "exits": self.history, "updated": int(time.time())}
+
+    def save_state(self):
+        self.saved_at = time.monotonic()
+        self._write_json(self.supervisor_file, self.state())
+
+    def run(self):
+        signal.signal(signal.SIGHUP, lambda *_: setattr(self, "restart_requested", True))
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, lambda *_: setattr(self, "stop_requested", True))
+        self.start_child()
+        self.save_state()
+        while True:
+            now = time.monotonic()
+            if self.stop_requested:
+                if self.child is not None:
+                    self.stop_child(self.child)
+                self.set_phase("stopped")
+                self.save_state()
+                if self.pipeline is not None:
+                    self.pipeline.close()
+                return 0
+            if self.restart_requested:
+                self.restart_requested = False
+                if self.child is None:
+                    self.log("restart requested during backoff, starting now")
+                    self.start_child()
+                elif self.graceful_restart()["ok"]:
+                    self.child_started = time.monotonic()
+            if self.child is None:
+                if now >= self.respawn_at:
+                    self.start_child()
+            else:
+                code = self.child.poll()
+                if code is not None:
+                    self.on_exit(code)
+                    continue
+                if self.phase == "starting" and self.check_ready():
+                    self.set_phase("serving")
+                    self.save_state()
+                if self.crash_loop and now - self.child_started >= STABLE_UPTIME:
+                    self.log("app stable again, crash loop cleared")
+                    self.crash_loop = False
+                    self.failures = 0
+            if now - self.saved_at >= SAVE_EVERY:
+                self.save_state()
+            time.sleep(0.2)
+
+def backoff_delay(failures, base=BACKOFF_BASE, limit=BACKOFF_MAX):
+    # Exponential with "equal jitter": half fixed, half random, so workers that
+    # crashed together do not all come back in the same instant
+    delay = min(limit, base * 2 ** (failures - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+def exit_reason(code):
+    if code < 0:
+        try:
+            return f"killed by {signal.Signals(-code).name}"
+        except ValueError:
+            return f"killed by signal {-code}"
+    return f"exited with code {code}"
+
+# =======================
+# 🟢 Supervisor status
+# =======================
+def load_supervisor_status(pattern=SUPERVISOR_FILE.format(worker="*")):
+    # One dict per worker; a file whose master is gone is reported as stopped
+    statuses = []
+    for path in glob.glob(pattern):
+        try:
+            with open(path) as f:
+                status = json.load(f)
+        except (OSError, ValueError):
+            continue
+        try:
+            os.kill(status["pid"], 0)
+        except ProcessLookupError:
+            status["state"] = "stopped"
+        except PermissionError:
+            pass
+        statuses.append(status)
+    return sorted(statuses, key=lambda st: (len(str(st["worker"])), str(st["worker"])))
+
+def format_supervisor(status, limit=10):
+    serving, restarting = status["serving_seconds"], status["restarting_seconds"]
+    total = serving + restarting
+    share = f" ({100 * serving / total:.1f}%)" if total else ""
+    lines = [f"Worker {status['worker']} (launcher {status['pid']}): {status['state']}, "
+             f"serving {human_age(serving)}{share}, restarting {human_age(restarting)}, "
+             f"{status['restarts']} exit(s)"]
+    if status["state"] != "stopped" and status.get("next_start_in") is not None:
+        mark = "⚠️ Crash loop" if status["crash_loop"] else "⏳ Backing off"
+        lines.append(f"  {mark}, next start in {status['next_start_in']:.0f}s")
+    exits = status["exits"][-limit:]
+    if exits:
+        lines.append(f"  {'TIME':<15} {'UPTIME':>7} {'BACKOFF':>8}  EXIT")
+        for entry in reversed(exits):
+            when = time.strftime("%m-%d %H:%M:%S", time.localtime(entry["time"]))
+            lines.append(f"  {when:<15} {human_age(entry['uptime']):>7} {entry['backoff']:>7.1f}s  {entry['reason']}")
+    return lines
+
+# =======================
+# 🟢 Restart client
+# =======================
+def find_masters(app=None):
+    # Anchored on the interpreter so shells whose command line mentions svclaunch never match
+    pattern = r"^\S*python\S*\s+\S*svclaunch\.py run\b" + (r".*" + re.escape(app) if app else "")
+    return ProcScanner().find(pattern, force=True)
+
+def request_restart(app=None, status_file=STATUS_FILE, timeout=READY_TIMEOUT + DRAIN_TIMEOUT + 10):
+    # Restarts the running masters one at a time, so with several workers the
+    # others keep serving; returns their reports, or None when none is running
+    masters = sorted(find_masters(app), key=lambda p: p.pid)
+    if not masters:
+        return None
+    reports = []
+    for master in masters:
+        report = _restart_one(master, status_file, timeout)
+        reports.append(report)
+        if not report["ok"]:
+            # The new code does not start: leave the remaining workers on the old one
+            break
+    return reports
+
+def _restart_one(master, status_file, timeout):
+    before = os.path.getmtime(status_file) if os.path.exists(status_file) else 0
+    signal_processes([master], signal.SIGHUP)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if os.path.exists(status_file) and os.path.getmtime(status_file) > before:
+            with open(status_file) as f:
+                return json.load(f)
+        time.sleep(0.1)
+    return {"ok": False, "error": f"no restart report from master {master.pid} within {timeout:g}s"}
+
+def format_restart(report):
+    if not report["ok"]:
+        return f"❌ Graceful restart failed: {report.get('error')}"
+    line = f"✅ Restarted pid {report['old_pid']} -> {report['new_pid']}: ready in {report['ready_seconds']:.2f}s"
+    if "drain_seconds" in report:
+        line += f", old process drained in {report['drain_seconds']:.2f}s"
+    if "probes" in report:
+        line += (f", downtime {report['downtime_ms']:.0f} ms "
+                 f"({report['failed_probes']}/{report['probes']} probes failed)")
+    return line
+
+# =======================
+# 🟢 CLI
+# =======================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run app.py with zero-downtime restarts on SIGHUP")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name, text in (("run", "supervise the app (procd command)"), ("child", "internal: run the app itself")):
+        p = sub.add_parser(name, help=text)
+        p.add_argument("app")
+        p.add_argument("args", nargs="*", help="arguments for the app (after --)")
+        p.add_argument("--drain", type=float, default=DRAIN_TIMEOUT, help="seconds to finish in-flight requests")
+        if name == "run":
+            p.add_argument("--ready-timeout", type=float, default=READY_TIMEOUT)
+            p.add_argument("--status", default=STATUS_FILE, help="restart report (default: %(default)s)")
+            p.add_argument("--log", help="write the app's output to this capped, rotating log")
+    p = sub.add_parser("history", help="show supervisor state and exit history per worker")
+    p.add_argument("--limit", type=int, default=10, help="exits shown per worker")
+    p = sub.add_parser("restart", help="gracefully restart the running service and report downtime")
+    p.add_argument("--app", help="only masters running this app")
+    p.add_argument("--status", default=STATUS_FILE)
+    args = parser.parse_args(argv)
+
+    if args.command == "child":
+        run_child(args.app, args.args, args.drain)
+        return 0
+    if args.command == "run":
+        return Master(args.app, args.args, args.drain, args.ready_timeout, args.status, args.log).run()
+    if args.command == "history":
+        statuses = load_supervisor_status()
+        if not statuses:
+            print("❌ No supervisor state found")
+            return 1
+        for status in statuses:
+            print("\n".join(format_supervisor(status, args.limit)))
+        return 0
+    reports = request_restart(args.app, args.status)
+    if reports is None:
+        print("❌ No svclaunch master running")
+        return 1
+    for report in reports:
+        print(format_restart(report))
+    return 0 if all(report["ok"] for report in reports) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+
+# Size-capped, rotating, gzip-compressed log pipeline for the minerpanel service
+# Author: KOP3MA
+#
+# /tmp is RAM on OpenWrt, so the service log must have a hard ceiling.
+# Lines go into a bounded in-memory buffer and a writer thread appends them
+# to the live segment. When the segment reaches its size it is renamed,
+# gzipped and the oldest archives are deleted until live segment + archives
+# fit in the budget. The producer side never touches the disk: when the
+# buffer is full new lines are dropped and counted, and a marker line with
+# the count is written once there is room again.
+
+import os
+import sys
+import glob
+import gzip
+import time
+import shutil
+import argparse
+import threading
+from collections import deque
+
+# =======================
+# 🟢 Configuration
+# =======================
+LOG_FILE = "/tmp/minerpanel.log"
+TOTAL_BUDGET = 1024 * 1024     # live segment + archives, for all workers together
+SEGMENT_SIZE = 256 * 1024
+BUFFER_BYTES = 128 * 1024
+COMPRESS_LEVEL = 6
+MIN_SEGMENT = 16 * 1024
+
+# =======================
+# 🟢 File naming
+# =======================
+def worker_log(base, worker):
+    # Worker 1 keeps the plain name so single-worker setups look as before
+    if str(worker) == "1":
+        return base
+    root, ext = os.path.splitext(base)
+    return f"{root}-{worker}{ext}"
+
+def live_logs(base=LOG_FILE):
+    # Live log of every worker, worker 1 first
+    root, ext = os.path.splitext(base)
+    others = glob.glob(f"{glob.escape(root)}-*{ext}")
+    return ([base] if os.path.exists(base) else []) + sorted(others, key=lambda p: (len(p), p))
+
+def archives(path):
+    # Rotated segments of one live log, oldest first; several can share a
+    # second (and a name stamp), so order by modification time
+    found = []
+    for p in glob.glob(glob.escape(path) + ".*.gz"):
+        try:
+            found.append((os.stat(p).st_mtime_ns, p))
+        except OSError:
+            continue
+    return [p for _, p in sorted(found)]
+
+def split_budget(total, workers):
+    # Per-worker budget and segment size so that all workers together stay within total
+    budget = total // max(int(workers), 1)
+    segment = max(MIN_SEGMENT, min(SEGMENT_SIZE, budget // 4))
+    return budget, segment
+
+# =======================
+# 🟢 Pipeline
+# =======================
+class LogPipeline:
+    def __init__(self, path, budget=TOTAL_BUDGET, segment_size=SEGMENT_SIZE, buffer_bytes=BUFFER_BYTES):
+        self.path = path
+        self.budget = budget
+        self.segment_size = segment_size
+        self.buffer_bytes = buffer_bytes
+        self._lines = deque()
+        self._pending = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+        self.written = 0
+        self.rotations = 0
+        self._unreported = 0
+        self._file = open(path, "ab")
+        self._size = self._file.tell()
+        self._thread = threading.Thread(target=self._writer, daemon=True)
+        self._thread.start()
+
+    def write(self, line):
+        # Never blocks on disk: only a lock and a deque append
+        if isinstance(line, str):
+            line = line.encode()
+        with self._cond:
+            if self._closed or self._pending + len(line) > self.buffer_bytes:
+                self.dropped += 1
+                self._unreported += 1
+                return False
+            self._lines.append(line)
+            self._pending += len(line)
+            self._cond.notify()
+        return True
+
+    def pump(self, stream):
+        # Copies a child's stdout into the pipeline until EOF; run in its own thread
+        for line in iter(stream.readline, b""):
+            self.write(line)
+        stream.close()
+
+    def pump_thread(self, stream):
+        thread = threading.Thread(target=self.pump, args=(stream,), daemon=True)
+        thread.start()
+        return thread
+
+    def _writer(self):
+        while True:
+            with self._cond:
+                while not self._lines and not self._closed:
+                    self._cond.wait()
+                batch = list(self._lines)
+                self._lines.clear()
+                self._pending = 0
+                dropped, self._unreported = self._unreported, 0
+                closing = self._closed
+            if dropped:
+                batch.append(f"[svclog] {dropped} line(s) dropped, log buffer full\n".encode())
+            if batch:
+                self._write_batch(batch)
+            if closing:
+                self._file.close()
+                return
+
+    def _write_batch(self, batch):
+        try:
+            for line in batch:
+                self._file.write(line)
+                self._size += len(line)
+                self.written += 1
+                if self._size >= self.segment_size:
+                    self._file.flush()
+                    self.rotate()
+            self._file.flush()
+        except OSError as e:
+            # Out of space or the file was removed under us: start a fresh segment
+            print(f"[svclog] write to {self.path} failed: {e}", file=sys.stderr)
+            self._reopen()
+
+    def _reopen(self):
+        try:
+            self._file.close()
+        except OSError:
+            pass
+        self._file = open(self.path, "ab")
+        self._size = self._file.tell()
+
+    def rotate(self):
+        self._file.close()
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        archive, n = f"{self.path}.{stamp}", 1
+        while os.path.exists(archive + ".gz"):
+            n += 1
+            archive = f"{self.path}.{stamp}-{n}"
+        os.replace(self.path, archive)
+        self._file = open(self.path, "ab")
+        self._size = 0
+        self.rotations += 1
+        with open(archive, "rb") as src, gzip.open(archive + ".gz", "wb", COMPRESS_LEVEL) as dst:
+            shutil.copyfileobj(src, dst)
+        os.unlink(archive)
+        self.enforce_budget()
+
+    def enforce_budget(self):
+        # The live segment may grow to segment_size, so reserve that much for it
+        old = archives(self.path)
+        used = self.segment_size + sum(os.path.getsize(p) for p in old)
+        while old and used > self.budget:
+            oldest = old.pop(0)
+            used -= os.path.getsize(oldest)
+            os.unlink(oldest)
+
+    def close(self, timeout=5):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout)
+
+    def stats(self):
+        return {"written": self.written, "dropped": self.dropped, "rotations": self.rotations}
+
+# =======================
+# 🟢 Usage report
+# =======================
+def usage(base=LOG_FILE):
+    # (path, live bytes, archive count, archive bytes) per worker log
+    rows = []
+    for path in live_logs(base):
+        old = archives(path)
+        rows.append((path, os.path.getsize(path), len(old), sum(os.path.getsize(p) for p in old)))
+    return rows
+
+def remove_logs(base=LOG_FILE):
+    removed = 0
+    for path in live_logs(base):
+        for p in archives(path) + [path]:
+            os.unlink(p)
+            removed += 1
+    return removed
+
+# =======================
+# 🟢 CLI
+# =======================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Capped, rotating, compressed log for the minerpanel service")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("pipe", help="copy stdin into a capped log, e.g. `app | svclog.py pipe`")
+    p.add_argument("--log", default=LOG_FILE)
+    p.add_argument("--budget", type=int, default=TOTAL_BUDGET, help="bytes for live segment + archives")
+    p.add_argument("--segment", type=int, default=SEGMENT_SIZE, help="rotate the live segment at this size")
+    p = sub.add_parser("status", help="show log sizes against the budget")
+    p.add_argument("--log", default=LOG_FILE)
+    args = parser.parse_args(argv)
+
+    if args.command == "pipe":
+        pipeline = LogPipeline(args.log, args.budget, args.segment)
+        pipeline.pump(sys.stdin.buffer)
+        pipeline.close()
+        stats = pipeline.stats()
+        print(f"📝 {stats['written']} lines, {stats['rotations']} rotations, {stats['dropped']} dropped",
+              file=sys.stderr)
+        return 0
+    rows = usage(args.log)
+    if not rows:
+        print(f"❌ No log at {args.log}")
+        return 1
+    total = 0
+    for path, live, count, packed in rows:
+        total += live + packed
+        print(f"{path}: live {live // 1024} KiB, {count} archive(s) {packed // 1024} KiB")
+    print(f"Total {total // 1024} KiB of {TOTAL_BUDGET // 1024} KiB budget")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
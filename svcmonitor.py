@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+
+# Live resource monitor for the minerpanel service
+# Author: KOP3MA
+#
+# Samples the service's process tree (app.py and every child) from /proc and
+# keeps the last N samples in a fixed-size ring buffer of packed arrays.
+# To stay cheap on a router, a sample only re-reads the stat files of pids
+# already known to be in the tree; the whole of /proc is listed again only
+# every RESCAN_EVERY samples or when a member exits.
+
+import os
+import re
+import csv
+import sys
+import json
+import time
+import argparse
+from array import array
+
+from procscan import ProcScanner, PROC_ROOT, CLK_TCK, human_size
+
+# =======================
+# 🟢 Configuration
+# =======================
+SERVICE_MATCH = re.escape("/last-releases/current/app.py")
+CAPACITY = 600
+INTERVAL = 2.0
+RESCAN_EVERY = 15
+SPARK = "▁▂▃▄▅▆▇█"
+COLUMNS = ("time", "cpu", "rss", "fds", "threads", "procs")
+
+# =======================
+# 🟢 Ring buffer
+# =======================
+class RingBuffer:
+    # One preallocated array per column; memory never grows after start
+    TYPES = {"time": "d", "cpu": "f", "rss": "Q", "fds": "I", "threads": "I", "procs": "I"}
+
+    def __init__(self, capacity=CAPACITY):
+        self.capacity = capacity
+        self.columns = {name: array(self.TYPES[name], [0]) * capacity for name in COLUMNS}
+        self.head = 0
+        self.count = 0
+
+    def append(self, sample):
+        for name in COLUMNS:
+            self.columns[name][self.head] = sample[name]
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def values(self, name, last=None):
+        # Oldest first
+        count = self.count if last is None else min(last, self.count)
+        column = self.columns[name]
+        start = (self.head - count) % self.capacity
+        if start + count <= self.capacity:
+            return list(column[start:start + count])
+        return list(column[start:]) + list(column[:self.head])
+
+    def samples(self):
+        rows = zip(*(self.values(name) for name in COLUMNS))
+        # float32 storage: round so exports do not show 195.08999633789062
+        return [dict(zip(COLUMNS, row), cpu=round(row[1], 2), time=round(row[0], 3)) for row in rows]
+
+    def __len__(self):
+        return self.count
+
+# =======================
+# 🟢 Sampler
+# =======================
+class ServiceSampler:
+    def __init__(self, match=SERVICE_MATCH, capacity=CAPACITY, root=PROC_ROOT, rescan_every=RESCAN_EVERY):
+        self.scanner = ProcScanner(root, refresh_interval=0)
+        self.pattern = re.compile(match)
+        self.root = root
+        self.rescan_every = rescan_every
+        self.buffer = RingBuffer(capacity)
+        self.tree = []
+        self._since_rescan = rescan_every
+        self._last = None          # (total ticks, monotonic time) of the previous sample
+        self._own_cpu = 0.0
+
+    def _rescan(self):
+        processes = self.scanner.scan(force=True)
+        own = os.getpid()
+        roots = {p.pid for p in processes if p.pid != own and self.pattern.search(p.cmdline)}
+        children = {}
+        for p in processes:
+            children.setdefault(p.ppid, []).append(p.pid)
+        # The launcher's cmdline names the app too, so a root can sit below another root
+        tree, stack, seen = [], list(roots), set()
+        while stack:
+            pid = stack.pop()
+            if pid == own or pid in seen:
+                continue
+            seen.add(pid)
+            tree.append(pid)
+            stack.extend(children.get(pid, []))
+        self.tree = sorted(tree)
+        self._since_rescan = 0
+
+    def _open_fds(self, pid):
+        try:
+            return len(os.listdir(os.path.join(self.root, str(pid), "fd")))
+        except OSError:
+            return 0
+
+    def sample(self):
+        # Returns the new sample dict; cpu is percent of one core since the previous sample
+        started = time.process_time()
+        now = time.monotonic()
+        if self._since_rescan >= self.rescan_every or not self.tree:
+            self._rescan()
+        processes = [self.scanner.read(pid, now) for pid in self.tree]
+        if None in processes:
+            # A member exited or was replaced: rebuild the tree from a full sweep
+            self._rescan()
+            processes = [self.scanner.read(pid, now) for pid in self.tree]
+        processes = [p for p in processes if p is not None]
+        self._since_rescan += 1
+
+        ticks = sum(p.utime + p.stime for p in processes)
+        cpu = 0.0
+        if self._last and now > self._last[1] and ticks >= self._last[0]:
+            cpu = 100.0 * (ticks - self._last[0]) / CLK_TCK / (now - self._last[1])
+        self._last = (ticks, now)
+        sample = {"time": time.time(), "cpu": round(cpu, 2), "rss": sum(p.rss for p in processes),
+                  "fds": sum(self._open_fds(p.pid) for p in processes),
+                  "threads": sum(p.threads for p in processes), "procs": len(processes)}
+        self.buffer.append(sample)
+        self._own_cpu += time.process_time() - started
+        return sample
+
+    def overhead(self, elapsed):
+        # Sampler CPU time as a percentage of wall time
+        return 100.0 * self._own_cpu / elapsed if elapsed > 0 else 0.0
+
+# =======================
+# 🟢 Display and export
+# =======================
+def sparkline(values, width=40):
+    values = values[-width:]
+    if not values:
+        return ""
+    low, high = min(values), max(values)
+    if high == low:
+        return SPARK[0] * len(values)
+    scale = (len(SPARK) - 1) / (high - low)
+    return "".join(SPARK[int((v - low) * scale)] for v in values)
+
+def format_dashboard(buffer, width=40):
+    if not len(buffer):
+        return ["(no samples yet)"]
+    rows = [("CPU %", "cpu", lambda v: f"{v:6.1f}%"), ("RSS", "rss", lambda v: f"{human_size(v):>7}"),
+            ("FDs", "fds", lambda v: f"{v:7d}"), ("Threads", "threads", lambda v: f"{v:7d}")]
+    lines = []
+    for label, name, fmt in rows:
+        values = buffer.values(name, width)
+        lines.append(f"{label:<8}{fmt(values[-1])}  {sparkline(values, width)}  max {fmt(max(values)).strip()}")
+    return lines
+
+def export_samples(buffer, path):
+    # Format follows the extension: .csv, anything else is JSON
+    samples = buffer.samples()
+    if path.endswith(".csv"):
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=COLUMNS)
+            writer.writeheader()
+            writer.writerows(samples)
+    else:
+        with open(path, "w") as f:
+            json.dump(samples, f, indent=1)
+    return len(samples)
+
+def live_monitor(match=SERVICE_MATCH, interval=INTERVAL, capacity=CAPACITY, count=None, out=sys.stdout):
+    # Redraws until Ctrl+C (or `count` samples); returns the sampler for export
+    sampler = ServiceSampler(match, capacity)
+    start = time.monotonic()
+    taken = 0
+    try:
+        while count is None or taken < count:
+            sample = sampler.sample()
+            taken += 1
+            lines = format_dashboard(sampler.buffer)
+            status = (f"{sample['procs']} process(es), {len(sampler.buffer)} samples every {interval:g}s, "
+                      f"sampler CPU {sampler.overhead(time.monotonic() - start):.2f}% — Ctrl+C to stop")
+            if out.isatty():
+                out.write("\033[H\033[2J")
+            out.write("\n".join(lines + [status]) + "\n")
+            out.flush()
+            if count is None or taken < count:
+                time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    return sampler
+
+# =======================
+# 🟢 CLI
+# =======================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sample CPU/RSS/fds/threads of the minerpanel process tree")
+    parser.add_argument("--match", default=SERVICE_MATCH, help="regex for the root process (default: app.py)")
+    parser.add_argument("--interval", type=float, default=INTERVAL, help="seconds between samples")
+    parser.add_argument("--capacity", type=int, default=CAPACITY, help="samples kept in the ring buffer")
+    parser.add_argument("--count", type=int, help="stop after this many samples")
+    parser.add_argument("--export", metavar="FILE", help="write the samples to FILE (.csv or .json) on exit")
+    args = parser.parse_args(argv)
+
+    sampler = live_monitor(args.match, args.interval, args.capacity, args.count)
+    if args.export:
+        print(f"💾 {export_samples(sampler.buffer, args.export)} samples -> {args.export}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+# Author: KOP3MA
+#
+# The modules live at the top of the repo and are run as scripts on the
+# router, so make them importable from the tests without packaging.
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# =======================
+# 🟢 Fake /proc tree
+# =======================
+BOOT_TIME = 1700000000
+
+def stat_line(pid, name, state="S", ppid=1, utime=0, stime=0, threads=1, starttime=1000, rss_pages=10):
+    fields = [state, ppid, pid, pid, 0, -1, 4194560, 100, 0, 0, 0, utime, stime, 0, 0, 20, 0,
+              threads, 0, starttime, 1 << 20, rss_pages]
+    return f"{pid} ({name}) " + " ".join(str(f) for f in fields) + " 0 0 0\n"
+
+class FakeProc:
+    def __init__(self, root):
+        self.root = root
+        root.mkdir(exist_ok=True)
+        (root / "stat").write_text(f"cpu  1 2 3 4\nbtime {BOOT_TIME}\nprocesses 42\n")
+
+    def add(self, pid, name, cmdline=None, **stat):
+        directory = self.root / str(pid)
+        directory.mkdir(exist_ok=True)
+        (directory / "stat").write_text(stat_line(pid, name, **stat))
+        args = cmdline if cmdline is not None else [name]
+        (directory / "cmdline").write_bytes(b"".join(a.encode() + b"\0" for a in args))
+
+    def remove(self, pid):
+        for entry in (self.root / str(pid)).iterdir():
+            entry.unlink()
+        (self.root / str(pid)).rmdir()
+
+@pytest.fixture
+def proc(tmp_path):
+    return FakeProc(tmp_path / "proc")
@@ -0,0 +1,21 @@
+# Author: KOP3MA
+
+import os
+
+from deploy import ReleaseStore
+
+def test_prepare_keeps_file_and_directory_symlinks(tmp_path):
+    seed = tmp_path / "legacy"
+    (seed / "static" / "css").mkdir(parents=True)
+    (seed / "static" / "css" / "site.css").write_text("body {}")
+    (seed / "app.py").write_text("print('hi')")
+    os.symlink("static/css", seed / "css")
+    os.symlink("app.py", seed / "main.py")
+    store = ReleaseStore(str(tmp_path / "app"))
+    release_id, path, info = store.prepare(str(seed))
+    assert os.readlink(os.path.join(path, "css")) == "static/css"
+    assert os.readlink(os.path.join(path, "main.py")) == "app.py"
+    assert os.path.isfile(os.path.join(path, "css", "site.css"))
+    assert info["linked"] + info["copied"] == 2
+    store.publish(release_id)
+    assert store.list_releases() == [release_id]
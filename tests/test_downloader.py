@@ -0,0 +1,154 @@
+# Author: KOP3MA
+
+import os
+import json
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import downloader
+from downloader import DownloadCache, DownloadError, fetch
+
+DATA = bytes(range(256)) * 2000
+
+class Handler(BaseHTTPRequestHandler):
+    # Behaviour comes from attributes on the server object (see the `server` fixture)
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        srv = self.server
+        srv.requests.append({"range": self.headers.get("Range"), "if_range": self.headers.get("If-Range")})
+        body, status, start = srv.body, 200, 0
+        rng = self.headers.get("Range")
+        if_range = self.headers.get("If-Range")
+        if rng and srv.ranges and (if_range is None or if_range == srv.etag):
+            first, last = rng.split("=", 1)[1].split("-")
+            start = int(first)
+            end = int(last) if last else len(body) - 1
+            if rng != "bytes=0-0":
+                start += srv.range_skew
+            body, status = body[start:end + 1], 206
+        self.send_response(status)
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{start + len(body) - 1}/{len(srv.body)}")
+        if srv.etag:
+            self.send_header("ETag", srv.etag)
+        if srv.ranges:
+            self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Type", srv.content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if srv.cut_after is not None and rng != "bytes=0-0":
+            # Drop the connection part way through, once
+            cut, srv.cut_after = srv.cut_after, None
+            self.wfile.write(body[:cut])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    srv.body, srv.etag, srv.ranges = DATA, '"v1"', True
+    srv.content_type, srv.cut_after, srv.requests = "application/octet-stream", None, []
+    srv.range_skew = 0
+    thread = threading.Thread(target=srv.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    srv.url = f"http://127.0.0.1:{srv.server_port}/file.zip"
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(downloader.time, "sleep", lambda seconds: None)
+    return DownloadCache(str(tmp_path / "cache"))
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+def test_download_lands_in_content_addressed_blob(server, cache):
+    result = fetch(server.url, "app", cache)
+    digest = hashlib.sha256(DATA).hexdigest()
+    assert result["path"] == cache.blob_path(digest) and result["sha256"] == digest
+    assert read(result["path"]) == DATA
+    assert not os.listdir(cache.partial_dir)
+    with open(cache.index_file) as f:
+        assert json.load(f)["app"]["validator"] == '"v1"'
+
+def test_second_fetch_is_a_cache_hit(server, cache):
+    fetch(server.url, "app", cache)
+    server.requests.clear()
+    result = fetch(server.url, "app", cache)
+    assert result["cached"] and result["downloaded"] == 0
+    assert [r["range"] for r in server.requests] == ["bytes=0-0"]
+
+def test_changed_validator_downloads_again(server, cache):
+    fetch(server.url, "app", cache)
+    server.body, server.etag = DATA[::-1], '"v2"'
+    result = fetch(server.url, "app", cache)
+    assert not result["cached"] and read(result["path"]) == DATA[::-1]
+
+def test_dropped_connection_resumes_with_if_range(server, cache):
+    server.cut_after = 100000
+    result = fetch(server.url, "app", cache)
+    assert read(result["path"]) == DATA
+    assert result["attempts"] == 2 and result["downloaded"] == len(DATA)
+    assert server.requests[-1] == {"range": "bytes=100000-", "if_range": '"v1"'}
+
+def test_resume_without_validator(server, cache):
+    server.etag = None
+    server.cut_after = 100000
+    result = fetch(server.url, "app", cache)
+    assert read(result["path"]) == DATA
+    assert server.requests[-1] == {"range": "bytes=100000-", "if_range": None}
+
+def test_partial_from_an_earlier_run_is_resumed(server, cache):
+    part = cache.partial_path("app")
+    with open(part, "wb") as f:
+        f.write(DATA[:200000])
+    with open(part[:-len(".part")] + ".json", "w") as f:
+        json.dump({"validator": '"v1"', "size": len(DATA)}, f)
+    result = fetch(server.url, "app", cache)
+    assert result["resumed_from"] == 200000 and result["downloaded"] == len(DATA) - 200000
+    assert read(result["path"]) == DATA
+
+def test_partial_of_another_version_is_discarded(server, cache):
+    part = cache.partial_path("app")
+    with open(part, "wb") as f:
+        f.write(b"x" * 200000)
+    with open(part[:-len(".part")] + ".json", "w") as f:
+        json.dump({"validator": '"v0"', "size": len(DATA)}, f)
+    result = fetch(server.url, "app", cache)
+    assert result["resumed_from"] == 0 and read(result["path"]) == DATA
+
+def test_server_ignoring_the_range_restarts_from_zero(server, cache):
+    server.cut_after = 100000
+    result = fetch(server.url, "app", cache)
+    assert read(result["path"]) == DATA
+    server.ranges = False
+    server.cut_after = 50000
+    server.body, server.etag = DATA[::-1], '"v2"'
+    result = fetch(server.url, "other", cache)
+    assert read(result["path"]) == DATA[::-1]
+    assert server.requests[-1]["range"] is None
+
+def test_misaligned_partial_response_is_fetched_again_in_full(server, cache):
+    server.cut_after = 100000
+    server.range_skew = 4096
+    result = fetch(server.url, "app", cache)
+    assert read(result["path"]) == DATA
+    assert server.requests[-2]["range"] == "bytes=100000-"
+    assert server.requests[-1] == {"range": None, "if_range": None}
+
+def test_html_page_is_refused(server, cache):
+    server.content_type = "text/html"
+    with pytest.raises(DownloadError, match="HTML"):
+        fetch(server.url, "app", cache)
@@ -0,0 +1,38 @@
+# Author: KOP3MA
+
+import pytest
+
+from geoipdat import build, verify, read_entries, decode_entry, main, GeoIPError
+from prefixlist import DualStackTable
+
+LIST = "2.144.0.0/14\n5.22.0.0/17\n5.22.128.0/17\n2a01:5ec0::/29\n2a0a:2a80::/32\n"
+
+@pytest.fixture
+def prefix_list(tmp_path):
+    path = tmp_path / "iran.txt"
+    path.write_text(LIST)
+    return str(path)
+
+def test_build_writes_both_families(prefix_list, tmp_path):
+    out = str(tmp_path / "geoip-panel.dat")
+    table = DualStackTable.from_file(prefix_list)
+    entries, cidrs, _ = build(table, out)
+    assert (entries, cidrs) == (1, 4)
+    with open(out, "rb") as f:
+        (code, raw), = read_entries(f.read())
+    versions = sorted(n.version for n in decode_entry(raw)["networks"])
+    assert code == "IRPANEL" and versions == [4, 4, 6, 6]
+    assert verify(out, table) == 4
+
+def test_verify_catches_missing_ipv6(prefix_list, tmp_path):
+    out = str(tmp_path / "geoip-panel.dat")
+    table = DualStackTable.from_file(prefix_list)
+    build(DualStackTable(table.v4), out)
+    with pytest.raises(GeoIPError, match="IPv6"):
+        verify(out, table)
+
+def test_cli_build_and_verify(prefix_list, tmp_path, capsys):
+    out = str(tmp_path / "geoip.dat")
+    assert main(["build", "--list", prefix_list, "-o", out]) == 0
+    assert main(["verify", out, "--list", prefix_list]) == 0
+    assert "geoip:irpanel" in capsys.readouterr().out
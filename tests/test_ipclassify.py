@@ -0,0 +1,14 @@
+# Author: KOP3MA
+
+import pytest
+
+from ipclassify import addresses_to_ints
+
+@pytest.mark.parametrize("address", ["010.0.0.1", "0x7f.1.1.1", "127.1", "1.2.3.4.5", "1.2.3.256", "", b"\xff"])
+def test_non_dotted_quads_are_invalid(address):
+    values, valid = addresses_to_ints([address], as_numpy=False)
+    assert (values, valid) == ([0], [False])
+
+def test_dotted_quads_as_str_and_bytes():
+    values, valid = addresses_to_ints(["2.144.0.1", b"10.0.0.1"], as_numpy=False)
+    assert values == [0x02900001, 0x0A000001] and valid == [True, True]
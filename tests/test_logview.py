@@ -0,0 +1,61 @@
+# Author: KOP3MA
+
+import pytest
+
+import logview
+from logview import tail, make_filter, LineFilter
+
+def write_log(path, lines):
+    path.write_text("".join(line + "\n" for line in lines))
+    return str(path)
+
+class CountingLines:
+    # Wraps reverse_lines to count how far back tail() had to read
+    def __init__(self, monkeypatch):
+        self.read = 0
+        original = logview.reverse_lines
+
+        def counted(path, block_size=logview.BLOCK_SIZE):
+            for line in original(path, block_size):
+                self.read += 1
+                yield line
+        monkeypatch.setattr(logview, "reverse_lines", counted)
+
+ACCESS = [f'127.0.0.1 - - "GET /{i} HTTP/1.1" 200 -' for i in range(5000)]
+
+def test_no_filter_when_nothing_is_asked():
+    assert make_filter() is None
+    assert make_filter(pattern="GET") is not None and make_filter("ERROR") is not None
+
+def test_unfiltered_tail_stops_after_count(tmp_path, monkeypatch):
+    path = write_log(tmp_path / "app.log", ACCESS)
+    counter = CountingLines(monkeypatch)
+    assert tail(path, 500, make_filter()) == ACCESS[-500:]
+    assert counter.read == 501       # the empty text after the last newline, then 500 lines
+
+def test_regex_without_level_ignores_the_continuation_cap(tmp_path):
+    path = write_log(tmp_path / "app.log", ACCESS)
+    picked = tail(path, 500, LineFilter(pattern=r"GET /\d*7 "))
+    assert len(picked) == 500 and picked[-1] == ACCESS[-3]
+
+def test_traceback_lines_inherit_the_level(tmp_path):
+    path = write_log(tmp_path / "app.log", [
+        "10:00 INFO started",
+        "10:01 ERROR request failed",
+        "Traceback (most recent call last):",
+        '  File "app.py", line 3',
+        "ValueError: boom",
+        "10:02 INFO ok",
+    ])
+    assert tail(path, 10, make_filter("ERROR")) == [
+        "10:01 ERROR request failed", "Traceback (most recent call last):",
+        '  File "app.py", line 3', "ValueError: boom"]
+
+def test_overlong_unlevelled_run_counts_as_unlevelled(tmp_path, monkeypatch):
+    monkeypatch.setattr(logview, "MAX_CONTINUATION", 3)
+    path = write_log(tmp_path / "app.log", ["ERROR old"] + ["x"] * 5 + ["ERROR new", "y"])
+    assert tail(path, 10, make_filter("ERROR")) == ["ERROR old", "ERROR new", "y"]
+
+@pytest.mark.parametrize("count", [0, -1])
+def test_nothing_asked_nothing_read(tmp_path, count):
+    assert tail(write_log(tmp_path / "app.log", ACCESS), count) == []
@@ -0,0 +1,93 @@
+# Author: KOP3MA
+
+import ipaddress
+
+import pytest
+
+import nftset
+from nftset import build_script, check_script, elements_from_list, format_element
+
+def interval(cidr):
+    net = ipaddress.IPv4Network(cidr)
+    return int(net.network_address), int(net.broadcast_address)
+
+def elements(script, verb):
+    found = []
+    for line in script.splitlines():
+        if line.startswith(f"{verb} element"):
+            found += [item.strip() for item in line[line.index("{") + 1:line.rindex("}")].split(",")]
+    return found
+
+def test_list_is_aggregated_into_cidr_elements(tmp_path):
+    path = tmp_path / "list"
+    path.write_text("5.0.0.0/24\n5.0.1.0/24\n5.0.1.128/25\n# comment\n10.1.0.0/16 # lan\n2a01::/32\n")
+    assert elements_from_list(str(path)) == {interval("5.0.0.0/23"), interval("10.1.0.0/16")}
+
+def test_full_load_declares_and_flushes_the_set():
+    script, added, removed = build_script({interval("5.0.0.0/23")})
+    assert script.splitlines() == [
+        "add table inet minerpanel",
+        "add set inet minerpanel iran_v4 { type ipv4_addr; flags interval; }",
+        "flush set inet minerpanel iran_v4",
+        "add element inet minerpanel iran_v4 { 5.0.0.0/23 }",
+    ]
+    assert added == {interval("5.0.0.0/23")} and removed == set()
+
+def test_delta_only_touches_changed_elements():
+    current = {interval("5.0.0.0/24"), interval("6.0.0.0/8")}
+    wanted = {interval("5.0.0.0/24"), interval("7.0.0.0/16")}
+    script, added, removed = build_script(wanted, current)
+    assert "flush" not in script
+    assert elements(script, "delete") == ["6.0.0.0/8"]
+    assert elements(script, "add") == ["7.0.0.0/16"]
+    assert script.index("delete element") < script.index("add element")
+    assert (added, removed) == ({interval("7.0.0.0/16")}, {interval("6.0.0.0/8")})
+
+def test_unchanged_set_gives_no_element_lines():
+    current = {interval("5.0.0.0/24")}
+    script, added, removed = build_script(set(current), current)
+    assert not added and not removed and "element" not in script
+
+def test_elements_are_split_across_lines(monkeypatch):
+    monkeypatch.setattr(nftset, "ELEMENTS_PER_LINE", 3)
+    wanted = {interval(f"10.{i}.0.0/16") for i in range(7)}
+    script, _, _ = build_script(wanted)
+    lines = [l for l in script.splitlines() if l.startswith("add element")]
+    assert [len(elements(l, "add")) for l in lines] == [3, 3, 1]
+    assert elements(script, "add")[0] == "10.0.0.0/16"
+    assert check_script(script) == 7
+
+def test_check_script_rejects_overlaps():
+    script = "add element inet minerpanel iran_v4 { 5.0.0.0/16, 5.0.3.0/24 }\n"
+    with pytest.raises(ValueError, match="overlapping"):
+        check_script(script)
+
+def test_format_element_keeps_host_routes():
+    assert format_element(interval("1.2.3.4/32")) == "1.2.3.4/32"
+
+@pytest.mark.parametrize("elem, expected", [
+    ("1.2.3.4", interval("1.2.3.4/32")),
+    ({"prefix": {"addr": "5.0.0.0", "len": 23}}, interval("5.0.0.0/23")),
+    ({"range": ["5.0.0.0", "5.0.2.255"]}, (interval("5.0.0.0/24")[0], interval("5.0.2.0/24")[1])),
+    ({"elem": {"val": {"prefix": {"addr": "6.0.0.0", "len": 8}}}}, interval("6.0.0.0/8")),
+])
+def test_nft_json_elements(elem, expected):
+    assert nftset._element_interval(elem) == expected
+
+def test_current_elements_without_nft(monkeypatch):
+    monkeypatch.setattr(nftset.shutil, "which", lambda name: None)
+    assert nftset.current_elements() is None
+
+def test_domain_sets_script():
+    assert nftset.domain_sets_script().splitlines() == [
+        "add table inet minerpanel",
+        "add set inet minerpanel iran_domains_v4 { type ipv4_addr; }",
+        "add set inet minerpanel iran_domains_v6 { type ipv6_addr; }",
+    ]
+    assert "v6" not in nftset.domain_sets_script(set6=None)
+
+def test_ensure_domain_sets_writes_the_boot_include(tmp_path, monkeypatch):
+    monkeypatch.setattr(nftset.shutil, "which", lambda name: None)
+    include = tmp_path / "ruleset-post" / "sets.nft"
+    assert nftset.ensure_domain_sets(include=str(include)) == (True, "")
+    assert "add set inet minerpanel iran_domains_v4" in include.read_text()
@@ -0,0 +1,41 @@
+# Author: KOP3MA
+
+import os
+
+import pytest
+
+from prefixbin import MappedPrefixTable, PrefixFileError, compile_table, load_table, load_dual_table
+from prefixlist import PrefixTable, DualStackTable
+
+LIST = "2.144.0.0/14\n5.22.0.0/16\n2a01:5ec0::/29\n"
+
+@pytest.fixture
+def files(tmp_path):
+    source = tmp_path / "iran.txt"
+    source.write_text(LIST)
+    return source, tmp_path / "iran.bin"
+
+@pytest.mark.parametrize("byteorder", ["little", "big"])
+def test_round_trip(files, byteorder):
+    source, binary = files
+    table = DualStackTable.from_file(str(source))
+    compile_table(table.v4, str(binary), byteorder, table.v6)
+    mapped = MappedPrefixTable(str(binary))
+    assert mapped.intervals() == table.v4.intervals()
+    assert "2.145.1.1" in mapped and "5.23.0.1" not in mapped
+    assert "2a01:5ec1::1" in mapped.v6
+    mapped.close()
+
+def test_empty_file_is_a_prefix_file_error(files):
+    _, binary = files
+    binary.write_bytes(b"")
+    with pytest.raises(PrefixFileError, match="too short"):
+        MappedPrefixTable(str(binary))
+
+def test_empty_file_falls_back_to_the_list(files):
+    source, binary = files
+    binary.write_bytes(b"")
+    os.utime(binary, (os.path.getmtime(source) + 10,) * 2)
+    table = load_table(str(binary), str(source))
+    assert type(table) is PrefixTable and "2.144.0.1" in table
+    assert "2a01:5ec0::1" in load_dual_table(str(binary), str(source))
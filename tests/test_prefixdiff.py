@@ -0,0 +1,145 @@
+# Author: KOP3MA
+
+import json
+import ipaddress
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import prefixbin
+import prefixdiff
+import iproute_batch
+from prefixlist import parse_families
+from prefixdiff import subtract, diff_intervals, diff_families, diff_lines, refresh, RefreshError
+
+def iv(cidr):
+    net = ipaddress.ip_network(cidr)
+    return int(net.network_address), int(net.broadcast_address)
+
+def families(*cidrs):
+    found, _ = parse_families(cidrs)
+    return found
+
+# =======================
+# 🟢 Interval diff
+# =======================
+@pytest.mark.parametrize("a, b, expected", [
+    ([(0, 99)], [], [(0, 99)]),
+    ([(0, 99)], [(0, 99)], []),
+    ([(0, 99)], [(10, 19), (50, 59)], [(0, 9), (20, 49), (60, 99)]),
+    ([(0, 9), (20, 29)], [(5, 24)], [(0, 4), (25, 29)]),
+    ([(10, 19)], [(0, 5), (30, 40)], [(10, 19)]),
+    ([(0, 9), (20, 29), (40, 49)], [(0, 100)], []),
+])
+def test_subtract(a, b, expected):
+    assert subtract(a, b) == expected
+
+def test_equivalent_lists_have_no_diff():
+    old = [iv("5.0.0.0/16"), iv("6.0.0.0/8")]
+    # Reordered, the /16 split into two /17s and a prefix the /8 already covers
+    new = [iv("6.1.0.0/16"), iv("6.0.0.0/8"), iv("5.0.128.0/17"), iv("5.0.0.0/17")]
+    assert diff_intervals(old, new) == ([], [])
+
+def test_diff_reports_only_the_changed_part():
+    added, removed = diff_intervals([iv("5.0.0.0/16")], [iv("5.0.0.0/17"), iv("7.0.0.0/24")])
+    assert added == [iv("7.0.0.0/24")]
+    assert removed == [iv("5.0.128.0/17")]
+
+def test_ipv6_only_change_is_found():
+    old = families("5.0.0.0/16")
+    new = families("5.0.0.0/16", "2a01:5ec0::/29")
+    added, removed = diff_families(old, new)
+    assert added == {4: [], 6: [iv("2a01:5ec0::/29")]} and removed == {4: [], 6: []}
+    assert diff_lines(added, removed) == ["+ 2a01:5ec0::/29"]
+
+def test_diff_lines_put_removals_first():
+    added, removed = diff_families(families("5.0.0.0/16"), families("6.0.0.0/16"))
+    assert diff_lines(added, removed) == ["- 5.0.0.0/16", "+ 6.0.0.0/16"]
+
+# =======================
+# 🟢 Refresh
+# =======================
+class Upstream(BaseHTTPRequestHandler):
+    def do_GET(self):
+        srv = self.server
+        if srv.etag and self.headers.get("If-None-Match") == srv.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = srv.text.encode()
+        self.send_response(200)
+        if srv.etag:
+            self.send_header("ETag", srv.etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def upstream():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Upstream)
+    srv.text, srv.etag = "5.0.0.0/16\n", '"a"'
+    threading.Thread(target=srv.serve_forever, args=(0.05,), daemon=True).start()
+    srv.url = f"http://127.0.0.1:{srv.server_port}/iran"
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+@pytest.fixture
+def local_list(tmp_path):
+    path = tmp_path / "iran"
+    path.write_text("5.0.0.0/16\n")
+    return path
+
+def test_not_modified_changes_nothing(upstream, local_list):
+    refresh(upstream.url, str(local_list))
+    report = refresh(upstream.url, str(local_list))
+    assert report["not_modified"] and not report["changed"]
+
+def test_refresh_applies_delta_and_recompiles_both_families(upstream, local_list):
+    upstream.text, upstream.etag = "5.0.0.0/16\n2a01:5ec0::/29\n", '"b"'
+    report = refresh(upstream.url, str(local_list), stores=("bin",))
+    assert report["changed"]
+    assert report["added"] == {4: [], 6: [iv("2a01:5ec0::/29")]}
+    assert local_list.read_text() == upstream.text
+    table = prefixbin.MappedPrefixTable(str(local_list.with_suffix(".bin")))
+    try:
+        assert "5.0.1.1" in table and "2a01:5ec0::1" in table.v6
+    finally:
+        table.close()
+    with open(str(local_list) + ".http.json") as f:
+        assert json.load(f)["etag"] == '"b"'
+
+def test_dry_run_keeps_list_and_validators(upstream, local_list):
+    upstream.text = "6.0.0.0/16\n"
+    report = refresh(upstream.url, str(local_list), stores=("bin",), dry_run=True)
+    assert report["changed"] and report["stores"]["bin"].startswith("would recompile")
+    assert local_list.read_text() == "5.0.0.0/16\n"
+    assert not (local_list.parent / "iran.http.json").exists()
+
+def test_empty_upstream_keeps_the_current_list(upstream, local_list):
+    upstream.text = "not a prefix\n"
+    with pytest.raises(RefreshError, match="no usable prefixes"):
+        refresh(upstream.url, str(local_list))
+    assert local_list.read_text() == "5.0.0.0/16\n"
+
+def test_routes_follow_the_recorded_install(monkeypatch, tmp_path):
+    state = tmp_path / "routes.json"
+    monkeypatch.setattr(iproute_batch, "load_install_state",
+                        lambda: json.loads(state.read_text()) if state.exists() else None)
+    old, new = families("5.0.0.0/24"), families("5.0.0.0/24", "7.0.0.0/24", "10.0.0.0/8")
+    assert "skipped" in prefixdiff.apply_routes("iran", old, new, False)
+
+    state.write_text(json.dumps({"table": "200", "via": "192.0.2.1", "dev": "wan"}))
+    tables, batches = [], []
+    monkeypatch.setattr(iproute_batch, "installed_routes",
+                        lambda table: tables.append(table) or {"5.0.0.0/24": ("192.0.2.1", "wan")})
+    monkeypatch.setattr(iproute_batch, "connected_routes", lambda: ["7.0.0.0/25"])
+    monkeypatch.setattr(iproute_batch, "apply_batch", lambda batch: batches.append(batch) or (True, "", 0.001))
+    assert prefixdiff.apply_routes("iran", old, new, False) == "routes +1 -0 in 1.0 ms"
+    assert tables == ["200"]
+    # 10/8 is LAN and 7.0.0.0/25 is connected: only the other half goes via the WAN
+    assert batches == ["route add 7.0.0.128/25 via 192.0.2.1 dev wan table 200 proto 233\n"]
@@ -0,0 +1,83 @@
+# Author: KOP3MA
+
+import os
+
+import pytest
+
+import procscan
+from procscan import ProcScanner, parse_stat, sort_processes
+from conftest import BOOT_TIME, stat_line
+
+def test_parse_stat_handles_awkward_names():
+    stat = parse_stat(stat_line(42, "a) (b c", ppid=7, utime=5, stime=6, threads=3, starttime=99, rss_pages=12))
+    assert stat == {"pid": 42, "name": "a) (b c", "state": "S", "ppid": 7, "utime": 5, "stime": 6,
+                    "threads": 3, "starttime": 99, "rss_pages": 12}
+
+def test_scan_reads_every_process(proc):
+    proc.add(1, "init", ["/sbin/procd"])
+    proc.add(200, "python3", ["python3", "/root/app.py", "--port", "5000"], rss_pages=100, starttime=500)
+    proc.add(300, "kworker/0:1", [])
+    (proc.root / "self").mkdir()
+    (proc.root / "400").mkdir()          # exited between listdir and read: no stat
+    found = {p.pid: p for p in ProcScanner(str(proc.root)).scan()}
+    assert sorted(found) == [1, 200, 300]
+    app = found[200]
+    assert app.cmdline == "python3 /root/app.py --port 5000"
+    assert app.rss == 100 * procscan.PAGE_SIZE
+    assert app.start_time == BOOT_TIME + 500 / procscan.CLK_TCK
+    assert found[300].cmdline == "[kworker/0:1]"
+
+def test_cmdline_is_cached_per_process_start(proc):
+    proc.add(200, "python3", ["python3", "old.py"], starttime=500)
+    scanner = ProcScanner(str(proc.root), refresh_interval=0)
+    assert scanner.scan()[0].cmdline == "python3 old.py"
+    (proc.root / "200" / "cmdline").write_bytes(b"changed\0")
+    assert scanner.scan()[0].cmdline == "python3 old.py"
+    # Same pid, new start time: a different process, so cmdline is read again
+    proc.add(200, "python3", ["python3", "new.py"], starttime=900)
+    assert scanner.scan()[0].cmdline == "python3 new.py"
+
+def test_exited_processes_leave_the_cache(proc):
+    proc.add(200, "a")
+    proc.add(201, "b")
+    scanner = ProcScanner(str(proc.root), refresh_interval=0)
+    scanner.scan()
+    proc.remove(201)
+    assert [p.pid for p in scanner.scan()] == [200]
+    assert [key[0] for key in scanner._static] == [200]
+
+def test_snapshot_is_reused_within_refresh_interval(proc):
+    proc.add(200, "a")
+    scanner = ProcScanner(str(proc.root), refresh_interval=60)
+    first = scanner.scan()
+    proc.add(201, "b")
+    assert scanner.scan() is first
+    assert len(scanner.scan(force=True)) == 2
+
+def test_cpu_percent_from_tick_delta(proc):
+    proc.add(200, "busy", utime=100, stime=0)
+    scanner = ProcScanner(str(proc.root))
+    assert scanner.read(200, now=10.0).cpu_percent == 0.0
+    proc.add(200, "busy", utime=100 + procscan.CLK_TCK // 2, stime=0)
+    assert scanner.read(200, now=11.0).cpu_percent == pytest.approx(50.0)
+
+def test_find_matches_cmdline_and_skips_itself(proc):
+    own = os.getpid()
+    proc.add(own, "python3", ["python3", "procscan.py", "--match", "app.py"])
+    proc.add(200, "python3", ["python3", "/root/app.py"], rss_pages=5)
+    proc.add(201, "python3", ["python3", "/root/other/app.py"], rss_pages=50)
+    proc.add(202, "sh", ["sh", "-c", "sleep 1"])
+    found = ProcScanner(str(proc.root)).find(r"app\.py")
+    assert [p.pid for p in found] == [201, 200]
+
+def test_sort_orders(proc):
+    proc.add(3, "a", rss_pages=2, utime=50)
+    proc.add(1, "b", rss_pages=3, utime=10)
+    proc.add(2, "c", rss_pages=1, utime=30)
+    processes = ProcScanner(str(proc.root)).scan()
+    assert [p.pid for p in sort_processes(processes, "rss")] == [1, 3, 2]
+    assert [p.pid for p in sort_processes(processes, "pid")] == [1, 2, 3]
+    assert [p.pid for p in sort_processes(processes, "cpu")] == [3, 2, 1]
+
+def test_missing_root_gives_no_processes(tmp_path):
+    assert ProcScanner(str(tmp_path / "nope")).scan() == []
@@ -0,0 +1,119 @@
+# Author: KOP3MA
+
+import io
+import os
+import zlib
+import struct
+import zipfile
+
+import pytest
+
+import streamzip
+from streamzip import extract_stream, StreamZipError
+
+class Unseekable(io.RawIOBase):
+    # Write side of a pipe: zipfile then sets the data-descriptor flag
+    def __init__(self):
+        self.data = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self.data += b
+        return len(b)
+
+class Trickle(io.RawIOBase):
+    # Hands out a few bytes per read, like a slow HTTP response
+    def __init__(self, data, step=7):
+        self.data, self.pos, self.step = data, 0, step
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        chunk = self.data[self.pos:self.pos + self.step]
+        self.pos += len(chunk)
+        return chunk
+
+def make_zip(members, seekable=True):
+    out = io.BytesIO() if seekable else Unseekable()
+    with zipfile.ZipFile(out, "w") as zf:
+        for name, data, method in members:
+            if name.endswith("/"):
+                zf.writestr(zipfile.ZipInfo(name), b"")
+            else:
+                zf.writestr(name, data, compress_type=method)
+    return bytes(out.getvalue() if seekable else out.data)
+
+def local_entry(name, data, descriptor=False):
+    # Hand-built stored member, for layouts zipfile does not write
+    crc = zlib.crc32(data)
+    head_crc, size = (0, 0) if descriptor else (crc, len(data))
+    flags = streamzip.FLAG_DATA_DESCRIPTOR if descriptor else 0
+    entry = struct.pack("<IHHHHHIIIHH", streamzip.LOCAL_HEADER_SIG, 20, flags, streamzip.METHOD_STORED, 0, 0,
+                        head_crc, size, size, len(name), 0) + name.encode() + data
+    if descriptor:
+        entry += struct.pack("<IIII", streamzip.DATA_DESCRIPTOR_SIG, crc, len(data), len(data))
+    return entry
+
+END = struct.pack("<I", streamzip.END_OF_DIR_SIG)
+
+def read_tree(root):
+    found = {}
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            with open(path, "rb") as f:
+                found[os.path.relpath(path, root)] = f.read()
+    return found
+
+MEMBERS = [("app.py", b"print('hi')\n" * 200, zipfile.ZIP_DEFLATED),
+           ("static/", b"", zipfile.ZIP_STORED),
+           ("static/logo.bin", os.urandom(3000), zipfile.ZIP_STORED),
+           ("templates/index.html", b"<html></html>", zipfile.ZIP_DEFLATED)]
+
+# Written to a pipe every member gets a data descriptor; stored files then have
+# no usable size, so that archive only holds deflated files
+PIPE_MEMBERS = [m for m in MEMBERS if m[2] == zipfile.ZIP_DEFLATED or m[0].endswith("/")]
+
+@pytest.mark.parametrize("members, seekable", [(MEMBERS, True), (PIPE_MEMBERS, False)])
+def test_extracts_members(tmp_path, members, seekable):
+    stats = extract_stream(io.BytesIO(make_zip(members, seekable)), str(tmp_path))
+    expected = {name: data for name, data, _ in members if not name.endswith("/")}
+    assert read_tree(tmp_path) == expected
+    assert stats["files"] == len(expected) and stats["dirs"] == 1
+    assert stats["bytes"] == sum(len(d) for d in expected.values())
+    assert (tmp_path / "static").is_dir()
+
+def test_small_reads_give_the_same_result(tmp_path):
+    stats = extract_stream(Trickle(make_zip(PIPE_MEMBERS, seekable=False)), str(tmp_path))
+    assert stats["files"] == 2
+    assert read_tree(tmp_path)["app.py"] == MEMBERS[0][1]
+
+def test_stored_directory_with_data_descriptor(tmp_path):
+    blob = local_entry("conf/", b"", descriptor=True) + local_entry("conf/a.txt", b"hello") + END
+    stats = extract_stream(io.BytesIO(blob), str(tmp_path))
+    assert stats == {"files": 1, "dirs": 1, "bytes": 5, "peak_member": 5, "downloaded": len(blob)}
+    assert (tmp_path / "conf" / "a.txt").read_bytes() == b"hello"
+
+def test_stored_file_with_data_descriptor_is_refused(tmp_path):
+    blob = local_entry("a.txt", b"hello", descriptor=True) + END
+    with pytest.raises(StreamZipError, match="cannot be streamed"):
+        extract_stream(io.BytesIO(blob), str(tmp_path))
+
+def test_crc_mismatch_leaves_no_file(tmp_path):
+    blob = bytearray(local_entry("a.txt", b"hello") + END)
+    blob[-6] ^= 0xFF      # flip a byte of the member data
+    with pytest.raises(StreamZipError, match="CRC mismatch"):
+        extract_stream(io.BytesIO(bytes(blob)), str(tmp_path))
+    assert read_tree(tmp_path) == {}
+
+def test_parent_references_stay_inside_dest(tmp_path):
+    dest = tmp_path / "dest"
+    extract_stream(io.BytesIO(local_entry("../../evil.txt", b"x") + END), str(dest))
+    assert read_tree(tmp_path) == {os.path.join("dest", "evil.txt"): b"x"}
+
+def test_not_a_zip(tmp_path):
+    with pytest.raises(StreamZipError, match="not a zip"):
+        extract_stream(io.BytesIO(b"<html>quota exceeded</html>"), str(tmp_path))
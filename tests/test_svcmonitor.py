@@ -0,0 +1,18 @@
+# Author: KOP3MA
+
+from svcmonitor import ServiceSampler
+
+LAUNCHER = ["python3", "/usr/lib/minerpanel/svclaunch.py", "run", "--log", "/tmp/minerpanel.log",
+            "/root/app/current/app.py"]
+CHILD = ["python3", "/usr/lib/minerpanel/svclaunch.py", "child", "--drain", "10",
+         "/root/app/releases/1/app.py", "--"]
+
+def test_app_under_its_launcher_is_counted_once(proc):
+    proc.add(100, "python3", LAUNCHER, rss_pages=10, threads=1)
+    proc.add(101, "python3", CHILD, ppid=100, rss_pages=20, threads=4)
+    proc.add(102, "sh", ["sh", "-c", "sleep 5"], ppid=101, rss_pages=1, threads=1)
+    proc.add(200, "dropbear", ["dropbear"], rss_pages=99)
+    sampler = ServiceSampler(r"app\.py", root=str(proc.root))
+    sample = sampler.sample()
+    assert sampler.tree == [100, 101, 102]
+    assert sample["procs"] == 3 and sample["threads"] == 6